@@ -5,181 +5,180 @@
  *  Description         :   Class for analyzing candle-stick patterns
 '''
 
+import numpy as np
 import pandas as pd
-from classes.ScreenipyTA import ScreenerTA
 from classes.ColorText import colorText
 
+# Candle-stick patterns are evaluated on the last candle of many stocks at once with numpy, following the
+# definitions and default candle settings of TA-Lib. Inputs are (stocks, bars) arrays with the last candle
+# of every stock in the last column, missing bars are NaN.
+
+
 class CandlePatterns:
 
     reversalPatternsBullish = ['Morning Star', 'Morning Doji Star', '3 Inside Up', 'Hammer', '3 White Soldiers', 'Bullish Engulfing', 'Dragonfly Doji', 'Supply Drought', 'Demand Rise']
     reversalPatternsBearish = ['Evening Star', 'Evening Doji Star', '3 Inside Down', 'Inverted Hammer', 'Hanging Man', '3 Black Crows', 'Bearish Engulfing', 'Shooting Star', 'Gravestone Doji']
 
+    # Candle settings of TA-Lib: (range type, number of previous candles averaged, factor)
+    settings = {
+        'BodyLong': ('RealBody', 10, 1.0),
+        'BodyShort': ('RealBody', 10, 1.0),
+        'BodyDoji': ('HighLow', 10, 0.1),
+        'ShadowLong': ('RealBody', 0, 1.0),
+        'ShadowVeryShort': ('HighLow', 10, 0.1),
+        'Near': ('HighLow', 5, 0.2),
+        'Far': ('HighLow', 5, 0.6),
+    }
+    penetration = 0.3   # Penetration of the first candle for (doji) star patterns
+
+    # Candles required by the longest pattern (ladder bottom) including the averaged ones
+    lookback = 15
+
+    # Patterns with max priority from top to bottom as (pattern, bullish, bearish) where bullish and bearish are
+    # (name displayed, name saved, color) used when the value of the pattern is positive and negative respectively
+    patterns = [
+        ('CDLMORNINGSTAR', ('Morning Star', 'Morning Star', colorText.GREEN), None),
+        ('CDLMORNINGDOJISTAR', ('Morning Doji Star', 'Morning Doji Star', colorText.GREEN), None),
+        ('CDLEVENINGSTAR', None, ('Evening Star', 'Evening Star', colorText.FAIL)),
+        ('CDLEVENINGDOJISTAR', None, ('Evening Doji Star', 'Evening Doji Star', colorText.FAIL)),
+        ('CDLLADDERBOTTOM', ('Ladder Bottom', 'Bullish Ladder Bottom', colorText.GREEN), ('Ladder Bottom', 'Bearish Ladder Bottom', colorText.FAIL)),
+        ('CDL3LINESTRIKE', ('3 Line Strike', '3 Line Strike', colorText.GREEN), ('3 Line Strike', '3 Line Strike', colorText.FAIL)),
+        ('CDL3BLACKCROWS', None, ('3 Black Crows', '3 Black Crows', colorText.FAIL)),
+        ('CDL3INSIDE', ('3 Inside Up', '3 Inside Up', colorText.GREEN), ('3 Inside Down', '3 Inside Down', colorText.FAIL)),
+        ('CDL3OUTSIDE', ('3 Outside Up', '3 Outside Up', colorText.GREEN), ('3 Outside Down', '3 Outside Down', colorText.FAIL)),
+        ('CDL3WHITESOLDIERS', ('3 White Soldiers', '3 White Soldiers', colorText.GREEN), None),
+        ('CDLHARAMI', ('Bullish Harami', 'Bullish Harami', colorText.GREEN), ('Bearish Harami', 'Bearish Harami', colorText.FAIL)),
+        ('CDLHARAMICROSS', ('Bullish Harami Cross', 'Bullish Harami Cross', colorText.GREEN), ('Bearish Harami Cross', 'Bearish Harami Cross', colorText.FAIL)),
+        ('CDLMARUBOZU', ('Bullish Marubozu', 'Bullish Marubozu', colorText.GREEN), ('Bearish Marubozu', 'Bearish Marubozu', colorText.FAIL)),
+        ('CDLHANGINGMAN', None, ('Hanging Man', 'Hanging Man', colorText.FAIL)),
+        ('CDLHAMMER', ('Hammer', 'Hammer', colorText.GREEN), None),
+        ('CDLINVERTEDHAMMER', ('Inverted Hammer', 'Inverted Hammer', colorText.GREEN), None),
+        ('CDLSHOOTINGSTAR', None, ('Shooting Star', 'Shooting Star', colorText.FAIL)),
+        ('CDLDRAGONFLYDOJI', ('Dragonfly Doji', 'Dragonfly Doji', colorText.GREEN), None),
+        ('CDLGRAVESTONEDOJI', None, ('Gravestone Doji', 'Gravestone Doji', colorText.FAIL)),
+        ('CDLDOJI', ('Doji', 'Doji', ''), None),
+        ('CDLENGULFING', ('Bullish Engulfing', 'Bullish Engulfing', colorText.GREEN), ('Bearish Engulfing', 'Bearish Engulfing', colorText.FAIL)),
+    ]
+
     def __init__(self):
         pass
 
     # Find candle-stick patterns
-    # Arrange if statements with max priority from top to bottom
     def findPattern(self, data, dict, saveDict):
-        data = data.head(4)
-        data = data[::-1]
-
-        check = ScreenerTA.CDLMORNINGSTAR(data['Open'], data['High'], data['Low'], data['Close'])
-        if(check):
-            dict['Pattern'] = colorText.BOLD + colorText.GREEN + 'Morning Star' + colorText.END
-            saveDict['Pattern'] = 'Morning Star'
-            return True
-
-        check = ScreenerTA.CDLMORNINGDOJISTAR(data['Open'], data['High'], data['Low'], data['Close'])
-        if(check):
-            dict['Pattern'] = colorText.BOLD + colorText.GREEN + 'Morning Doji Star' + colorText.END
-            saveDict['Pattern'] = 'Morning Doji Star'
-            return True
-        
-        check = ScreenerTA.CDLEVENINGSTAR(data['Open'], data['High'], data['Low'], data['Close'])
-        if(check):
-            dict['Pattern'] = colorText.BOLD + colorText.FAIL + 'Evening Star' + colorText.END
-            saveDict['Pattern'] = 'Evening Star'
-            return True
-
-        check = ScreenerTA.CDLEVENINGDOJISTAR(data['Open'], data['High'], data['Low'], data['Close'])
-        if(check):
-            dict['Pattern'] = colorText.BOLD + colorText.FAIL + 'Evening Doji Star' + colorText.END
-            saveDict['Pattern'] = 'Evening Doji Star'
-            return True
-
-        check = ScreenerTA.CDLLADDERBOTTOM(data['Open'], data['High'], data['Low'], data['Close'])
-        if(check):
-            if(check is not None and check.tail(1).item() > 0):
-                dict['Pattern'] = colorText.BOLD + colorText.GREEN + 'Ladder Bottom' + colorText.END
-                saveDict['Pattern'] = 'Bullish Ladder Bottom'
-            else:
-                dict['Pattern'] = colorText.BOLD + colorText.FAIL + 'Ladder Bottom' + colorText.END
-                saveDict['Pattern'] = 'Bearish Ladder Bottom'
-            return True
-
-        check = ScreenerTA.CDL3LINESTRIKE(data['Open'], data['High'], data['Low'], data['Close'])
-        if(check):
-            if(check is not None and check.tail(1).item() > 0):
-                dict['Pattern'] = colorText.BOLD + colorText.GREEN + '3 Line Strike' + colorText.END
-            else:
-                dict['Pattern'] = colorText.BOLD + colorText.FAIL + '3 Line Strike' + colorText.END
-            saveDict['Pattern'] = '3 Line Strike'
-            return True
-        
-        check = ScreenerTA.CDL3BLACKCROWS(data['Open'], data['High'], data['Low'], data['Close'])
-        if(check):
-            dict['Pattern'] = colorText.BOLD + colorText.FAIL + '3 Black Crows' + colorText.END
-            saveDict['Pattern'] = '3 Black Crows'
-            return True
-
-        check = ScreenerTA.CDL3INSIDE(data['Open'], data['High'], data['Low'], data['Close'])
-        if(check):
-            if(check is not None and check.tail(1).item() > 0):
-                dict['Pattern'] = colorText.BOLD + colorText.GREEN + '3 Outside Up' + colorText.END
-                saveDict['Pattern'] = '3 Inside Up'
-            else:
-                dict['Pattern'] = colorText.BOLD + colorText.FAIL + '3 Outside Down' + colorText.END
-                saveDict['Pattern'] = '3 Inside Down'
-            return True
-
-        check = ScreenerTA.CDL3OUTSIDE(data['Open'], data['High'], data['Low'], data['Close'])
-        if(check > 0):
-            dict['Pattern'] = colorText.BOLD + colorText.GREEN + '3 Outside Up' + colorText.END
-            saveDict['Pattern'] = '3 Outside Up'
-            return True
-        elif(check < 0):
-            dict['Pattern'] = colorText.BOLD + colorText.FAIL + '3 Outside Down' + colorText.END
-            saveDict['Pattern'] = '3 Outside Down'
-            return True
-
-        check = ScreenerTA.CDL3WHITESOLDIERS(data['Open'], data['High'], data['Low'], data['Close'])
-        if(check):
-            dict['Pattern'] = colorText.BOLD + colorText.GREEN + '3 White Soldiers' + colorText.END
-            saveDict['Pattern'] = '3 White Soldiers'
-            return True
-
-        check = ScreenerTA.CDLHARAMI(data['Open'], data['High'], data['Low'], data['Close'])
-        if(check):
-            if(check is not None and check.tail(1).item() > 0):
-                dict['Pattern'] = colorText.BOLD + colorText.GREEN + 'Bullish Harami' + colorText.END
-                saveDict['Pattern'] = 'Bullish Harami'
-            else:
-                dict['Pattern'] = colorText.BOLD + colorText.FAIL + 'Bearish Harami' + colorText.END
-                saveDict['Pattern'] = 'Bearish Harami'
-            return True
-
-        check = ScreenerTA.CDLHARAMICROSS(data['Open'], data['High'], data['Low'], data['Close'])
-        if(check):
-            if(check is not None and check.tail(1).item() > 0):
-                dict['Pattern'] = colorText.BOLD + colorText.GREEN + 'Bullish Harami Cross' + colorText.END
-                saveDict['Pattern'] = 'Bullish Harami Cross'
-            else:
-                dict['Pattern'] = colorText.BOLD + colorText.FAIL + 'Bearish Harami Cross' + colorText.END
-                saveDict['Pattern'] = 'Bearish Harami Cross'
-            return True
-
-        check = ScreenerTA.CDLMARUBOZU(data['Open'], data['High'], data['Low'], data['Close'])
-        if(check):
-            if(check is not None and check.tail(1).item() > 0):
-                dict['Pattern'] = colorText.BOLD + colorText.GREEN + 'Bullish Marubozu' + colorText.END
-                saveDict['Pattern'] = 'Bullish Marubozu'
+        # Most recent first data, read back in chronological order without reversing the frame
+        values = [data[column].to_numpy(dtype=np.float64)[:self.lookback][::-1].reshape(1, -1) for column in ['Open', 'High', 'Low', 'Close']]
+        found = self.findPatterns(*values)[0]
+        if found is None:
+            dict['Pattern'] = ''
+            saveDict['Pattern'] = ''
+            return False
+        displayName, saveName, color = found
+        dict['Pattern'] = colorText.BOLD + color + displayName + colorText.END
+        saveDict['Pattern'] = saveName
+        return True
+
+    # Find the pattern of max priority on the last candle of every stock
+    # Returns list of (name displayed, name saved, color) for every stock, None if no pattern is found
+    @classmethod
+    def findPatterns(cls, open, high, low, close):
+        values = cls.evaluatePatterns(open, high, low, close)
+        found = [None] * len(close)
+        for pattern, bullish, bearish in reversed(cls.patterns):
+            value = values[pattern]
+            for i in np.flatnonzero(value != 0):
+                found[i] = bullish if (value[i] > 0 and bullish is not None) or bearish is None else bearish
+        return found
+
+    # Evaluate all patterns on the last candle of every stock
+    # Returns {pattern: values} where a value is positive if bullish, negative if bearish and 0 if the pattern is not found
+    @classmethod
+    def evaluatePatterns(cls, open, high, low, close):
+        open, high, low, close = (np.atleast_2d(np.asarray(x, dtype=np.float64)) for x in (open, high, low, close))
+        bars = close.shape[1]
+        top, bottom = np.maximum(open, close), np.minimum(open, close)
+        ranges = {'RealBody': np.abs(close - open), 'HighLow': high - low, 'Shadows': (high - top) + (bottom - low)}
+        color = np.where(close >= open, 1, np.where(close < open, -1, 0))
+
+        # Value of the candle k bars before the last one, NaN if there is no such candle
+        def at(values, k):
+            if k >= bars:
+                return np.full(len(values), np.nan)
+            return values[:, bars - 1 - k]
+
+        # Average of the setting for the candle k bars before the last one, over the candles preceding it
+        def average(setting, k):
+            rangeType, period, factor = cls.settings[setting]
+            end = bars - 1 - k
+            if end < period:
+                return np.full(len(close), np.nan)
+            if period == 0:
+                value = ranges[rangeType][:, end]
             else:
-                dict['Pattern'] = colorText.BOLD + colorText.FAIL + 'Bearish Marubozu' + colorText.END
-                saveDict['Pattern'] = 'Bearish Marubozu'
-            return True
-
-        check = ScreenerTA.CDLHANGINGMAN(data['Open'], data['High'], data['Low'], data['Close'])
-        if(check):
-            dict['Pattern'] = colorText.BOLD + colorText.FAIL + 'Hanging Man' + colorText.END
-            saveDict['Pattern'] = 'Hanging Man'
-            return True
-        
-        check = ScreenerTA.CDLHAMMER(data['Open'], data['High'], data['Low'], data['Close'])
-        if(check):
-            dict['Pattern'] = colorText.BOLD + colorText.GREEN + 'Hammer' + colorText.END
-            saveDict['Pattern'] = 'Hammer'
-            return True
-
-        check = ScreenerTA.CDLINVERTEDHAMMER(data['Open'], data['High'], data['Low'], data['Close'])
-        if(check):
-            dict['Pattern'] = colorText.BOLD + colorText.GREEN + 'Inverted Hammer' + colorText.END
-            saveDict['Pattern'] = 'Inverted Hammer'
-            return True
-
-        check = ScreenerTA.CDLSHOOTINGSTAR(data['Open'], data['High'], data['Low'], data['Close'])
-        if(check):
-            dict['Pattern'] = colorText.BOLD + colorText.FAIL + 'Shooting Star' + colorText.END
-            saveDict['Pattern'] = 'Shooting Star'
-            return True
-
-        check = ScreenerTA.CDLDRAGONFLYDOJI(data['Open'], data['High'], data['Low'], data['Close'])
-        if(check):
-            dict['Pattern'] = colorText.BOLD + colorText.GREEN + 'Dragonfly Doji' + colorText.END
-            saveDict['Pattern'] = 'Dragonfly Doji'
-            return True
-
-        check = ScreenerTA.CDLGRAVESTONEDOJI(data['Open'], data['High'], data['Low'], data['Close'])
-        if(check):
-            dict['Pattern'] = colorText.BOLD + colorText.FAIL + 'Gravestone Doji' + colorText.END
-            saveDict['Pattern'] = 'Gravestone Doji'
-            return True
-
-        check = ScreenerTA.CDLDOJI(data['Open'], data['High'], data['Low'], data['Close'])
-        if(check):
-            dict['Pattern'] = colorText.BOLD + 'Doji' + colorText.END
-            saveDict['Pattern'] = 'Doji'
-            return True
-
-        check = ScreenerTA.CDLENGULFING(data['Open'], data['High'], data['Low'], data['Close'])
-        if(check > 0):
-            dict['Pattern'] = colorText.BOLD + colorText.GREEN + 'Bullish Engulfing' + colorText.END
-            saveDict['Pattern'] = 'Bullish Engulfing'
-            return True
-        elif(check < 0):
-            dict['Pattern'] = colorText.BOLD + colorText.FAIL + 'Bearish Engulfing' + colorText.END
-            saveDict['Pattern'] = 'Bearish Engulfing'
-            return True
-
-        dict['Pattern'] = ''
-        saveDict['Pattern'] = ''
-        return False
+                value = ranges[rangeType][:, end - period:end].sum(axis=1) / period
+            return factor * value / (2.0 if rangeType == 'Shadows' else 1.0)
+
+        o, h, l, c, body, col, t, b = ({k: at(x, k) for k in range(5)} for x in (open, high, low, close, ranges['RealBody'], color, top, bottom))
+        upper = {k: h[k] - t[k] for k in range(5)}
+        lower = {k: b[k] - l[k] for k in range(5)}
+        bodyShort = {k: average('BodyShort', k) for k in range(3)}
+        bodyDoji = {k: average('BodyDoji', k) for k in range(3)}
+        veryShort = {k: average('ShadowVeryShort', k) for k in range(3)}
+        near = {k: average('Near', k) for k in range(4)}
+        far = {k: average('Far', k) for k in range(3)}
+        bodyLong = {k: average('BodyLong', k) for k in range(3)}
+        shadowLong = average('ShadowLong', 0)
+
+        def signal(condition, value):
+            return np.where(condition, value, 0)
+
+        values = {}
+        star = (body[2] > bodyLong[2]) & (body[0] > bodyShort[0])
+        values['CDLMORNINGSTAR'] = signal(star & (col[2] == -1) & (body[1] <= bodyShort[1]) & (t[1] < b[2]) & (col[0] == 1) &
+                                          (c[0] > c[2] + body[2] * cls.penetration), 100)
+        values['CDLMORNINGDOJISTAR'] = signal(star & (col[2] == -1) & (body[1] <= bodyDoji[1]) & (t[1] < b[2]) & (col[0] == 1) &
+                                              (c[0] > c[2] + body[2] * cls.penetration), 100)
+        values['CDLEVENINGSTAR'] = signal(star & (col[2] == 1) & (body[1] <= bodyShort[1]) & (b[1] > t[2]) & (col[0] == -1) &
+                                          (c[0] < c[2] - body[2] * cls.penetration), -100)
+        values['CDLEVENINGDOJISTAR'] = signal(star & (col[2] == 1) & (body[1] <= bodyDoji[1]) & (b[1] > t[2]) & (col[0] == -1) &
+                                              (c[0] < c[2] - body[2] * cls.penetration), -100)
+        values['CDLLADDERBOTTOM'] = signal((col[4] == -1) & (col[3] == -1) & (col[2] == -1) & (o[4] > o[3]) & (o[3] > o[2]) &
+                                           (c[4] > c[3]) & (c[3] > c[2]) & (col[1] == -1) & (upper[1] > veryShort[1]) &
+                                           (col[0] == 1) & (o[0] > o[1]) & (c[0] > h[1]), 100)
+        values['CDL3LINESTRIKE'] = signal((col[3] == col[2]) & (col[2] == col[1]) & (col[0] == -col[1]) & (col[1] != 0) &
+                                          (o[2] >= b[3] - near[3]) & (o[2] <= t[3] + near[3]) &
+                                          (o[1] >= b[2] - near[2]) & (o[1] <= t[2] + near[2]) &
+                                          (((col[1] == 1) & (c[1] > c[2]) & (c[2] > c[3]) & (o[0] > c[1]) & (c[0] < o[3])) |
+                                           ((col[1] == -1) & (c[1] < c[2]) & (c[2] < c[3]) & (o[0] < c[1]) & (c[0] > o[3]))), col[1] * 100)
+        values['CDL3BLACKCROWS'] = signal((col[3] == 1) & (col[2] == -1) & (lower[2] < veryShort[2]) & (col[1] == -1) & (lower[1] < veryShort[1]) &
+                                          (col[0] == -1) & (lower[0] < veryShort[0]) & (o[1] < o[2]) & (o[1] > c[2]) &
+                                          (o[0] < o[1]) & (o[0] > c[1]) & (h[3] > c[2]) & (c[2] > c[1]) & (c[1] > c[0]), -100)
+        values['CDL3INSIDE'] = signal((body[2] > bodyLong[2]) & (body[1] <= bodyShort[1]) & (t[1] < t[2]) & (b[1] > b[2]) &
+                                      (((col[2] == 1) & (col[0] == -1) & (c[0] < o[2])) | ((col[2] == -1) & (col[0] == 1) & (c[0] > o[2]))),
+                                      -col[2] * 100)
+        values['CDL3OUTSIDE'] = signal(((col[1] == 1) & (col[2] == -1) & (c[1] > o[2]) & (o[1] < c[2]) & (c[0] > c[1])) |
+                                       ((col[1] == -1) & (col[2] == 1) & (o[1] > c[2]) & (c[1] < o[2]) & (c[0] < c[1])), col[1] * 100)
+        values['CDL3WHITESOLDIERS'] = signal((col[2] == 1) & (upper[2] < veryShort[2]) & (col[1] == 1) & (upper[1] < veryShort[1]) &
+                                             (col[0] == 1) & (upper[0] < veryShort[0]) & (c[0] > c[1]) & (c[1] > c[2]) &
+                                             (o[1] > o[2]) & (o[1] <= c[2] + near[2]) & (o[0] > o[1]) & (o[0] <= c[1] + near[1]) &
+                                             (body[1] > body[2] - far[2]) & (body[0] > body[1] - far[1]) & (body[0] > bodyShort[0]), 100)
+        # Harami is weaker (80) if the second candle shares the top or bottom of the first one
+        inside = (t[0] < t[1]) & (b[0] > b[1])
+        harami = np.where(inside, 100, np.where((t[0] <= t[1]) & (b[0] >= b[1]), 80, 0)) * -col[1]
+        values['CDLHARAMI'] = signal((body[1] > bodyLong[1]) & (body[0] <= bodyShort[0]), harami)
+        values['CDLHARAMICROSS'] = signal((body[1] > bodyLong[1]) & (body[0] <= bodyDoji[0]), harami)
+        values['CDLMARUBOZU'] = signal((body[0] > bodyLong[0]) & (upper[0] < veryShort[0]) & (lower[0] < veryShort[0]), col[0] * 100)
+        hammer = (body[0] < bodyShort[0]) & (lower[0] > shadowLong) & (upper[0] < veryShort[0])
+        values['CDLHANGINGMAN'] = signal(hammer & (b[0] >= h[1] - near[1]), -100)
+        values['CDLHAMMER'] = signal(hammer & (b[0] <= l[1] + near[1]), 100)
+        invertedHammer = (body[0] < bodyShort[0]) & (upper[0] > shadowLong) & (lower[0] < veryShort[0])
+        values['CDLINVERTEDHAMMER'] = signal(invertedHammer & (t[0] < b[1]), 100)
+        values['CDLSHOOTINGSTAR'] = signal(invertedHammer & (b[0] > t[1]), -100)
+        doji = body[0] <= bodyDoji[0]
+        values['CDLDRAGONFLYDOJI'] = signal(doji & (upper[0] < veryShort[0]) & (lower[0] > veryShort[0]), 100)
+        values['CDLGRAVESTONEDOJI'] = signal(doji & (lower[0] < veryShort[0]) & (upper[0] > veryShort[0]), 100)
+        values['CDLDOJI'] = signal(doji, 100)
+        # Engulfing is weaker (80) if the open or close of both candles are equal
+        engulfing = ((col[0] == 1) & (col[1] == -1) & (((c[0] >= o[1]) & (o[0] < c[1])) | ((c[0] > o[1]) & (o[0] <= c[1])))) | \
+                    ((col[0] == -1) & (col[1] == 1) & (((o[0] >= c[1]) & (c[0] < o[1])) | ((o[0] > c[1]) & (c[0] <= o[1]))))
+        values['CDLENGULFING'] = signal(engulfing, np.where((o[0] != c[1]) & (c[0] != o[1]), 100, 80) * col[0])
+        return values
@@ -8,6 +8,7 @@
 import sys
 import os
 import glob
+import shutil
 import re
 import configparser
 from datetime import date
@@ -34,12 +35,18 @@ class tools:
         self.cacheEnabled = True
         self.stageTwo = False
         self.useEMA = False
+        self.batchSize = 50
+        self.chunkSize = 10         # Stocks sent to a consumer at once
+        self.fetchThreads = 8       # Threads downloading stock data while screening, 0 to let consumers download
+        self.resultsSink = ''       # CSV file to write matched stocks into while screening, empty to disable
 
+    # Delete cached stock data, both columnar cache directories and legacy pickles
     def deleteStockData(self,excludeFile=None):
-        for f in glob.glob('stock_data*.pkl'):
-            if excludeFile is not None:
-                if not f.endswith(excludeFile):
-                    os.remove(f)
+        for f in glob.glob('stock_data*'):
+            if excludeFile is not None and os.path.splitext(f)[0].endswith(os.path.splitext(excludeFile)[0]):
+                continue
+            if os.path.isdir(f):
+                shutil.rmtree(f, ignore_errors=True)
             else:
                 os.remove(f)
 
@@ -60,6 +67,10 @@ class tools:
             parser.set('config', 'cacheStockData', 'y')
             parser.set('config', 'onlyStageTwoStocks', 'y' if self.stageTwo else 'n')
             parser.set('config', 'useEMA', 'y' if self.useEMA else 'n')
+            parser.set('config', 'batchSize', str(self.batchSize))
+            parser.set('config', 'chunkSize', str(self.chunkSize))
+            parser.set('config', 'fetchThreads', str(self.fetchThreads))
+            parser.set('config', 'resultsSink', self.resultsSink)
             try:
                 fp = open('screenipy.ini', 'w')
                 parser.write(fp)
@@ -118,6 +129,10 @@ class tools:
             parser.set('config', 'cacheStockData', self.cacheStockData)
             parser.set('config', 'onlyStageTwoStocks', self.stageTwoPrompt)
             parser.set('config', 'useEMA', self.useEmaPrompt)
+            parser.set('config', 'batchSize', str(self.batchSize))
+            parser.set('config', 'chunkSize', str(self.chunkSize))
+            parser.set('config', 'fetchThreads', str(self.fetchThreads))
+            parser.set('config', 'resultsSink', self.resultsSink)
 
             # delete stock data due to config change
             self.deleteStockData()
@@ -164,6 +179,11 @@ class tools:
                     self.useEMA = False
                 else:
                     self.useEMA = True
+                # Optional keys - Older config files may not have them
+                self.batchSize = int(parser.get('config', 'batchSize', fallback=self.batchSize))
+                self.chunkSize = max(1, int(parser.get('config', 'chunkSize', fallback=self.chunkSize)))
+                self.fetchThreads = int(parser.get('config', 'fetchThreads', fallback=self.fetchThreads))
+                self.resultsSink = parser.get('config', 'resultsSink', fallback=self.resultsSink)
             except configparser.NoOptionError:
                 input(colorText.BOLD + colorText.FAIL +
                       '[+] Screenipy requires user configuration again. Press enter to continue..' + colorText.END)
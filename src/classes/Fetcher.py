@@ -13,6 +13,7 @@ import random
 import os
 import datetime
 import yfinance as yf
+import numpy as np
 import pandas as pd
 from nsetools import Nse
 from classes.ColorText import colorText
@@ -261,6 +262,69 @@ class tools:
                   colorText.END, end='\r', flush=True)
         return data, dateDict
 
+    # Fetch stock price data of multiple stocks with a single request to Yahoo finance
+    # Returns a dict of {stockCode: OHLCV DataFrame}, stocks without data are skipped
+    # If start is given, bars from that date are fetched instead of the whole period
+    def fetchStockDataBatch(self, stockCodes, period, duration, proxyServer, tickerOption=None, start=None):
+        append_exchange = ".NS"
+        if tickerOption == 15 or tickerOption == 16:
+            append_exchange = ""
+        tickers = {(stockCode + append_exchange): stockCode for stockCode in stockCodes}
+        with SuppressOutput(suppress_stdout=True, suppress_stderr=True):
+            data = yf.download(
+                tickers=list(tickers.keys()),
+                period=period if start is None else None,
+                start=start,
+                interval=duration,
+                proxy=proxyServer,
+                progress=False,
+                timeout=10,
+                group_by='ticker',
+                threads=True,
+                auto_adjust=False
+            )
+        return self.splitBatchData(data, tickers)
+
+    # Split multi-index (Ticker, Price) frame of batch download into per-stock frames
+    def splitBatchData(self, data:pd.DataFrame, tickers:dict) -> dict:
+        stockData = {}
+        if data is None or len(data) == 0:
+            return stockData
+        if not isinstance(data.columns, pd.MultiIndex):
+            if len(tickers) != 1:
+                return stockData
+            data = pd.concat({list(tickers.keys())[0]: data}, axis=1)
+        available = data.columns.get_level_values(0)
+        for ticker, stockCode in tickers.items():
+            if ticker not in available:
+                continue
+            try:
+                stock = data[ticker].rename_axis(None, axis=1)
+                stock = stock[['Open', 'High', 'Low', 'Close', 'Adj Close', 'Volume']]
+            except KeyError:
+                continue
+            # Rows of the union index where this stock did not trade are all NaN
+            stock = stock.dropna(how='all')
+            if len(stock) == 0:
+                continue
+            stockData[stockCode] = stock
+        return stockData
+
+    # Append newly fetched bars to cached data of a stock and drop the bars older than periodDays before the latest one
+    # Returns None if prices of the bars present in both disagree, e.g. after adjustment for a split or dividend
+    @staticmethod
+    def mergeStockData(cached:pd.DataFrame, delta:pd.DataFrame, periodDays:int, tolerance=1e-3):
+        common = cached.index.intersection(delta.index)
+        prices = [c for c in ['Open', 'High', 'Low', 'Close', 'Adj Close'] if c in cached.columns and c in delta.columns]
+        if len(common) == 0 or len(prices) == 0:
+            return None
+        if not np.allclose(cached.loc[common, prices].to_numpy(dtype=float), delta.loc[common, prices].to_numpy(dtype=float),
+                           rtol=tolerance, equal_nan=True):
+            return None
+        delta = delta[[c for c in cached.columns if c in delta.columns]]
+        merged = pd.concat([cached[~cached.index.isin(delta.index)], delta]).sort_index()
+        return merged[merged.index >= merged.index[-1] - pd.Timedelta(days=periodDays)]
+
     # Get Daily Nifty 50 Index:
     def fetchLatestNiftyDaily(self, proxyServer=None):
         data = yf.download(
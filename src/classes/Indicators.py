@@ -0,0 +1,102 @@
+'''
+ *  Project             :   Screenipy
+ *  Author              :   Pranjal Joshi
+ *  Created             :   17/10/2026
+ *  Description         :   Lazily computed per stock indicator cache shared by the validators
+'''
+
+import numpy as np
+import pandas as pd
+from classes.ScreenipyTA import ScreenerTA
+
+
+# Indicators of a single stock keyed by (indicator, params). Each indicator is computed on first request from the
+# chronological (oldest first) data and reused by every later validator asking for it.
+# Values are contiguous float64 numpy arrays aligned with the chronological data.
+class StockIndicators:
+
+    def __init__(self, data:pd.DataFrame):
+        self.data = data
+        self.cache = {}
+
+    # Cached value of indicator computed with params, compute() is called only on the first request
+    def get(self, indicator, params, compute):
+        key = (indicator, params)
+        if key not in self.cache:
+            self.cache[key] = np.ascontiguousarray(compute(), dtype=np.float64).reshape(-1)
+        return self.cache[key]
+
+    # Store a value computed elsewhere, such as by a StockStream
+    def set(self, indicator, params, values):
+        self.cache[(indicator, params)] = np.ascontiguousarray(values, dtype=np.float64).reshape(-1)
+        return self.cache[(indicator, params)]
+
+    # Column of the data as float64 array
+    def column(self, name):
+        return self.get('column', name, lambda: self.data[name].to_numpy())
+
+    def EMA(self, timeperiod, column='Close'):
+        return self.get('EMA', (timeperiod, column), lambda: ScreenerTA.EMA(self.column(column), timeperiod=timeperiod))
+
+    def MA(self, timeperiod, column='Close'):
+        return self.get('MA', (timeperiod, column), lambda: ScreenerTA.MA(self.column(column), timeperiod=timeperiod))
+
+    # Rolling mean, same as DataFrame.rolling(window).mean()
+    def rollingMean(self, window, column='Close'):
+        return self.get('rollingMean', (window, column), lambda: pd.Series(self.column(column)).rolling(window=window).mean())
+
+    def RSI(self, timeperiod=14, column='Close'):
+        return self.get('RSI', (timeperiod, column), lambda: ScreenerTA.RSI(self.column(column), timeperiod=timeperiod))
+
+    # Most recent first values of the indicator, the order of preprocessed data
+    @staticmethod
+    def recent(values, count=None):
+        values = values[::-1]
+        return values if count is None else values[:count]
+
+    # Most recent first view of the count most recent bars of the column
+    def recentBars(self, column, count=None):
+        return self.recent(self.column(column), count)
+
+    # Chronological (contiguous) view of the count most recent bars of the column
+    def lastBars(self, column, count):
+        values = self.column(column)
+        return values[max(len(values) - count, 0):]
+
+
+# Read-only most recent first float64 columns of preprocessed data with NaN and inf replaced by 0, the values of
+# data.fillna(0).replace([np.inf, -np.inf], 0) without copying the whole frame. Columns are sanitized on first access
+# and shared by the views of the most recent bars returned by head(). When the indicators of the stock are given, columns
+# are sanitized from their chronological arrays and read in reverse without copying.
+class SanitizedData:
+
+    def __init__(self, data:pd.DataFrame, indicators:StockIndicators=None, parent=None, count=None):
+        self.data = data
+        self.indicators = indicators
+        self.parent = parent
+        self.length = len(data) if parent is None else min(count, len(parent))
+        self.columns = {}
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, column):
+        if column not in self.columns:
+            if self.parent is not None:
+                values = self.parent[column][:self.length]
+            elif self.indicators is not None:
+                values = self.sanitize(self.indicators.column(column))[::-1]
+            else:
+                values = self.sanitize(self.data[column].to_numpy(dtype=np.float64))
+            self.columns[column] = values
+        return self.columns[column]
+
+    @staticmethod
+    def sanitize(values):
+        values = np.nan_to_num(values, nan=0.0, posinf=0.0, neginf=0.0)
+        values.setflags(write=False)
+        return values
+
+    # View of the count most recent bars, at most the bars of this view
+    def head(self, count):
+        return SanitizedData(self.data, parent=self if self.parent is None else self.parent, count=min(count, self.length))
@@ -0,0 +1,325 @@
+'''
+ *  Project             :   Screenipy
+ *  Author              :   Pranjal Joshi
+ *  Created             :   17/10/2026
+ *  Description         :   Lorentzian Classification of one stock or of many stocks at once, without advanced_ta
+'''
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Gives the isNewBuySignal and isNewSellSignal of the latest bar of advanced_ta.LorentzianClassification with its default
+# settings: features RSI(14, 2), WT(10, 11), CCI(20, 2), ADX(20, 2) and RSI(9, 2) as defined by the ta library, 8 neighbours
+# within 2000 bars back, volatility and regime filters, no EMA, SMA or kernel filters on these signals.
+# The neighbours found for a bar are carried over to the next one (as in the Pine script the classifier comes from), so
+# predictions are scanned over the whole history once. Lorentzian distances are compared without their logarithm,
+# the order is the same. Signals are evaluated only back to the previous prediction that passes the filters.
+
+
+class Lorentzian:
+
+    features = (('RSI', 14, 2), ('WT', 10, 11), ('CCI', 20, 2), ('ADX', 20, 2), ('RSI', 9, 2))
+    neighborsCount = 8
+    maxBarsBack = 2000
+    regimeThreshold = -0.1
+    batchSize = 64          # Rows of distances computed at once for one stock
+    batchStocks = 100       # Fewer stocks are scanned one by one
+
+    # EMA of ta.trend.ema_indicator
+    @staticmethod
+    def ema(values, window):
+        return pd.Series(values).ewm(span=window, min_periods=window, adjust=False).mean().to_numpy()
+
+    # SMA of ta.trend.sma_indicator
+    @staticmethod
+    def sma(values, window):
+        return pd.Series(values).rolling(window=window, min_periods=window).mean().to_numpy()
+
+    # Previous values, NaN for the first one
+    @staticmethod
+    def shift(values):
+        return np.concatenate(([np.nan], values[:-1]))
+
+    # RSI of ta.momentum.rsi
+    @staticmethod
+    def rsi(close, window):
+        diff = close - Lorentzian.shift(close)
+        wilder = lambda values: pd.Series(values).ewm(alpha=1 / window, min_periods=window, adjust=False).mean().to_numpy()
+        up = wilder(np.where(diff > 0, diff, 0.0))
+        down = wilder(-np.where(diff < 0, diff, 0.0))
+        return np.where(down == 0, 100, 100 - (100 / (1 + up / down)))
+
+    # CCI of ta.trend.cci
+    @staticmethod
+    def cci(high, low, close, window, constant=0.015):
+        typical = (high + low + close) / 3.0
+        mean = Lorentzian.sma(typical, window)
+        deviation = np.full(len(typical), np.nan)
+        if len(typical) >= window:
+            windows = sliding_window_view(typical, window)
+            deviation[window - 1:] = np.abs(windows - windows.mean(axis=1, keepdims=True)).mean(axis=1)
+        return (typical - mean) / (constant * deviation)
+
+    # Wave Trend of advanced_ta
+    @staticmethod
+    def waveTrend(source, n1, n2):
+        ema1 = Lorentzian.ema(source, n1)
+        ema2 = Lorentzian.ema(np.abs(source - ema1), n1)
+        ci = (source - ema1) / (0.015 * ema2)
+        wt1 = Lorentzian.ema(ci, n2)
+        return wt1 - Lorentzian.sma(wt1, 4)
+
+    # ADX of ta.trend.adx, raises ValueError with less than 2 * window bars as ta does
+    @staticmethod
+    def adx(high, low, close, window):
+        length = len(close) - (window - 1)
+        if length <= window:
+            raise ValueError(f'ADX({window}) needs at least {2 * window} bars')
+        previousClose = Lorentzian.shift(close)
+        trueRange = np.maximum(high, previousClose) - np.minimum(low, previousClose)
+        up = high - Lorentzian.shift(high)
+        down = Lorentzian.shift(low) - low
+        plus = np.abs(((up > down) & (up > 0)) * up)
+        minus = np.abs(((down > up) & (down > 0)) * down)
+        smoothed = []
+        for values in (trueRange, plus, minus):
+            series = [0.0] * length
+            series[0] = values[~np.isnan(values)][:window].sum()
+            following = values.tolist()
+            for i in range(1, length - 1):
+                series[i] = series[i - 1] - (series[i - 1] / float(window)) + following[window + i]
+            smoothed.append(np.array(series))
+        trs, dip, din = smoothed
+        dip = np.where(trs != 0, 100 * (dip / np.where(trs != 0, trs, 1)), 0)
+        din = np.where(trs != 0, 100 * (din / np.where(trs != 0, trs, 1)), 0)
+        total = dip + din
+        dx = np.where(total != 0, 100 * np.abs((dip - din) / np.where(total != 0, total, 1)), 0).tolist()
+        adx = [0.0] * length
+        adx[window] = np.mean(dx[0:window])
+        for i in range(window + 1, length):
+            adx[i] = ((adx[i - 1] * (window - 1)) + dx[i - 1]) / float(window)
+        return np.concatenate((np.zeros(window - 1), adx))
+
+    # ATR of ta.volatility.average_true_range, raises ValueError with less than window bars
+    @staticmethod
+    def atr(high, low, close, window):
+        if len(close) < window:
+            raise ValueError(f'ATR({window}) needs at least {window} bars')
+        previousClose = Lorentzian.shift(close)
+        trueRange = np.fmax(np.fmax(high - low, np.abs(high - previousClose)), np.abs(low - previousClose))
+        head = trueRange[:window]
+        atr = [0.0] * len(close)
+        atr[window - 1] = np.nansum(head) / np.count_nonzero(~np.isnan(head)) if not np.isnan(head).all() else np.nan
+        values = trueRange.tolist()
+        for i in range(window, len(atr)):
+            atr[i] = (atr[i - 1] * (window - 1) + values[i]) / float(window)
+        return np.array(atr)
+
+    # Min-max scaling to [0, 1] of sklearn.preprocessing.MinMaxScaler, raises ValueError for infinite values as it does
+    @staticmethod
+    def normalize(values):
+        if np.isinf(values).any():
+            raise ValueError('Input contains infinity')
+        if np.isnan(values).all():
+            return values
+        low, high = np.nanmin(values), np.nanmax(values)
+        scale = high - low
+        scale = 1.0 / (scale if scale >= 10 * np.finfo(np.float64).eps else 1.0)
+        return values * scale + (0 - low * scale)
+
+    # Feature of the classifier (RSI, WT, CCI or ADX)
+    @staticmethod
+    def feature(name, param1, param2, high, low, close):
+        if name == 'RSI':
+            return Lorentzian.ema(Lorentzian.rsi(close, param1), param2) / 100
+        if name == 'WT':
+            return Lorentzian.normalize(Lorentzian.waveTrend((high + low + close) / 3, param1, param2))
+        if name == 'CCI':
+            return Lorentzian.normalize(Lorentzian.ema(Lorentzian.cci(high, low, close, param1), param2))
+        if name == 'ADX':
+            return Lorentzian.adx(high, low, close, param1) / 100
+        raise ValueError(f'Unknown feature {name}')
+
+    # Bars where predictions pass the volatility and regime filters
+    @staticmethod
+    def filter(open, high, low, close):
+        volatility = Lorentzian.atr(high, low, close, 1) > Lorentzian.atr(high, low, close, 10)
+        source = ((open + high + low + close) / 4).tolist()
+        value1, value2 = [0.0] * len(source), [0.0] * len(source)
+        ranges = (high - low).tolist()
+        for i in range(len(source)):
+            if ranges[i] == 0:
+                continue
+            value1[i] = 0.2 * (source[i] - source[i - 1 if i >= 1 else 0]) + 0.8 * value1[i - 1 if i >= 1 else 0]
+            value2[i] = 0.1 * ranges[i] + 0.8 * value2[i - 1 if i >= 1 else 0]
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            omega = np.nan_to_num(np.abs(np.divide(value1, value2)))
+            alpha = ((-(omega ** 2) + np.sqrt((omega ** 4) + 16 * (omega ** 2))) / 8).tolist()
+        klmf = [0.0] * len(source)
+        for i in range(len(source)):
+            klmf[i] = alpha[i] * source[i] + (1 - alpha[i]) * klmf[i - 1 if i >= 1 else 0]
+        slope = np.abs(np.diff(klmf, prepend=0.0))
+        average = Lorentzian.ema(slope, 200)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            regime = ((slope - average) / average) >= Lorentzian.regimeThreshold
+        return volatility & regime
+
+    # Direction of price over the next 4 bars each bar is labelled with for training, as labelled by advanced_ta
+    @staticmethod
+    def labels(close):
+        before = np.full(close.shape, np.nan)
+        before[..., 4:] = close[..., :-4]
+        return np.where(before < close, -1, np.where(before > close, 1, 0))
+
+    # Feature series of a stock (features x bars) from its chronological OHLC arrays, raises ValueError if they can not be
+    # computed, as advanced_ta would fail for the stock
+    @staticmethod
+    def featureSeries(high, low, close):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.array([Lorentzian.feature(name, param1, param2, high, low, close) for name, param1, param2 in Lorentzian.features])
+
+    # Distances of the bars to the others (features x ... x bars), the product of 1 + |difference| of features
+    # Compared without the logarithm of the Lorentzian distance
+    @staticmethod
+    def distances(bars, others):
+        distance = None
+        for bar, other in zip(bars, others):
+            difference = np.subtract(bar, other)
+            np.abs(difference, out=difference)
+            difference += 1
+            if distance is None:
+                distance = difference
+            else:
+                distance *= difference
+        return distance
+
+    # Bars the bar can take as neighbours, the first maxBarsBack bars up to the bar except those at a multiple of 4
+    @staticmethod
+    def candidates(bar):
+        span = min(Lorentzian.maxBarsBack, bar + 1)
+        return span - (span + 3) // 4
+
+    # Predictions of every bar of a stock, the sum of the labels of the neighbours of the bar
+    @staticmethod
+    def predictions(features, labels):
+        bars = features.shape[-1]
+        first = max(bars - Lorentzian.maxBarsBack, 0)
+        keep, mark = Lorentzian.neighborsCount, round(Lorentzian.neighborsCount * 3 / 4)
+        neighbours = np.flatnonzero(np.arange(min(Lorentzian.maxBarsBack, bars)) % 4)
+        labels = labels[neighbours].tolist()
+        kept, keptLabels = [], []       # Neighbours of the bar, carried over to the next bar
+        predictions = np.zeros(bars)
+        for start in range(first, bars, Lorentzian.batchSize):
+            stop = min(start + Lorentzian.batchSize, bars)
+            others = neighbours[:Lorentzian.candidates(stop - 1)]
+            rows = Lorentzian.distances(features[:, start:stop, None], features[:, None, others]).tolist()
+            for bar, row in zip(range(start, stop), rows):
+                lastDistance = -1.0
+                for distance, label in zip(row[:Lorentzian.candidates(bar)], labels):
+                    if distance >= lastDistance:
+                        lastDistance = distance
+                        kept.append(distance)
+                        keptLabels.append(label)
+                        if len(kept) > keep:
+                            lastDistance = kept[mark]
+                            kept.pop(0)
+                            keptLabels.pop(0)
+                predictions[bar] = sum(keptLabels)
+        return predictions
+
+    # Predictions of stocks with the same number of bars (stocks x bars), scanned in lockstep. Each step only updates
+    # the stocks taking the bar as a neighbour, which pays off over scanning the stocks one by one for large batches.
+    # features: (stocks x features x bars), labels: (stocks x bars)
+    @staticmethod
+    def batchPredictions(features, labels):
+        stocks, _, bars = features.shape
+        first = max(bars - Lorentzian.maxBarsBack, 0)
+        keep, mark = Lorentzian.neighborsCount, round(Lorentzian.neighborsCount * 3 / 4)
+        # Neighbours of each stock in a flat ring buffer of keep slots per stock, oldest at start
+        kept = np.zeros(stocks * keep)
+        keptLabels = np.zeros(stocks * keep)
+        start = np.zeros(stocks, dtype=np.int64)
+        count = np.zeros(stocks, dtype=np.int64)
+        full = False
+        nextSlot = (np.arange(keep) + 1) % keep
+        markSlot = (np.arange(keep) + mark) % keep
+        neighbours = np.flatnonzero(np.arange(min(Lorentzian.maxBarsBack, bars)) % 4)
+        features = np.swapaxes(features, 0, 1)
+        others = features[:, :, neighbours]
+        labels = np.ascontiguousarray(labels[:, neighbours].T, dtype=np.float64)
+        predictions = np.zeros((stocks, bars))
+        for bar in range(first, bars):
+            rows = np.ascontiguousarray(Lorentzian.distances(features[:, :, bar, None], others[:, :, :Lorentzian.candidates(bar)]).T)
+            lastDistance = np.full(stocks, -1.0)
+            for i, distance in enumerate(rows):
+                take = np.flatnonzero(distance >= lastDistance)
+                if len(take) == 0:
+                    continue
+                ring = take * keep
+                oldest = start[take]
+                if full:
+                    lastDistance[take] = kept[ring + markSlot[oldest]] if mark < keep else distance[take]
+                    slot = oldest
+                    start[take] = nextSlot[oldest]
+                else:
+                    # Neighbours are being collected, as long as fewer than keep the new one is the last distance
+                    filled = count[take] == keep
+                    lastDistance[take] = np.where(filled, kept[ring + markSlot[oldest]], distance[take]) if mark < keep else distance[take]
+                    slot = np.where(filled, oldest, count[take])
+                    start[take] = np.where(filled, nextSlot[oldest], oldest)
+                    count[take] = np.minimum(count[take] + 1, keep)
+                    full = bool((count == keep).all())
+                kept[ring + slot] = distance[take]
+                keptLabels[ring + slot] = labels[i, take]
+            predictions[:, bar] = keptLabels.reshape(stocks, keep).sum(axis=1)
+        return predictions
+
+    # (isNewBuySignal, isNewSellSignal) of the latest bar, from the predictions and the filter of every bar
+    @staticmethod
+    def latestSignal(predictions, filter):
+        active = np.flatnonzero((predictions != 0) & filter)
+        if len(predictions) < 2 or len(active) == 0 or active[-1] != len(predictions) - 1:
+            return False, False     # Signal carried over from the previous bar
+        direction = np.sign(predictions[-1])
+        previous = np.sign(predictions[active[-2]]) if len(active) > 1 else 0
+        if direction == previous:
+            return False, False
+        return bool(direction > 0), bool(direction < 0)
+
+    # (isNewBuySignal, isNewSellSignal) of the latest bar of a stock, features are cached with its indicators
+    @staticmethod
+    def signal(indicators):
+        high, low, close = (indicators.column(name) for name in ('High', 'Low', 'Close'))
+        try:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                features = np.array([indicators.get('Lorentzian', feature, lambda feature=feature: Lorentzian.feature(*feature, high, low, close))
+                                     for feature in Lorentzian.features])
+                filter = indicators.get('LorentzianFilter', (), lambda: Lorentzian.filter(indicators.column('Open'), high, low, close)) != 0
+        except ValueError:
+            return False, False
+        return Lorentzian.latestSignal(Lorentzian.predictions(features, Lorentzian.labels(close)), filter)
+
+    # (isNewBuySignal, isNewSellSignal) of the latest bar of many stocks with the same number of bars (stocks x bars)
+    @staticmethod
+    def batchSignals(open, high, low, close):
+        signals = [(False, False)] * len(close)
+        features, filters, valid = [], [], []
+        for i in range(len(close)):
+            try:
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    features.append(Lorentzian.featureSeries(high[i], low[i], close[i]))
+                    filters.append(Lorentzian.filter(open[i], high[i], low[i], close[i]))
+                valid.append(i)
+            except ValueError:
+                pass
+        if len(valid) == 0:
+            return signals
+        labels = Lorentzian.labels(close[valid])
+        if len(valid) < Lorentzian.batchStocks:
+            predictions = [Lorentzian.predictions(stockFeatures, stockLabels) for stockFeatures, stockLabels in zip(features, labels)]
+        else:
+            predictions = Lorentzian.batchPredictions(np.array(features), labels)
+        for i, prediction, filter in zip(valid, predictions, filters):
+            signals[i] = Lorentzian.latestSignal(prediction, filter)
+        return signals
@@ -0,0 +1,96 @@
+'''
+ *  Project             :   Screenipy
+ *  Author              :   Pranjal Joshi
+ *  Created             :   17/10/2026
+ *  Description         :   Numpy inference of the Dense keras models used for Nifty predictions
+                            (Export: python NumpyModel.py nifty_model_v3.h5 [nifty_model_v3.npz])
+'''
+
+import os
+import sys
+import json
+import numpy as np
+
+
+# Sequential stack of Dense layers exported once from a keras .h5 file to a .npz, so that predictions need numpy only.
+# The .h5 file is read with h5py, which is installed along with TensorFlow, the .npz holds kernel_<i>, bias_<i> and
+# the activations of the layers.
+class NumpyModel:
+
+    activationFunctions = {
+        'linear': lambda x: x,
+        'relu': lambda x: np.maximum(x, 0),
+        'sigmoid': lambda x: np.exp(-np.logaddexp(0, -x)),
+        'tanh': np.tanh,
+        'softmax': lambda x: NumpyModel.softmax(x),
+    }
+
+    @staticmethod
+    def softmax(x):
+        x = np.exp(x - x.max(axis=-1, keepdims=True))
+        return x / x.sum(axis=-1, keepdims=True)
+
+    def __init__(self, kernels, biases, activations):
+        for activation in activations:
+            if activation not in NumpyModel.activationFunctions:
+                raise ValueError(f'Activation {activation} is not supported')
+        self.layers = list(zip([np.asarray(kernel, dtype=np.float32) for kernel in kernels],
+                               [np.asarray(bias, dtype=np.float32) for bias in biases], activations))
+
+    # Forward pass on a batch of inputs, called like the keras model
+    def __call__(self, inputs, training=False):
+        x = np.asarray(inputs, dtype=np.float32)
+        for kernel, bias, activation in self.layers:
+            x = NumpyModel.activationFunctions[activation](x @ kernel + bias)
+        return x
+
+    def predict(self, inputs, verbose=0):
+        return self(inputs)
+
+    @staticmethod
+    def load(npzFile):
+        with np.load(npzFile) as weights:
+            activations = weights['activations'].tolist()
+            return NumpyModel([weights[f'kernel_{i}'] for i in range(len(activations))],
+                              [weights[f'bias_{i}'] for i in range(len(activations))], activations)
+
+    # Write the weights of a Sequential model of Dense layers saved by keras in h5File to npzFile
+    @staticmethod
+    def export(h5File, npzFile):
+        import h5py
+        with h5py.File(h5File, 'r') as file:
+            config = json.loads(file.attrs['model_config'])
+            layers = {layer['config']['name']: layer for layer in config['config']['layers']}
+            group = file['model_weights'] if 'model_weights' in file else file
+            weights = {}
+            activations = []
+            for name in group.attrs['layer_names']:
+                name = name.decode() if isinstance(name, bytes) else name
+                layer = layers[name]
+                names = [weight.decode() if isinstance(weight, bytes) else weight for weight in group[name].attrs['weight_names']]
+                if layer['class_name'] in ('InputLayer', 'Dropout'):
+                    continue
+                if layer['class_name'] != 'Dense':
+                    raise ValueError(f'Layer {name} of type {layer["class_name"]} can not be exported')
+                i = len(activations)
+                kernel = [weight for weight in names if weight.split('/')[-1].startswith('kernel')]
+                bias = [weight for weight in names if weight.split('/')[-1].startswith('bias')]
+                weights[f'kernel_{i}'] = group[name][kernel[0]][()]
+                weights[f'bias_{i}'] = group[name][bias[0]][()] if bias else np.zeros(weights[f'kernel_{i}'].shape[1], dtype=np.float32)
+                activations.append(layer['config'].get('activation', 'linear'))
+        # Written to a temporary file first, so that a failed export never leaves a partial npzFile
+        try:
+            with open(npzFile + '.tmp', 'wb') as file:
+                np.savez(file, activations=np.array(activations), **weights)
+            os.replace(npzFile + '.tmp', npzFile)
+        finally:
+            if os.path.isfile(npzFile + '.tmp'):
+                os.remove(npzFile + '.tmp')
+        return NumpyModel.load(npzFile)
+
+
+if __name__ == '__main__':
+    h5File = sys.argv[1]
+    npzFile = sys.argv[2] if len(sys.argv) > 2 else os.path.splitext(h5File)[0] + '.npz'
+    model = NumpyModel.export(h5File, npzFile)
+    print(f'[+] Exported {len(model.layers)} layers of {h5File} to {npzFile}')
@@ -13,15 +13,22 @@ import sys
 import os
 import pytz
 import traceback
-from queue import Empty
+import threading
+import time
+import zlib
+from queue import Empty, Full
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 import classes.Fetcher as Fetcher
 import classes.Screener as Screener
 import classes.Utility as Utility
 from copy import deepcopy
 from classes.CandlePatterns import CandlePatterns
+from classes.StreamingIndicators import StockStream
 from classes.ColorText import colorText
 from classes.SuppressOutput import SuppressOutput
+from classes.VectorStore import VectorStore
 
 if sys.platform.startswith('win'):
     import multiprocessing.popen_spawn_win32 as forking
@@ -29,24 +36,108 @@ else:
     import multiprocessing.popen_fork as forking
 
 
+# Runs validators of a stock lazily, only when their result is asked for.
+# Validators are added in the order in which they used to run, writes of every validator to the
+# screening dictionaries are recorded and applied in that order, so the displayed columns are the same
+# no matter in which order the results were asked for.
+class ValidatorPlan:
+
+    # Dictionary recording the keys written to it
+    class TrackedDict(dict):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.written = {}
+
+        def __setitem__(self, key, value):
+            super().__setitem__(key, value)
+            self.written[key] = value
+
+    def __init__(self, screenDict, saveDict):
+        self.screenDict = screenDict
+        self.saveDict = saveDict
+        self.validators = {}    # name: (validator(screenDict, saveDict), names of validators whose output it reads)
+        self.results = {}
+        self.writes = {}        # name: (writes to screenDict, writes to saveDict)
+
+    def add(self, name, validator, after=()):
+        self.validators[name] = (validator, after)
+
+    # Get result of a validator, it is run on first use
+    def get(self, name):
+        if name not in self.results:
+            validator, after = self.validators[name]
+            for dependency in after:
+                self.get(dependency)
+            screenDict, saveDict = self.merged(until=name)
+            screenDict, saveDict = self.TrackedDict(screenDict), self.TrackedDict(saveDict)
+            self.results[name] = validator(screenDict, saveDict)
+            self.writes[name] = (screenDict.written, saveDict.written)
+        return self.results[name]
+
+    # Screening dictionaries with writes of validators run so far, up to the given validator
+    def merged(self, until=None):
+        screenDict, saveDict = dict(self.screenDict), dict(self.saveDict)
+        for name in self.validators:
+            if name == until:
+                break
+            if name in self.writes:
+                screenDict.update(self.writes[name][0])
+                saveDict.update(self.writes[name][1])
+        return screenDict, saveDict
+
+    # Value of a saveDict key after running the given validators
+    def saved(self, key, names):
+        for name in names:
+            if name in self.validators:
+                self.get(name)
+        return self.merged()[1][key]
+
+    # Run all the validators and fill the screening dictionaries
+    def complete(self):
+        for name in self.validators:
+            self.get(name)
+        screenDict, saveDict = self.merged()
+        self.screenDict.update(screenDict)
+        self.saveDict.update(saveDict)
+
+
 class StockConsumer(multiprocessing.Process):
 
-    def __init__(self, task_queue, result_queue, screenCounter, screenResultsCounter, stockDict, proxyServer, keyboardInterruptEvent):
+    maxStreams = 1000
+
+    def __init__(self, task_queue, result_queue, session_queue, screenCounter, screenResultsCounter, proxyServer, keyboardInterruptEvent, vectorLock=None):
         multiprocessing.Process.__init__(self)
         self.multiprocessingForWindows()
         self.task_queue = task_queue
         self.result_queue = result_queue
+        self.session_queue = session_queue      # Data of every screening session, sent to this consumer only
         self.screenCounter = screenCounter
         self.screenResultsCounter = screenResultsCounter
-        self.stockDict = stockDict
         self.proxyServer = proxyServer
         self.keyboardInterruptEvent = keyboardInterruptEvent
+        self.session = 0
+        self.streams = OrderedDict()    # StockStream of the stocks screened by this consumer during market hours, least recently used first
+        self.vectorLock = vectorLock    # Serializes writes of the consumers to the vector store
+        self.vectorStore = None         # Embeddings of similar stock search, opened on first use in the consumer process
+        self.startSession(0)
+
+    # Switch to the data of a new screening session
+    def startSession(self, session, context=None, stockPanel=None, stockCache=None, crossSection=None):
+        if getattr(self, 'stockPanel', None) is not None:
+            self.stockPanel.close()
+        self.session = session
+        self.context = context          # Arguments of screenStocks common to all the stocks of the session
+        self.stockPanel = stockPanel    # Shared memory panel of prefetched data, None if nothing was prefetched
+        self.stockCache = stockCache    # On-disk cache, None if caching is not applicable
+        self.crossSection = crossSection if crossSection is not None else {}   # Validator outputs of VectorScreener for stocks in the panel
         self.isTradingTime = Utility.tools.isTradingTime()
 
     def run(self):
+        # Validators suppress their output several times per stock, count it per thread instead of swapping streams
+        SuppressOutput.enableQuietMode()
         # while True:
         try:
-            while not self.keyboardInterruptEvent.is_set():
+            while True:
                 try:
                     next_task = self.task_queue.get()
                 except Empty:
@@ -54,14 +145,44 @@ class StockConsumer(multiprocessing.Process):
                 if next_task is None:
                     self.task_queue.task_done()
                     break
-                answer = self.screenStocks(*(next_task))
+                session, stocks = next_task
+                # Sessions are sent in order, skip the ones in which this consumer got no task
+                while self.session < session:
+                    self.startSession(*self.session_queue.get())
+                if session < self.session or self.keyboardInterruptEvent.is_set():
+                    self.task_queue.task_done()     # Left over from an earlier or interrupted session
+                    continue
+                answers = []
+                for stock, fetched in stocks:
+                    if self.keyboardInterruptEvent.is_set():
+                        break
+                    answers.append(self.screenStocks(stock=stock, fetched=fetched, **self.context))
+                # Embeddings must be in the store before the results reach the main process, which queries it at the end
+                if self.vectorStore is not None:
+                    try:
+                        self.vectorStore.flush()
+                    except Exception as e:
+                        self.vectorStore.pending.clear()    # Stocks are left out of the search as when a write failed before
                 self.task_queue.task_done()
-                self.result_queue.put(answer)
+                self.result_queue.put((session, answers))
         except Exception as e:
             sys.exit(0)
 
+    # Indicators of live data are updated incrementally from the previous scan of the stock. Streams are kept across
+    # sessions for at most maxStreams stocks, the least recently screened ones are dropped first.
+    def getStream(self, stock, configManager, backtestDate):
+        if not self.isTradingTime or Utility.tools.isBacktesting(backtestDate=backtestDate):
+            return None
+        stream = self.streams.get(stock)
+        if stream is None or stream.useEMA != configManager.useEMA:
+            stream = self.streams[stock] = StockStream(configManager.useEMA)
+            while len(self.streams) > self.maxStreams:
+                self.streams.popitem(last=False)
+        self.streams.move_to_end(stock)
+        return stream
+
     def screenStocks(self, tickerOption, executeOption, reversalOption, maLength, daysForLowestVolume, minRSI, maxRSI, respChartPattern, insideBarToLookback, totalSymbols,
-                     configManager, fetcher, screener:Screener.tools, candlePatterns, stock, newlyListedOnly, downloadOnly, vectorSearch, isDevVersion, backtestDate, printCounter=False):
+                     configManager, fetcher, screener:Screener.tools, candlePatterns, stock, newlyListedOnly, downloadOnly, vectorSearch, isDevVersion, backtestDate, fetched=None, printCounter=False):
         screenResults = pd.DataFrame(columns=[
             'Stock', 'Consolidating', 'Breaking-Out', 'MA-Signal', 'Volume', 'LTP', 'RSI', 'Trend', 'Pattern'])
         screeningDictionary = {'Stock': "", 'Consolidating': "",  'Breaking-Out': "",
@@ -79,9 +200,18 @@ class StockConsumer(multiprocessing.Process):
                 else:
                     period = configManager.period
 
-            if (self.stockDict.get(stock) is None) or (configManager.cacheEnabled is False) or self.isTradingTime or downloadOnly:
+            data = None
+            crossSection = self.crossSection.get(stock)
+            if fetched is not None:
+                pass    # Already downloaded by the fetch stage
+            elif self.stockPanel is not None and self.stockPanel.has(stock):
+                data = self.stockPanel.read(stock)
+            elif self.stockCache is not None and not downloadOnly:
+                data = self.stockCache.read(stock)
+
+            if data is None:
                 try:
-                    data, backtestReport = fetcher.fetchStockData(stock,
+                    data, backtestReport = fetched if fetched is not None else fetcher.fetchStockData(stock,
                                                 period,
                                                 configManager.duration,
                                                 self.proxyServer,
@@ -92,11 +222,13 @@ class StockConsumer(multiprocessing.Process):
                                                 tickerOption=tickerOption)
                 except Exception as e:
                     return screeningDictionary, saveDictionary
-                if configManager.cacheEnabled is True and not self.isTradingTime and (self.stockDict.get(stock) is None) or downloadOnly:
-                    self.stockDict[stock] = data.to_dict('split')
-                    if downloadOnly:
-                        raise Screener.DownloadDataOnly
+                if self.stockCache is not None and len(data) > 0:
+                    self.stockCache.write(stock, data)
+                if downloadOnly:
+                    raise Screener.DownloadDataOnly
             else:
+                if downloadOnly:
+                    raise Screener.DownloadDataOnly
                 if printCounter:
                     try:
                         print(colorText.BOLD + colorText.GREEN + ("[%d%%] Screened %d, Found %d. Fetching data & Analyzing %s..." % (
@@ -106,17 +238,15 @@ class StockConsumer(multiprocessing.Process):
                     except ZeroDivisionError:
                         pass
                     sys.stdout.write("\r\033[K")
-                data = self.stockDict.get(stock)
-                data = pd.DataFrame(
-                    data['data'], columns=data['columns'], index=data['index'])
 
             fullData, processedData = screener.preprocessData(
-                data, daysToLookback=configManager.daysToLookback)
+                data, daysToLookback=configManager.daysToLookback, stream=self.getStream(stock, configManager, backtestDate))
             
             if type(vectorSearch) != bool and type(vectorSearch) and vectorSearch[2] == True:
                 executeOption = 0
-                with self.screenCounter.get_lock():
-                    screener.addVector(fullData, stock, vectorSearch[1])
+                if self.vectorStore is None:
+                    self.vectorStore = VectorStore(lock=self.vectorLock)
+                screener.addVector(fullData, stock, vectorSearch[1], store=self.vectorStore)
 
             if newlyListedOnly:
                 if not screener.validateNewlyListed(fullData, period):
@@ -137,143 +267,113 @@ class StockConsumer(multiprocessing.Process):
                     colorText.BLUE + f'\x1B]8;;https://in.tradingview.com/chart?symbol={urlStock}\x1B\\{stock}\x1B]8;;\x1B\\' + colorText.END
                 saveDictionary['Stock'] = stock
 
-                consolidationValue = screener.validateConsolidation(
-                    processedData, screeningDictionary, saveDictionary, percentage=configManager.consolidationPercentage)
-                isMaReversal = screener.validateMovingAverages(
-                    processedData, screeningDictionary, saveDictionary, maRange=1.25)
-                isVolumeHigh = screener.validateVolume(
-                    processedData, screeningDictionary, saveDictionary, volumeRatio=configManager.volumeRatio)
-                isBreaking = screener.findBreakout(
-                    processedData, screeningDictionary, saveDictionary, daysToLookback=configManager.daysToLookback)
-                isLtpValid = screener.validateLTP(
-                    fullData, screeningDictionary, saveDictionary, minLTP=configManager.minLTP, maxLTP=configManager.maxLTP)
-                if executeOption == 4:
-                    isLowestVolume = screener.validateLowestVolume(processedData, daysForLowestVolume)
+                plan = ValidatorPlan(screeningDictionary, saveDictionary)
+                if crossSection is not None:
+                    screeningDictionary.update(crossSection[0])
+                    saveDictionary.update(crossSection[1])
+                    for name, result in zip(['consolidation', 'movingAverages', 'volume', 'breakout', 'ltp'], crossSection[2]):
+                        plan.add(name, lambda screenDict, saveDict, result=result: result)
                 else:
-                    isLowestVolume = False
-                isValidRsi = screener.validateRSI(
-                    processedData, screeningDictionary, saveDictionary, minRSI, maxRSI)
-                try:
-                    with SuppressOutput(suppress_stderr=True, suppress_stdout=True):
-                        currentTrend = screener.findTrend(
-                            processedData,
-                            screeningDictionary,
-                            saveDictionary,
-                            daysToLookback=configManager.daysToLookback,
-                            stockName=stock)
-                except np.RankWarning:
-                    screeningDictionary['Trend'] = 'Unknown'
-                    saveDictionary['Trend'] = 'Unknown'
-
-                with SuppressOutput(suppress_stderr=True, suppress_stdout=True):
-                    isCandlePattern = candlePatterns.findPattern(
-                        processedData, screeningDictionary, saveDictionary)
-                
-                isConfluence = False
-                isInsideBar = False
-                isIpoBase = False
-                if newlyListedOnly:
-                    isIpoBase = screener.validateIpoBase(stock, fullData, screeningDictionary, saveDictionary)
+                    plan.add('consolidation', lambda screenDict, saveDict: screener.validateConsolidation(
+                        processedData, screenDict, saveDict, percentage=configManager.consolidationPercentage))
+                    plan.add('movingAverages', lambda screenDict, saveDict: screener.validateMovingAverages(
+                        processedData, screenDict, saveDict, maRange=1.25))
+                    plan.add('volume', lambda screenDict, saveDict: screener.validateVolume(
+                        processedData, screenDict, saveDict, volumeRatio=configManager.volumeRatio))
+                    plan.add('breakout', lambda screenDict, saveDict: screener.findBreakout(
+                        processedData, screenDict, saveDict, daysToLookback=configManager.daysToLookback))
+                    plan.add('ltp', lambda screenDict, saveDict: screener.validateLTP(
+                        fullData, screenDict, saveDict, minLTP=configManager.minLTP, maxLTP=configManager.maxLTP))
+                plan.add('lowestVolume', lambda screenDict, saveDict: executeOption == 4 and screener.validateLowestVolume(processedData, daysForLowestVolume))
+                if crossSection is not None:
+                    plan.add('rsi', lambda screenDict, saveDict: crossSection[2][5])
+                else:
+                    plan.add('rsi', lambda screenDict, saveDict: screener.validateRSI(processedData, screenDict, saveDict, minRSI, maxRSI))
+                if crossSection is not None:
+                    plan.add('trend', lambda screenDict, saveDict: crossSection[2][6])
+                else:
+                    plan.add('trend', lambda screenDict, saveDict: screener.findTrend(processedData, screenDict, saveDict, daysToLookback=configManager.daysToLookback, stockName=stock))
+                plan.add('candlePattern', lambda screenDict, saveDict: self.suppressed(candlePatterns.findPattern, processedData, screenDict, saveDict))
+                plan.add('ipoBase', lambda screenDict, saveDict: newlyListedOnly and screener.validateIpoBase(stock, fullData, screenDict, saveDict))
                 if respChartPattern == 3 and executeOption == 7:
-                    isConfluence = screener.validateConfluence(stock, processedData, screeningDictionary, saveDictionary, percentage=insideBarToLookback)
+                    plan.add('confluence', lambda screenDict, saveDict: screener.validateConfluence(stock, processedData, screenDict, saveDict, percentage=insideBarToLookback))
+                else:
+                    plan.add('insideBar', lambda screenDict, saveDict: screener.validateInsideBar(processedData, screenDict, saveDict, chartPattern=respChartPattern, daysToLookback=insideBarToLookback),
+                             after=['movingAverages', 'trend'])
+                if maLength is not None and executeOption == 6 and reversalOption == 6:
+                    plan.add('narrowRange', lambda screenDict, saveDict: self.suppressed(screener.validateNarrowRange, processedData, screenDict, saveDict, nr=maLength))
                 else:
-                    isInsideBar = screener.validateInsideBar(processedData, screeningDictionary, saveDictionary, chartPattern=respChartPattern, daysToLookback=insideBarToLookback)
+                    plan.add('narrowRange', lambda screenDict, saveDict: self.suppressed(screener.validateNarrowRange, processedData, screenDict, saveDict))
+                plan.add('momentum', lambda screenDict, saveDict: screener.validateMomentum(processedData, screenDict, saveDict))
+                plan.add('vsa', lambda screenDict, saveDict: not (executeOption == 7 and respChartPattern < 3) and screener.validateVolumeSpreadAnalysis(processedData, screenDict, saveDict))
+                plan.add('reversalMA', lambda screenDict, saveDict: maLength is not None and executeOption == 6 and reversalOption == 4 and screener.findReversalMA(fullData, screenDict, saveDict, maLength))
+                plan.add('rsiCrossingMA', lambda screenDict, saveDict: executeOption == 6 and reversalOption == 8 and screener.findRSICrossingMA(fullData, screenDict, saveDict))
+                plan.add('vcp', lambda screenDict, saveDict: respChartPattern == 4 and self.suppressed(screener.validateVCP, fullData, screenDict, saveDict))
+                plan.add('trendlines', lambda screenDict, saveDict: executeOption == 7 and respChartPattern == 5 and screener.findTrendlines(fullData, screenDict, saveDict))
+                # Lorentzian classification is the most expensive validator, run it only for the criteria that read it:
+                # its Buy/Sell signal is the Pattern looked for by reversals 1 and 2
+                lorentzianSignal = crossSection[2][7] if crossSection is not None else None
+                plan.add('lorentzian', lambda screenDict, saveDict: executeOption == 6 and reversalOption in (1, 2, 7) and screener.validateLorentzian(
+                    fullData, screenDict, saveDict, lookFor=maLength, signal=lorentzianSignal))
+
+                # Pattern column as left by all the validators, used by the reversal criteria
+                finalPattern = lambda: plan.saved('Pattern', ['candlePattern', 'ipoBase', 'insideBar', 'narrowRange', 'momentum', 'vsa', 'vcp', 'trendlines', 'lorentzian'])
 
-                with SuppressOutput(suppress_stderr=True, suppress_stdout=True):
-                    if maLength is not None and executeOption == 6 and reversalOption == 6:
-                        isNR = screener.validateNarrowRange(processedData, screeningDictionary, saveDictionary, nr=maLength)
+                # Evaluate only what the selected criterion needs, most selective validators first
+                if executeOption == 0:
+                    isSelected = True
+                elif not plan.get('ltp'):
+                    isSelected = False
+                elif executeOption == 1:
+                    isSelected = (plan.get('breakout') and plan.get('volume')) or self.isConsolidating(plan.get('consolidation'), configManager)
+                elif executeOption == 2:
+                    isSelected = plan.get('breakout') and plan.get('volume')
+                elif executeOption == 3:
+                    isSelected = self.isConsolidating(plan.get('consolidation'), configManager)
+                elif executeOption == 4:
+                    isSelected = plan.get('lowestVolume')
+                elif executeOption == 5:
+                    isSelected = plan.get('rsi')
+                elif executeOption == 6:
+                    if reversalOption == 1:
+                        isSelected = plan.get('movingAverages') > 0 or finalPattern() in CandlePatterns.reversalPatternsBullish or 'buy' in finalPattern().lower()
+                    elif reversalOption == 2:
+                        isSelected = plan.get('movingAverages') < 0 or finalPattern() in CandlePatterns.reversalPatternsBearish or 'sell' in finalPattern().lower()
+                    elif reversalOption == 3:
+                        isSelected = plan.get('momentum')
+                    elif reversalOption == 4:
+                        isSelected = plan.get('reversalMA')
+                    elif reversalOption == 5:
+                        isSelected = plan.get('vsa') and finalPattern() in CandlePatterns.reversalPatternsBullish
+                    elif reversalOption == 6:
+                        isSelected = plan.get('narrowRange')
+                    elif reversalOption == 7:
+                        isSelected = plan.get('lorentzian')
+                    elif reversalOption == 8:
+                        isSelected = plan.get('rsiCrossingMA')
                     else:
-                        isNR = screener.validateNarrowRange(processedData, screeningDictionary, saveDictionary)
-                
-                isMomentum = screener.validateMomentum(processedData, screeningDictionary, saveDictionary)
-                
-                isVSA = False
-                if not (executeOption == 7 and respChartPattern < 3):
-                    isVSA = screener.validateVolumeSpreadAnalysis(processedData, screeningDictionary, saveDictionary)
-                if maLength is not None and executeOption == 6 and reversalOption == 4:
-                    isMaSupport = screener.findReversalMA(fullData, screeningDictionary, saveDictionary, maLength)
-                if executeOption == 6 and reversalOption == 8:
-                    isRsiReversal = screener.findRSICrossingMA(fullData, screeningDictionary, saveDictionary)
-
-                isVCP = False
-                if respChartPattern == 4:
-                    with SuppressOutput(suppress_stderr=True, suppress_stdout=True):
-                        isVCP = screener.validateVCP(fullData, screeningDictionary, saveDictionary)
-
-                isBuyingTrendline = False
-                if executeOption == 7 and respChartPattern == 5:
-                    with SuppressOutput(suppress_stderr=True, suppress_stdout=True):
-                        isBuyingTrendline = screener.findTrendlines(fullData, screeningDictionary, saveDictionary)
-
-                with SuppressOutput(suppress_stderr=True, suppress_stdout=True):
-                    isLorentzian = screener.validateLorentzian(fullData, screeningDictionary, saveDictionary, lookFor = maLength)
+                        isSelected = False
+                elif executeOption == 7:
+                    isSelected = (respChartPattern < 3 and plan.get('insideBar')) or \
+                        (respChartPattern == 3 and plan.get('confluence')) or \
+                        (plan.get('ipoBase') and newlyListedOnly and not respChartPattern < 3) or \
+                        plan.get('vcp') or plan.get('trendlines')
+                else:
+                    isSelected = False
 
-                try:
-                    backtestReport = Utility.tools.calculateBacktestReport(data=processedData, backtestDict=backtestReport)
-                    screeningDictionary.update(backtestReport)
-                    saveDictionary.update(backtestReport)
-                except:
-                    pass
+                if isSelected:
+                    # Remaining columns are filled only for the stocks to be displayed
+                    plan.complete()
+                    try:
+                        backtestReport = Utility.tools.calculateBacktestReport(data=processedData, backtestDict=backtestReport)
+                        screeningDictionary.update(backtestReport)
+                        saveDictionary.update(backtestReport)
+                    except:
+                        pass
 
-                with self.screenResultsCounter.get_lock():
-                    if executeOption == 0:
-                        self.screenResultsCounter.value += 1
-                        return screeningDictionary, saveDictionary
-                    if (executeOption == 1 or executeOption == 2) and isBreaking and isVolumeHigh and isLtpValid:
-                        self.screenResultsCounter.value += 1
-                        return screeningDictionary, saveDictionary
-                    if (executeOption == 1 or executeOption == 3) and (consolidationValue <= configManager.consolidationPercentage and consolidationValue != 0) and isLtpValid:
+                    with self.screenResultsCounter.get_lock():
                         self.screenResultsCounter.value += 1
-                        return screeningDictionary, saveDictionary
-                    if executeOption == 4 and isLtpValid and isLowestVolume:
-                        self.screenResultsCounter.value += 1
-                        return screeningDictionary, saveDictionary
-                    if executeOption == 5 and isLtpValid and isValidRsi:
-                        self.screenResultsCounter.value += 1
-                        return screeningDictionary, saveDictionary
-                    if executeOption == 6 and isLtpValid:
-                        if reversalOption == 1:
-                            if saveDictionary['Pattern'] in CandlePatterns.reversalPatternsBullish or isMaReversal > 0 or 'buy' in saveDictionary['Pattern'].lower():
-                                self.screenResultsCounter.value += 1
-                                return screeningDictionary, saveDictionary
-                        elif reversalOption == 2:
-                            if saveDictionary['Pattern'] in CandlePatterns.reversalPatternsBearish or isMaReversal < 0 or 'sell' in saveDictionary['Pattern'].lower():
-                                self.screenResultsCounter.value += 1
-                                return screeningDictionary, saveDictionary
-                        elif reversalOption == 3 and isMomentum:
-                            self.screenResultsCounter.value += 1
-                            return screeningDictionary, saveDictionary
-                        elif reversalOption == 4 and isMaSupport:
-                            self.screenResultsCounter.value += 1
-                            return screeningDictionary, saveDictionary
-                        elif reversalOption == 5 and isVSA and saveDictionary['Pattern'] in CandlePatterns.reversalPatternsBullish:
-                            self.screenResultsCounter.value += 1
-                            return screeningDictionary, saveDictionary
-                        elif reversalOption == 6 and isNR:
-                            self.screenResultsCounter.value += 1
-                            return screeningDictionary, saveDictionary
-                        elif reversalOption == 7 and isLorentzian:
-                            self.screenResultsCounter.value += 1
-                            return screeningDictionary, saveDictionary
-                        elif reversalOption == 8 and isRsiReversal:
-                            self.screenResultsCounter.value += 1
-                            return screeningDictionary, saveDictionary
-                    if executeOption == 7 and isLtpValid:
-                        if respChartPattern < 3 and isInsideBar:
-                            self.screenResultsCounter.value += 1
-                            return screeningDictionary, saveDictionary
-                        if isConfluence:
-                            self.screenResultsCounter.value += 1
-                            return screeningDictionary, saveDictionary
-                        if isIpoBase and newlyListedOnly and not respChartPattern < 3:
-                            self.screenResultsCounter.value += 1
-                            return screeningDictionary, saveDictionary
-                        if isVCP:
-                            self.screenResultsCounter.value += 1
-                            return screeningDictionary, saveDictionary
-                        if isBuyingTrendline:
-                            self.screenResultsCounter.value += 1
-                            return screeningDictionary, saveDictionary
+                    return screeningDictionary, saveDictionary
         except KeyboardInterrupt:
             # Capturing Ctr+C Here isn't a great idea
             pass
@@ -294,6 +394,16 @@ class StockConsumer(multiprocessing.Process):
                       ("\n[+] Exception Occured while Screening %s! Skipping this stock.." % stock) + colorText.END)
         return
 
+    # Run a validator with its output suppressed
+    @staticmethod
+    def suppressed(validator, *args, **kwargs):
+        with SuppressOutput(suppress_stderr=True, suppress_stdout=True):
+            return validator(*args, **kwargs)
+
+    @staticmethod
+    def isConsolidating(consolidationValue, configManager):
+        return consolidationValue <= configManager.consolidationPercentage and consolidationValue != 0
+
     def multiprocessingForWindows(self):
         if sys.platform.startswith('win'):
 
@@ -311,3 +421,134 @@ class StockConsumer(multiprocessing.Process):
                                 os.putenv('_MEIPASS2', '')
 
             forking.Popen = _Popen
+
+
+class ScreeningStalled(Exception):
+    pass
+
+
+# Long-lived pool of StockConsumer processes reused by every screening session, so the consumers are
+# spawned and import their modules only once. Arguments common to all the stocks are sent to every consumer
+# once per session, tasks are chunks of stocks and results come back as one list per chunk.
+# Tasks and results are tagged with the session number and results left over from an earlier session are dropped.
+# The pool runs one session at a time, callers that may screen concurrently (e.g. threads of the GUI) must serialize
+# their sessions.
+# Every consumer has its own bounded tasks queue and a stock is always screened by the same consumer, chosen by a
+# hash of its name, so that the StockStream kept by that consumer is found again in the next intraday scan.
+# Stocks without data can be downloaded by a pool of threads in the main process, which feeds the tasks queues
+# while the consumers are screening, so that network waits do not keep the cores idle.
+class StockConsumerPool:
+
+    def __init__(self, totalConsumers, proxyServer):
+        self.results_queue = multiprocessing.Queue()
+        self.screenCounter = multiprocessing.Value('i', 1)
+        self.screenResultsCounter = multiprocessing.Value('i', 0)
+        self.keyboardInterruptEvent = multiprocessing.Event()
+        self.vectorLock = multiprocessing.Lock()
+        self.proxyServer = proxyServer
+        self.session = 0
+        self.consumers = [StockConsumer(multiprocessing.JoinableQueue(maxsize=4), self.results_queue, multiprocessing.Queue(), self.screenCounter, self.screenResultsCounter,
+                                        proxyServer, self.keyboardInterruptEvent, self.vectorLock)
+                          for _ in range(totalConsumers)]
+        for worker in self.consumers:
+            worker.daemon = True
+            worker.start()
+
+    def __len__(self):
+        return len(self.consumers)
+
+    # Check if the pool can take a new session with the given settings
+    def isUsable(self, totalConsumers, proxyServer):
+        return len(self.consumers) == totalConsumers and self.proxyServer == proxyServer and \
+            all(worker.is_alive() for worker in self.consumers)
+
+    # Start a new screening session, counters are reset and the session data is sent to every consumer
+    def startSession(self, context=None, stockPanel=None, stockCache=None, crossSection=None):
+        self.flush()
+        self.session += 1
+        self.screenCounter.value = 1
+        self.screenResultsCounter.value = 0
+        self.keyboardInterruptEvent.clear()
+        for worker in self.consumers:
+            worker.session_queue.put((self.session, context, stockPanel, stockCache, crossSection))
+
+    # Index of the consumer that screens the stock, the same in every session
+    def route(self, stock):
+        return zlib.crc32(stock.encode()) % len(self.consumers)
+
+    # Queue stocks to be screened in chunks of the given size, consumers get their data from the panel, cache or network.
+    # Chunks are made of the stocks of one consumer and are queued to the consumers in turn.
+    def put(self, stocks, chunkSize=1, session=None):
+        session = self.session if session is None else session
+        routed = [[] for _ in self.consumers]
+        for stock in stocks:
+            routed[self.route(stock)].append(stock)
+        for i in range(0, max(map(len, routed), default=0), chunkSize):
+            for consumer, consumerStocks in enumerate(routed):
+                if i < len(consumerStocks) and not self._putTask(session, [(stock, None) for stock in consumerStocks[i:i+chunkSize]], consumer):
+                    return
+
+    # Put a task on the bounded queue of a consumer, gives up if the session is over
+    def _putTask(self, session, task, consumer):
+        while session == self.session and not self.keyboardInterruptEvent.is_set():
+            try:
+                self.consumers[consumer].task_queue.put((session, task), timeout=1)
+                return True
+            except Full:
+                continue
+        return False
+
+    # Queue stocks in background. Stocks in fetchStocks are downloaded by fetchStock(stock) on a pool of fetchThreads threads
+    # and each of them is queued as soon as its data is available, the other stocks are queued in chunks.
+    # fetchStock should return what Fetcher.fetchStockData returns, or None to let the consumer download the stock.
+    def dispatch(self, stocks, chunkSize=1, fetchStocks=None, fetchStock=None, fetchThreads=1):
+        session = self.session
+
+        def run():
+            with ThreadPoolExecutor(max_workers=max(1, fetchThreads)) as executor:
+                futures = {executor.submit(fetchStock, stock): stock for stock in fetchStocks or []}
+                self.put(stocks, chunkSize, session=session)
+                for future in as_completed(futures):
+                    if not self._putTask(session, [(futures[future], future.result())], self.route(futures[future])):
+                        for future in futures:
+                            future.cancel()
+                        break
+
+        dispatcher = threading.Thread(target=run, daemon=True)
+        dispatcher.start()
+        return dispatcher
+
+    # Get the results of the next chunk of the current session. Raises ScreeningStalled when no result came within
+    # timeout seconds or when a consumer died, as the chunk it was screening would never be answered.
+    def get(self, timeout=300):
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                session, answer = self.results_queue.get(timeout=1)
+            except Empty:
+                if not all(worker.is_alive() for worker in self.consumers):
+                    raise ScreeningStalled('A stock consumer stopped while screening')
+                if time.monotonic() > deadline:
+                    raise ScreeningStalled(f'No screening result for {timeout} seconds')
+                continue
+            if session == self.session:
+                return answer
+
+    # Drop the tasks not yet taken by any consumer
+    def flush(self):
+        for worker in self.consumers:
+            while True:
+                try:
+                    _ = worker.task_queue.get(False)
+                except Exception as e:
+                    break
+
+    # Stop the consumers, the pool can not be used afterwards
+    def terminate(self):
+        self.keyboardInterruptEvent.set()
+        for worker in self.consumers:
+            try:
+                worker.terminate()
+            except OSError as e:
+                if e.winerror == 5:
+                    pass
@@ -0,0 +1,71 @@
+'''
+ *  Project             :   Screenipy
+ *  Author              :   Pranjal Joshi
+ *  Created             :   17/10/2026
+ *  Description         :   Class for collecting screening results while the scan is running
+'''
+
+import csv
+import pandas as pd
+
+# Results are kept as lists of records and converted into DataFrames only once at the end of the scan.
+# Optionally every matched stock is also appended to a CSV sink as soon as it is found.
+
+
+class ResultsCollector:
+
+    columns = ['Stock', 'Consolidating', 'Breaking-Out', 'LTP', 'Volume', 'MA-Signal', 'RSI', 'Trend', 'Pattern']
+
+    def __init__(self, sinkFile=None):
+        self.screenRecords = []
+        self.saveRecords = []
+        self.sinkFile = sinkFile if sinkFile else None
+        self.sink = None
+        self.sinkWriter = None
+        self.sinkColumns = set()
+
+    def __len__(self):
+        return len(self.saveRecords)
+
+    # Add result of a single stock
+    def add(self, screenDict, saveDict):
+        self.screenRecords.append(screenDict)
+        self.saveRecords.append(saveDict)
+        if self.sinkFile is not None:
+            self._writeSink(saveDict)
+
+    # Rows are appended as they come. A row with keys missing from the header (e.g. backtest columns that only some
+    # stocks have) widens the header and the sink is written again from the records collected so far.
+    def _writeSink(self, saveDict):
+        if self.sinkWriter is not None and any(key not in self.sinkColumns for key in saveDict):
+            self.close()
+        if self.sinkWriter is None:
+            columns = self._getColumns(self.saveRecords)
+            self.sinkColumns = set(columns)
+            self.sink = open(self.sinkFile, 'w', newline='', encoding='utf-8')
+            self.sinkWriter = csv.DictWriter(self.sink, fieldnames=columns)
+            self.sinkWriter.writeheader()
+            self.sinkWriter.writerows(self.saveRecords)
+        else:
+            self.sinkWriter.writerow(saveDict)
+        self.sink.flush()
+
+    # Close the sink, results collected so far are kept
+    def close(self):
+        if self.sink is not None:
+            self.sink.close()
+            self.sink = None
+            self.sinkWriter = None
+
+    # Default columns followed by extra keys (such as backtest report) in order of appearance
+    def _getColumns(self, records):
+        columns = dict.fromkeys(self.columns)
+        for record in records:
+            columns.update(dict.fromkeys(record))
+        return list(columns)
+
+    # Materialize results as (screenResults, saveResults) DataFrames
+    def getResults(self):
+        self.close()
+        return (pd.DataFrame.from_records(self.screenRecords, columns=self._getColumns(self.screenRecords)),
+                pd.DataFrame.from_records(self.saveRecords, columns=self._getColumns(self.saveRecords)))
@@ -9,24 +9,17 @@ import sys
 import math
 import numpy as np
 import pandas as pd
-import joblib
-import keras
 import time
 import classes.Utility as Utility
 from copy import copy
-from advanced_ta import LorentzianClassification
 from classes.Utility import isGui
-from sklearn.preprocessing import StandardScaler
-from scipy.signal import argrelextrema
-from scipy.stats import linregress
 from classes.ColorText import colorText
 from classes.SuppressOutput import SuppressOutput
 from classes.ScreenipyTA import ScreenerTA
-try:
-    import chromadb
-    CHROMA_AVAILABLE = True
-except:
-    CHROMA_AVAILABLE = False
+from classes.Indicators import StockIndicators, SanitizedData
+from classes.TrendKernels import TrendKernels
+from classes.Lorentzian import Lorentzian
+from classes.VectorStore import VectorStore, CHROMA_AVAILABLE
 
 
 # Exception for newly listed stocks with candle nos < daysToLookback
@@ -46,6 +39,10 @@ class tools:
 
     def __init__(self, configManager) -> None:
         self.configManager = configManager
+        self.indicators = None          # Indicators of the last preprocessed stock
+        self.indicatorsData = None      # Preprocessed (most recent first) data those indicators belong to
+        self.trimmedData = None         # Preprocessed data trimmed to daysToLookback
+        self.sanitized = None           # Sanitized columns of the preprocessed data
 
     # Private method to find candle type
     # True = Bullish, False = Bearish
@@ -54,41 +51,67 @@ class tools:
             
 
     # Preprocess the acquired data
-    def preprocessData(self, data:pd.DataFrame, daysToLookback=None):
+    # stream: StockStream of the stock, when it extends the previous scan only the new bars are processed, otherwise
+    # it is seeded from the indicators computed here
+    def preprocessData(self, data:pd.DataFrame, daysToLookback=None, stream=None):
         if daysToLookback is None:
             daysToLookback = self.configManager.daysToLookback
-        if self.configManager.useEMA:
-            sma = ScreenerTA.EMA(data['Close'],timeperiod=50)
-            lma = ScreenerTA.EMA(data['Close'],timeperiod=200)
-            data.insert(len(data.columns),'SMA',sma)
-            data.insert(len(data.columns),'LMA',lma)
+        indicators = StockIndicators(data)
+        if stream is not None and stream.extends(data):
+            columns = stream.update(data)
+            movingAverage = 'EMA' if self.configManager.useEMA else 'rollingMean'
+            sma = indicators.set(movingAverage, (50, 'Close'), columns['SMA'])
+            lma = indicators.set(movingAverage, (200, 'Close'), columns['LMA'])
+            volMA = indicators.set('rollingMean', (20, 'Volume'), columns['VolMA'])
+            rsi = indicators.set('RSI', (14, 'Close'), columns['RSI'])
         else:
-            sma = data.rolling(window=50).mean()
-            lma = data.rolling(window=200).mean()
-            data.insert(len(data.columns),'SMA',sma['Close'])
-            data.insert(len(data.columns),'LMA',lma['Close'])
-        vol = data.rolling(window=20).mean()
-        rsi = ScreenerTA.RSI(data['Close'], timeperiod=14)
-        data.insert(len(data.columns),'VolMA',vol['Volume'])
+            if self.configManager.useEMA:
+                sma = indicators.EMA(50)
+                lma = indicators.EMA(200)
+            else:
+                sma = indicators.rollingMean(50)
+                lma = indicators.rollingMean(200)
+            volMA = indicators.rollingMean(20, column='Volume')
+            rsi = indicators.RSI(14)
+            if stream is not None:
+                stream.seed(data, {'SMA': sma, 'LMA': lma, 'VolMA': volMA, 'RSI': rsi})
+        data.insert(len(data.columns),'SMA',sma)
+        data.insert(len(data.columns),'LMA',lma)
+        data.insert(len(data.columns),'VolMA',volMA)
         data.insert(len(data.columns),'RSI',rsi)
-        data = data[::-1]               # Reverse the dataframe
-        # data = data.fillna(0)
-        # data = data.replace([np.inf, -np.inf], 0)
+        # Validators read most recent first views of the data, the indicators keep the chronological arrays
+        data = data[::-1]               # Reverse the dataframe (view, not a copy)
         fullData = data
         trimmedData = data.head(daysToLookback)
+        self.indicators, self.indicatorsData, self.trimmedData = indicators, fullData, trimmedData
+        self.sanitized = SanitizedData(fullData, indicators=indicators)
         return (fullData, trimmedData)
 
+    # Indicators of the preprocessed (most recent first) data, shared with the preprocessing when data is its fullData
+    def getIndicators(self, data):
+        if self.indicators is not None and data is self.indicatorsData:
+            return self.indicators
+        return StockIndicators(data[::-1])
+
+    # Sanitized view of the preprocessed data, built once per stock and shared by the validators
+    def getSanitized(self, data):
+        if self.sanitized is not None:
+            if data is self.indicatorsData:
+                return self.sanitized
+            if data is self.trimmedData:
+                return self.sanitized.head(len(data))
+        return SanitizedData(data)
+
     # Validate LTP within limits
     def validateLTP(self, data, screenDict, saveDict, minLTP=None, maxLTP=None):
         if minLTP is None:
             minLTP = self.configManager.minLTP
         if maxLTP is None:
             maxLTP = self.configManager.maxLTP
-        data = data.fillna(0)
-        data = data.replace([np.inf, -np.inf], 0)
-        recent = data.head(1)
+        close = self.getSanitized(data)['Close']
 
-        pct_change = (data[::-1]['Close'].pct_change(fill_method=None) * 100).iloc[-1]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            pct_change = (close[0] / close[1] - 1) * 100 if len(close) > 1 else np.nan
         if pct_change > 0.2:
             pct_change = colorText.GREEN + (" (%.1f%%)" % pct_change) + colorText.END
         elif pct_change < -0.2:
@@ -96,12 +119,12 @@ class tools:
         else:
             pct_change = colorText.WARN + (" (%.1f%%)" % pct_change) + colorText.END
             
-        ltp = round(recent['Close'].iloc[0],2)
+        ltp = round(close[0],2)
         saveDict['LTP'] = str(ltp)
         verifyStageTwo = True
-        if self.configManager.stageTwo and len(data) > 250:
-            yearlyLow = data.head(250).min()['Close']
-            yearlyHigh = data.head(250).max()['Close']
+        if self.configManager.stageTwo and len(close) > 250:
+            yearlyLow = close[:250].min()
+            yearlyHigh = close[:250].max()
             if ltp < (2 * yearlyLow) or ltp < (0.75 * yearlyHigh):
                 verifyStageTwo = False
         if(ltp >= minLTP and ltp <= maxLTP and verifyStageTwo):
@@ -112,10 +135,9 @@ class tools:
 
     # Validate if share prices are consolidating
     def validateConsolidation(self, data, screenDict, saveDict, percentage=10):
-        data = data.fillna(0)
-        data = data.replace([np.inf, -np.inf], 0)
-        hc = data.describe()['Close']['max']
-        lc = data.describe()['Close']['min']
+        close = self.getSanitized(data)['Close']
+        hc = close.max()
+        lc = close.min()
         if ((hc - lc) <= (hc*percentage/100) and (hc - lc != 0)):
             screenDict['Consolidating'] = colorText.BOLD + colorText.GREEN + "Range = " + str(round((abs((hc-lc)/hc)*100),1))+"%" + colorText.END
         else:
@@ -125,25 +147,23 @@ class tools:
 
     # Validate Moving averages and look for buy/sell signals
     def validateMovingAverages(self, data, screenDict, saveDict, maRange=2.5):
-        data = data.fillna(0)
-        data = data.replace([np.inf, -np.inf], 0)
-        recent = data.head(1)
-        if(recent['SMA'].iloc[0] > recent['LMA'].iloc[0] and recent['Close'].iloc[0] > recent['SMA'].iloc[0]):
+        data = self.getSanitized(data)
+        open, high, low, close, sma, lma = data['Open'][0], data['High'][0], data['Low'][0], data['Close'][0], data['SMA'][0], data['LMA'][0]
+        if(sma > lma and close > sma):
             screenDict['MA-Signal'] = colorText.BOLD + colorText.GREEN + 'Bullish' + colorText.END
             saveDict['MA-Signal'] = 'Bullish'
-        elif(recent['SMA'].iloc[0] < recent['LMA'].iloc[0]):
+        elif(sma < lma):
             screenDict['MA-Signal'] = colorText.BOLD + colorText.FAIL + 'Bearish' + colorText.END
             saveDict['MA-Signal'] = 'Bearish'
-        elif(recent['SMA'].iloc[0] == 0):
+        elif(sma == 0):
             screenDict['MA-Signal'] = colorText.BOLD + colorText.WARN + 'Unknown' + colorText.END
             saveDict['MA-Signal'] = 'Unknown'
         else:
             screenDict['MA-Signal'] = colorText.BOLD + colorText.WARN + 'Neutral' + colorText.END
             saveDict['MA-Signal'] = 'Neutral'
 
-        smaDev = data['SMA'].iloc[0] * maRange / 100
-        lmaDev = data['LMA'].iloc[0] * maRange / 100
-        open, high, low, close, sma, lma = data['Open'].iloc[0], data['High'].iloc[0], data['Low'].iloc[0], data['Close'].iloc[0], data['SMA'].iloc[0], data['LMA'].iloc[0]
+        smaDev = sma * maRange / 100
+        lmaDev = lma * maRange / 100
         maReversal = 0
         # Taking Support 50
         if close > sma and low <= (sma + smaDev):
@@ -166,7 +186,7 @@ class tools:
             saveDict['MA-Signal'] = '200MA-Resist'
             maReversal = -1
         # For a Bullish Candle
-        if self.getCandleType(data):
+        if close >= open:
             # Crossing up 50
             if open < sma and close > sma:
                 screenDict['MA-Signal'] = colorText.BOLD + colorText.GREEN + 'BullCross-50MA' + colorText.END
@@ -178,7 +198,7 @@ class tools:
                 saveDict['MA-Signal'] = 'BullCross-200MA'
                 maReversal = 1
         # For a Bearish Candle
-        elif not self.getCandleType(data):
+        else:
             # Crossing down 50
             if open > sma and close < sma:
                 screenDict['MA-Signal'] = colorText.BOLD + colorText.FAIL + 'BearCross-50MA' + colorText.END
@@ -193,14 +213,13 @@ class tools:
 
     # Validate if volume of last day is higher than avg
     def validateVolume(self, data, screenDict, saveDict, volumeRatio=2.5):
-        data = data.fillna(0)
-        data = data.replace([np.inf, -np.inf], 0)
-        recent = data.head(1)
-        if recent['VolMA'].iloc[0] == 0: # Handles Divide by 0 warning
+        data = self.getSanitized(data)
+        volume, volMA = data['Volume'][0], data['VolMA'][0]
+        if volMA == 0: # Handles Divide by 0 warning
             saveDict['Volume'] = "Unknown"
             screenDict['Volume'] = colorText.BOLD + colorText.WARN + "Unknown" + colorText.END
             return True
-        ratio = round(recent['Volume'].iloc[0]/recent['VolMA'].iloc[0],2)
+        ratio = round(volume/volMA,2)
         saveDict['Volume'] = str(ratio)+"x"
         if(ratio >= volumeRatio and ratio != np.nan and (not math.isinf(ratio)) and (ratio != 20)):
             screenDict['Volume'] = colorText.BOLD + colorText.GREEN + str(ratio) + "x" + colorText.END
@@ -210,13 +229,12 @@ class tools:
 
     # Find accurate breakout value
     def findBreakout(self, data, screenDict, saveDict, daysToLookback):
-        data = data.fillna(0)
-        data = data.replace([np.inf, -np.inf], 0)
-        recent = data.head(1)
-        data = data[1:]
-        hs = round(data.describe()['High']['max'],2)
-        hc = round(data.describe()['Close']['max'],2)
-        rc = round(recent['Close'].iloc[0],2)
+        data = self.getSanitized(data)
+        high, close = data['High'][1:], data['Close'][1:]
+        hs = round(high.max(),2) if len(high) else np.nan
+        hc = round(close.max(),2) if len(close) else np.nan
+        rc = round(data['Close'][0],2)
+        isBullish = bool(data['Close'][0] >= data['Open'][0])
         if np.isnan(hc) or np.isnan(hs):
             saveDict['Breaking-Out'] = 'BO: Unknown'
             screenDict['Breaking-Out'] = colorText.BOLD + colorText.WARN + 'BO: Unknown' + colorText.END
@@ -226,28 +244,28 @@ class tools:
                 saveDict['Breaking-Out'] = str(hc)
                 if rc >= hc:
                     screenDict['Breaking-Out'] = colorText.BOLD + colorText.GREEN + "BO: " + str(hc) + " R: " + str(hs) + colorText.END
-                    return True and self.getCandleType(recent)
+                    return isBullish
                 screenDict['Breaking-Out'] = colorText.BOLD + colorText.FAIL + "BO: " + str(hc) + " R: " + str(hs) + colorText.END
                 return False
-            noOfHigherShadows = len(data[data.High > hc])
+            noOfHigherShadows = np.count_nonzero(high > hc)
             if(daysToLookback/noOfHigherShadows <= 3):
                 saveDict['Breaking-Out'] = str(hs)
                 if rc >= hs:
                     screenDict['Breaking-Out'] = colorText.BOLD + colorText.GREEN + "BO: " + str(hs) + colorText.END
-                    return True and self.getCandleType(recent)
+                    return isBullish
                 screenDict['Breaking-Out'] = colorText.BOLD + colorText.FAIL + "BO: " + str(hs) + colorText.END
                 return False
             saveDict['Breaking-Out'] = str(hc) + ", " + str(hs)
             if rc >= hc:
                 screenDict['Breaking-Out'] = colorText.BOLD + colorText.GREEN + "BO: " + str(hc) + " R: " + str(hs) + colorText.END
-                return True and self.getCandleType(recent)
+                return isBullish
             screenDict['Breaking-Out'] = colorText.BOLD + colorText.FAIL + "BO: " + str(hc) + " R: " + str(hs) + colorText.END
             return False
         else:
             saveDict['Breaking-Out'] = str(hc)
             if rc >= hc:
                 screenDict['Breaking-Out'] = colorText.BOLD + colorText.GREEN + "BO: " + str(hc) + colorText.END
-                return True and self.getCandleType(recent)
+                return isBullish
             screenDict['Breaking-Out'] = colorText.BOLD + colorText.FAIL + "BO: " + str(hc) + colorText.END
             return False
 
@@ -282,21 +300,16 @@ class tools:
     
     # Validate if recent volume is lowest of last 'N' Days
     def validateLowestVolume(self, data, daysForLowestVolume):
-        data = data.fillna(0)
-        data = data.replace([np.inf, -np.inf], 0)
         if daysForLowestVolume is None:
             daysForLowestVolume = 30
-        data = data.head(daysForLowestVolume)
-        recent = data.head(1)
-        if((recent['Volume'].iloc[0] <= data.describe()['Volume']['min']) and recent['Volume'].iloc[0] != np.nan):
+        volume = self.getSanitized(data).head(daysForLowestVolume)['Volume']
+        if volume[0] <= volume.min():
             return True
         return False
 
     # validate if RSI is within given range
     def validateRSI(self, data, screenDict, saveDict, minRSI, maxRSI):
-        data = data.fillna(0)
-        data = data.replace([np.inf, -np.inf], 0)
-        rsi = int(data.head(1)['RSI'].iloc[0])
+        rsi = int(self.getSanitized(data)['RSI'][0])
         saveDict['RSI'] = rsi
         if(rsi >= minRSI and rsi <= maxRSI) and (rsi <= 70 and rsi >= 30):
             screenDict['RSI'] = colorText.BOLD + colorText.GREEN + str(rsi) + colorText.END
@@ -308,44 +321,11 @@ class tools:
     def findTrend(self, data, screenDict, saveDict, daysToLookback=None,stockName=""):
         if daysToLookback is None:
             daysToLookback = self.configManager.daysToLookback
-        data = data.head(daysToLookback)
-        data = data[::-1]
-        data = data.set_index(np.arange(len(data)))
-        data = data.fillna(0)
-        data = data.replace([np.inf, -np.inf], 0)
-        with SuppressOutput(suppress_stdout=True,suppress_stderr=True):
-            data['tops'] = data['Close'].iloc[list(argrelextrema(np.array(data['Close']), np.greater_equal, order=1)[0])]
-        data = data.fillna(0)
-        data = data.replace([np.inf, -np.inf], 0)
-        try:
-            try:
-                if len(data) < daysToLookback:
-                    raise StockDataNotAdequate
-                slope,c = np.polyfit(data.index[data.tops > 0], data['tops'][data.tops > 0], 1)
-            except Exception as e:
-                slope,c = 0,0
-            angle = np.rad2deg(np.arctan(slope))
-            if (angle == 0):
-                screenDict['Trend'] = colorText.BOLD + colorText.WARN + "Unknown" + colorText.END
-                saveDict['Trend'] = 'Unknown'
-            elif (angle <= 30 and angle >= -30):
-                screenDict['Trend'] = colorText.BOLD + colorText.WARN + "Sideways" + colorText.END
-                saveDict['Trend'] = 'Sideways'
-            elif (angle >= 30 and angle < 61):
-                screenDict['Trend'] = colorText.BOLD + colorText.GREEN + "Weak Up" + colorText.END
-                saveDict['Trend'] = 'Weak Up'
-            elif angle >= 60:
-                screenDict['Trend'] = colorText.BOLD + colorText.GREEN + "Strong Up" + colorText.END
-                saveDict['Trend'] = 'Strong Up'
-            elif (angle <= -30 and angle > -61):
-                screenDict['Trend'] = colorText.BOLD + colorText.FAIL + "Weak Down" + colorText.END
-                saveDict['Trend'] = 'Weak Down'
-            elif angle <= -60:
-                screenDict['Trend'] = colorText.BOLD + colorText.FAIL + "Strong Down" + colorText.END
-                saveDict['Trend'] = 'Strong Down'
-        except np.linalg.LinAlgError:
-            screenDict['Trend'] = colorText.BOLD + colorText.WARN + "Unknown" + colorText.END
-            saveDict['Trend'] = 'Unknown'
+        close = self.getSanitized(data).head(daysToLookback)['Close'][::-1]
+        angle = TrendKernels.trendAngle(close) if len(close) >= daysToLookback else 0.0
+        trend = TrendKernels.trendName(angle)[()]
+        screenDict['Trend'] = colorText.BOLD + TrendKernels.trendColors[trend] + trend + colorText.END
+        saveDict['Trend'] = trend
         return saveDict['Trend']
 
     # Find if stock is validating volume spread analysis
@@ -406,16 +386,16 @@ class tools:
     def findReversalMA(self, data, screenDict, saveDict, maLength, percentage=0.015):
         if maLength is None:
             maLength = 20
-        data = data[::-1]
+        indicators = self.getIndicators(data)
         if self.configManager.useEMA:
-            maRev = ScreenerTA.EMA(data['Close'],timeperiod=maLength)
+            maRev = indicators.EMA(maLength)
         else:
-            maRev = ScreenerTA.MA(data['Close'],timeperiod=maLength)
-        data.insert(len(data.columns),'maRev',maRev)
-        data = data[::-1].head(3)
-        if data.equals(data[(data.Close >= (data.maRev - (data.maRev*percentage))) & (data.Close <= (data.maRev + (data.maRev*percentage)))]) and data.head(1)['Close'].iloc[0] >= data.head(1)['maRev'].iloc[0]:
+            maRev = indicators.MA(maLength)
+        maRev = StockIndicators.recent(maRev, 3)
+        close = indicators.recentBars('Close', 3)
+        if np.all((close >= (maRev - (maRev*percentage))) & (close <= (maRev + (maRev*percentage)))) and close[0] >= maRev[0]:
             if self.configManager.stageTwo:
-                if data.head(1)['maRev'].iloc[0] < data.head(2)['maRev'].iloc[1] or data.head(2)['maRev'].iloc[1] < data.head(3)['maRev'].iloc[2] or data.head(1)['SMA'].iloc[0] < data.head(1)['LMA'].iloc[0]:
+                if maRev[0] < maRev[1] or maRev[1] < maRev[2] or data['SMA'].iloc[0] < data['LMA'].iloc[0]:
                     return False
             screenDict['MA-Signal'] = colorText.BOLD + colorText.GREEN + f'Reversal-{maLength}MA' + colorText.END
             saveDict['MA-Signal'] = f'Reversal-{maLength}MA'
@@ -424,15 +404,14 @@ class tools:
     
     # Find stock showing RSI crossing with RSI 9 SMA
     def findRSICrossingMA(self, data, screenDict, saveDict, maLength=9):
-        data = data[::-1]
-        maRsi = ScreenerTA.MA(data['RSI'], timeperiod=maLength)
-        data.insert(len(data.columns),'maRsi',maRsi)
-        data = data[::-1].head(3)
-        if data['maRsi'].iloc[0] <= data['RSI'].iloc[0] and data['maRsi'].iloc[1] > data['RSI'].iloc[1]:
+        indicators = self.getIndicators(data)
+        maRsi = StockIndicators.recent(indicators.MA(maLength, column='RSI'), 2)
+        rsi = indicators.recentBars('RSI', 2)
+        if maRsi[0] <= rsi[0] and maRsi[1] > rsi[1]:
             screenDict['MA-Signal'] = colorText.BOLD + colorText.GREEN + f'RSI-MA-Buy' + colorText.END
             saveDict['MA-Signal'] = f'RSI-MA-Buy'
             return True
-        elif data['maRsi'].iloc[0] >= data['RSI'].iloc[0] and data['maRsi'].iloc[1] < data['RSI'].iloc[1]:
+        elif maRsi[0] >= rsi[0] and maRsi[1] < rsi[1]:
             screenDict['MA-Signal'] = colorText.BOLD + colorText.GREEN + f'RSI-MA-Sell' + colorText.END
             saveDict['MA-Signal'] = f'RSI-MA-Sell'
             return True
@@ -441,9 +420,9 @@ class tools:
 
     # Find IPO base
     def validateIpoBase(self, stock, data, screenDict, saveDict, percentage=0.3):
-        listingPrice = data[::-1].head(1)['Open'].iloc[0]
-        currentPrice = data.head(1)['Close'].iloc[0]
-        ATH = data.describe()['High']['max']
+        listingPrice = data['Open'].iloc[-1]
+        currentPrice = data['Close'].iloc[0]
+        ATH = data['High'].max()
         if ATH > (listingPrice + (listingPrice * percentage)):
             return False
         away = round(((currentPrice - listingPrice)/listingPrice)*100, 1)
@@ -484,10 +463,9 @@ class tools:
         if len(data) < period:
             return False
 
-        data = data[::-1]
-        data['Number'] = np.arange(len(data))+1
-        data_high = data.copy()
-        data_low = data.copy()
+        indicators = self.getIndicators(data)
+        low, close = indicators.column('Low'), indicators.column('Close')
+        number = np.arange(1, len(close) + 1, dtype=np.float64)
         points = 30
 
         ''' Ignoring the Resitance for long-term purpose
@@ -498,18 +476,14 @@ class tools:
         data['Resistance'] = slope * data['Number'] + intercept
         '''
 
-        while len(data_low) > points:
-            slope, intercept, r_value, p_value, std_err = linregress(x=data_low['Number'], y=data_low['Low'])
-            data_low = data_low.loc[data_low['Low'] < slope * data_low['Number'] + intercept]
-        
-        slope, intercept, r_value, p_value, std_err = linregress(x=data_low['Number'], y=data_low['Close'])
-        data['Support'] = slope * data['Number'] + intercept
-        now = data.tail(1)
+        below = TrendKernels.supportBars(low, number, points)
+        slope, intercept = TrendKernels.fitLine(close[below], np.ones(len(below), dtype=bool), x=number[below])
+        support = slope * number[-1] + intercept
 
-        limit_upper = now['Support'].iloc[0].item() + (now['Support'].iloc[0].item() * percentage)
-        limit_lower = now['Support'].iloc[0].item() - (now['Support'].iloc[0].item() * percentage)
+        limit_upper = support + (support * percentage)
+        limit_lower = support - (support * percentage)
 
-        if limit_lower < now['Close'].iloc[0].item() < limit_upper and slope > 0.15:
+        if limit_lower < close[-1] < limit_upper and slope > 0.15:
             screenDict['Pattern'] = colorText.BOLD + colorText.GREEN + 'Trendline-Support' + colorText.END
             saveDict['Pattern'] = 'Trendline-Support'
             return True
@@ -541,7 +515,7 @@ class tools:
             now_candle = data.head(1)
             rangeData['Range'] = abs(rangeData['Close'] - rangeData['Open'])
             recent = rangeData.head(1)
-            if recent['Range'].iloc[0] == rangeData.describe()['Range']['min']:
+            if recent['Range'].iloc[0] == rangeData['Range'].min():
                 if self.getCandleType(recent) and now_candle['Close'].iloc[0] >= recent['Close'].iloc[0]:
                     screenDict['Pattern'] = colorText.BOLD + colorText.GREEN + f'Buy-NR{nr}' + colorText.END
                     saveDict['Pattern'] = f'Buy-NR{nr}'
@@ -555,24 +529,23 @@ class tools:
             rangeData = data.head(nr)
             rangeData['Range'] = abs(rangeData['Close'] - rangeData['Open'])
             recent = rangeData.head(1)
-            if recent['Range'].iloc[0] == rangeData.describe()['Range']['min']:
+            if recent['Range'].iloc[0] == rangeData['Range'].min():
                 screenDict['Pattern'] = colorText.BOLD + colorText.GREEN + f'NR{nr}' + colorText.END
                 saveDict['Pattern'] = f'NR{nr}'
                 return True
             return False
 
     # Validate Lorentzian Classification signal  
-    def validateLorentzian(self, data, screenDict, saveDict, lookFor=1):
+    # signal: (isNewBuySignal, isNewSellSignal) of the latest bar when already classified with other stocks by VectorScreener
+    def validateLorentzian(self, data, screenDict, saveDict, lookFor=1, signal=None):
         # lookFor: 1-Any, 2-Buy, 3-Sell
-        data = data[::-1]               # Reverse the dataframe
-        data = data.rename(columns={'Open':'open', 'Close':'close', 'High':'high', 'Low':'low', 'Volume':'volume'})
-        lc = LorentzianClassification(data=data)
-        if lc.df.iloc[-1]['isNewBuySignal']:
+        isNewBuySignal, isNewSellSignal = Lorentzian.signal(self.getIndicators(data)) if signal is None else signal
+        if isNewBuySignal:
             screenDict['Pattern'] = colorText.BOLD + colorText.GREEN + f'Lorentzian-Buy' + colorText.END
             saveDict['Pattern'] = f'Lorentzian-Buy'
             if lookFor != 3:
                 return True
-        elif lc.df.iloc[-1]['isNewSellSignal']:
+        elif isNewSellSignal:
             screenDict['Pattern'] = colorText.BOLD + colorText.FAIL + f'Lorentzian-Sell' + colorText.END
             saveDict['Pattern'] = f'Lorentzian-Sell'
             if lookFor != 2:
@@ -585,13 +558,13 @@ class tools:
             percentageFromTop /= 100
             data.reset_index(inplace=True)
             data.rename(columns={'index':'Date'}, inplace=True)
-            data['tops'] = data['High'].iloc[list(argrelextrema(np.array(data['High']), np.greater_equal, order=window)[0])].head(4)
-            data['bots'] = data['Low'].iloc[list(argrelextrema(np.array(data['Low']), np.less_equal, order=window)[0])].head(4)
+            data['tops'] = data['High'].iloc[np.flatnonzero(TrendKernels.localExtrema(data['High'], np.greater_equal, order=window))].head(4)
+            data['bots'] = data['Low'].iloc[np.flatnonzero(TrendKernels.localExtrema(data['Low'], np.less_equal, order=window))].head(4)
             data = data.fillna(0)
             data = data.replace([np.inf, -np.inf], 0)
             tops = data[data.tops > 0]
             bots = data[data.bots > 0]
-            highestTop = round(tops.describe()['High']['max'],1)
+            highestTop = round(tops['High'].max(),1)
             filteredTops = tops[tops.tops > (highestTop-(highestTop*percentageFromTop))]
             # print(tops)
             # print(filteredTops)
@@ -603,7 +576,7 @@ class tools:
                 for i in range(len(tops)-1):
                     endDate = tops.iloc[i]['Date']
                     startDate = tops.iloc[i+1]['Date']
-                    lowPoints.append(data[(data.Date >= startDate) & (data.Date <= endDate)].describe()['Low']['min'])
+                    lowPoints.append(data[(data.Date >= startDate) & (data.Date <= endDate)]['Low'].min())
                 lowPointsOrg = lowPoints
                 lowPoints.sort(reverse=True)
                 lowPointsSorted = lowPoints
@@ -620,17 +593,7 @@ class tools:
     def getNiftyPrediction(self, data, proxyServer):
         import warnings 
         warnings.filterwarnings("ignore")
-        # Disable GPUs as this causes wrong preds in Docker
-        import tensorflow as tf
-        physical_devices = tf.config.list_physical_devices('GPU')
-        try:
-          tf.config.set_visible_devices([], 'GPU')
-          visible_devices = tf.config.get_visible_devices()
-          for device in visible_devices:
-            assert device.device_type != 'GPU'
-        except:
-          pass
-        #
+        # Model is loaded on the first prediction of the process only, it runs with numpy unless it could not be exported
         model, pkl = Utility.tools.getNiftyModel(proxyServer=proxyServer)
         datacopy = copy(data[pkl['columns']])
         with SuppressOutput(suppress_stderr=True, suppress_stdout=True):
@@ -642,7 +605,7 @@ class tools:
             data = data.iloc[-1] 
             ###
             data = pkl['scaler'].transform([data])
-            pred = model.predict(data)[0]
+            pred = np.asarray(model(data, training=False))[0]     # Direct call, predict sets up a new loop on every call
         if pred > 0.5:
             out = colorText.BOLD + colorText.FAIL + "BEARISH" + colorText.END + colorText.BOLD
             sug = "Hold your Short position!"
@@ -664,7 +627,7 @@ class tools:
         data_tuple = fetcher.fetchFiveEmaData()
         for cnt in range(len(data_tuple)):
             d = data_tuple[cnt]
-            d['5EMA'] = ScreenerTA.EMA(d['Close'],timeperiod=5)
+            d['5EMA'] = StockIndicators(d).EMA(5)
             d = d[col_names]
             d = d.dropna().round(2)
 
@@ -730,8 +693,9 @@ class tools:
         return result_df[::-1]
     
     # Add data to vector database
-    def addVector(self, data, stockCode, daysToLookback):
-        data = data[::-1] # Reinverting preprocessedData for pct_change
+    # Embedding is buffered in store and written when the store is flushed, written right away if no store is given
+    def addVector(self, data, stockCode, daysToLookback, store=None):
+        data = self.getIndicators(data).data # Chronological preprocessedData for pct_change
         data = data.pct_change(fill_method=None)
         # data = data[::-1]     # Do we need to invert again? No we dont - See operation after flatten
         data = data[['Open', 'High', 'Low', 'Close']]
@@ -740,13 +704,12 @@ class tools:
         data = data.to_numpy().flatten().tolist()
         data = data[(-4 * daysToLookback):]     # Keep only OHLC * daysToLookback samples
         if len(data) == (4 * daysToLookback):
-            chroma_client = chromadb.PersistentClient(path="./chromadb_store/")
-            collection = chroma_client.get_or_create_collection(name="nse_stocks")
-            collection.upsert(
-                embeddings=[data],
-                documents=[stockCode],
-                ids=[stockCode]
-            )
+            if store is None:
+                store = VectorStore()
+                store.add(stockCode, data)
+                store.flush()
+            else:
+                store.add(stockCode, data)
             return data
 
 
@@ -1,4 +1,5 @@
 import numpy as np
+import pandas as pd
 import os
 
 if 'STREAMLIT_APP' in os.environ:
@@ -10,260 +11,123 @@ else:
     except ImportError:
         import pandas_ta as talib
 
+# The backend is resolved once at import. TA-Lib functions are called with contiguous float64 numpy arrays and
+# return numpy arrays, pandas_ta functions are called with Series and return Series.
+BACKEND = 'pandas_ta' if talib.__name__ == 'pandas_ta' else 'talib'
 
-class ScreenerTA:
+# Name of candle-stick pattern for pandas_ta.cdl_pattern by TA-Lib function name
+CANDLE_PATTERNS = {
+    'CDLMORNINGSTAR': 'morningstar',
+    'CDLMORNINGDOJISTAR': 'morningdojistar',
+    'CDLEVENINGSTAR': 'eveningstar',
+    'CDLEVENINGDOJISTAR': 'eveningdojistar',
+    'CDLLADDERBOTTOM': 'ladderbottom',
+    'CDL3LINESTRIKE': '3linestrike',
+    'CDL3BLACKCROWS': '3blackcrows',
+    'CDL3INSIDE': '3inside',
+    'CDL3OUTSIDE': '3outside',
+    'CDL3WHITESOLDIERS': '3whitesoldiers',
+    'CDLHARAMI': 'harami',
+    'CDLHARAMICROSS': 'haramicross',
+    'CDLMARUBOZU': 'marubozu',
+    'CDLHANGINGMAN': 'hangingman',
+    'CDLHAMMER': 'hammer',
+    'CDLINVERTEDHAMMER': 'invertedhammer',
+    'CDLSHOOTINGSTAR': 'shootingstar',
+    'CDLDRAGONFLYDOJI': 'dragonflydoji',
+    'CDLGRAVESTONEDOJI': 'gravestonedoji',
+    'CDLDOJI': 'doji',
+    'CDLENGULFING': 'engulfing',
+}
+
+
+def _array(values):
+    return np.ascontiguousarray(values, dtype=np.float64).reshape(-1)
+
+def _series(values):
+    return values if isinstance(values, pd.Series) else pd.Series(_array(values))
+
+# Value of the pattern on the last candle, 0 if not found, positive if bullish and negative if bearish
+def _lastValue(values):
+    values = np.asarray(values if values is not None else [], dtype=np.float64)
+    if values.size == 0:
+        return 0
+    value = float(values.reshape(len(values), -1)[-1, 0])
+    return 0 if np.isnan(value) else value
+
+
+class TalibBackend:
 
     @staticmethod
     def EMA(close, timeperiod):
-        try:
-            return talib.ema(close,timeperiod)
-        except Exception as e:
-            return talib.EMA(close.to_numpy().reshape(-1),timeperiod)
+        return talib.EMA(_array(close), timeperiod)
 
     @staticmethod
     def SMA(close, timeperiod):
-        try:
-            return talib.sma(close,timeperiod)
-        except Exception as e:
-            return talib.SMA(close.to_numpy().reshape(-1),timeperiod)
-        
+        return talib.SMA(_array(close), timeperiod)
+
     @staticmethod
     def MA(close, timeperiod):
-        try:
-            return talib.ma(close,timeperiod)
-        except Exception as e:
-            return talib.MA(close.to_numpy().reshape(-1),timeperiod)
+        return talib.MA(_array(close), timeperiod)
 
     @staticmethod
     def MACD(close, fast, slow, signal):
-        try:
-            return talib.macd(close,fast,slow,signal)
-        except Exception as e:
-            return talib.MACD(close.to_numpy().reshape(-1),fast.to_numpy().reshape(-1),slow.to_numpy().reshape(-1),signal.to_numpy().reshape(-1))
+        return talib.MACD(_array(close), fast, slow, signal)
 
     @staticmethod
     def RSI(close, timeperiod):
-        try:
-            return talib.rsi(close,timeperiod)
-        except Exception as e:
-            return talib.RSI(close.to_numpy().reshape(-1),timeperiod)
-    
+        return talib.RSI(_array(close), timeperiod)
+
     @staticmethod
     def CCI(high, low, close, timeperiod):
-        try:
-            return talib.cci(high, low, close,timeperiod)
-        except Exception as e:
-            return talib.CCI(high.to_numpy().reshape(-1), low.to_numpy().reshape(-1), close.to_numpy().reshape(-1),timeperiod)
-    
-   
-    @staticmethod
-    def CDLMORNINGSTAR(open, high, low, close):
-        try:
-            try:
-                return talib.cdl_pattern(open,high,low,close,'morningstar').tail(1).values[0][0] != 0
-            except Exception as e:
-                return talib.CDLMORNINGSTAR(open.to_numpy().reshape(-1), high.to_numpy().reshape(-1), low.to_numpy().reshape(-1) ,close.to_numpy().reshape(-1)).tail(1).item() != 0
-        except AttributeError:
-            return False
+        return talib.CCI(_array(high), _array(low), _array(close), timeperiod)
 
     @staticmethod
-    def CDLMORNINGDOJISTAR(open, high, low, close):
-        try:
-            try:
-                return talib.cdl_pattern(open,high,low,close,'morningdojistar').tail(1).values[0][0] != 0
-            except Exception as e:
-                return talib.CDLMORNINGDOJISTAR(open.to_numpy().reshape(-1), high.to_numpy().reshape(-1), low.to_numpy().reshape(-1) ,close.to_numpy().reshape(-1)).tail(1).item() != 0
-        except AttributeError:
-            return False
-    
-    @staticmethod
-    def CDLEVENINGSTAR(open, high, low, close):
-        try:
-            try:
-                return talib.cdl_pattern(open,high,low,close,'eveningstar').tail(1).values[0][0] != 0
-            except Exception as e:
-                return talib.CDLEVENINGSTAR(open.to_numpy().reshape(-1), high.to_numpy().reshape(-1), low.to_numpy().reshape(-1) ,close.to_numpy().reshape(-1)).tail(1).item() != 0
-        except AttributeError:
-            return False
-    
-    @staticmethod
-    def CDLEVENINGDOJISTAR(open, high, low, close):
-        try:
-            try:
-                return talib.cdl_pattern(open,high,low,close,'eveningdojistar').tail(1).values[0][0] != 0
-            except Exception as e:
-                return talib.CDLEVENINGDOJISTAR(open.to_numpy().reshape(-1), high.to_numpy().reshape(-1), low.to_numpy().reshape(-1) ,close.to_numpy().reshape(-1)).tail(1).item() != 0
-        except AttributeError:
-            return False
-    
-    @staticmethod
-    def CDLLADDERBOTTOM(open, high, low, close):
-        try:
-            try:
-                return talib.cdl_pattern(open,high,low,close,'ladderbottom').tail(1).values[0][0] != 0
-            except Exception as e:
-                return talib.CDLLADDERBOTTOM(open.to_numpy().reshape(-1), high.to_numpy().reshape(-1), low.to_numpy().reshape(-1) ,close.to_numpy().reshape(-1)).tail(1).item() != 0
-        except AttributeError:
-            return False
-    
-    @staticmethod
-    def CDL3LINESTRIKE(open, high, low, close):
-        try:
-            try:
-                return talib.cdl_pattern(open,high,low,close,'3linestrike').tail(1).values[0][0] != 0
-            except Exception as e:
-                return talib.CDL3LINESTRIKE(open.to_numpy().reshape(-1), high.to_numpy().reshape(-1), low.to_numpy().reshape(-1) ,close.to_numpy().reshape(-1)).tail(1).item() != 0
-        except AttributeError:
-            return False
-    
-    @staticmethod
-    def CDL3BLACKCROWS(open, high, low, close):
-        try:
-            try:
-                return talib.cdl_pattern(open,high,low,close,'3blackcrows').tail(1).values[0][0] != 0
-            except Exception as e:
-                return talib.CDL3BLACKCROWS(open.to_numpy().reshape(-1), high.to_numpy().reshape(-1), low.to_numpy().reshape(-1) ,close.to_numpy().reshape(-1)).tail(1).item() != 0
-        except AttributeError:
-            return False
-    
-    @staticmethod
-    def CDL3INSIDE(open, high, low, close):
-        try:
-            try:
-                return talib.cdl_pattern(open,high,low,close,'3inside').tail(1).values[0][0] != 0
-            except Exception as e:
-                return talib.CDL3INSIDE(open.to_numpy().reshape(-1), high.to_numpy().reshape(-1), low.to_numpy().reshape(-1) ,close.to_numpy().reshape(-1)).tail(1).item() != 0
-        except AttributeError:
-            return False
-    
-    @staticmethod
-    def CDL3OUTSIDE(open, high, low, close):
-        try:
-            try:
-                return talib.cdl_pattern(open,high,low,close,'3outside').tail(1).values[0][0]
-            except Exception as e:
-                return talib.CDL3OUTSIDE(open.to_numpy().reshape(-1), high.to_numpy().reshape(-1), low.to_numpy().reshape(-1) ,close.to_numpy().reshape(-1)).tail(1).item() != 0
-        except AttributeError:
-            return False
-    
-    @staticmethod
-    def CDL3WHITESOLDIERS(open, high, low, close):
-        try:
-            try:
-                return talib.cdl_pattern(open,high,low,close,'3whitesoldiers').tail(1).values[0][0] != 0
-            except Exception as e:
-                return talib.CDL3WHITESOLDIERS(open.to_numpy().reshape(-1), high.to_numpy().reshape(-1), low.to_numpy().reshape(-1) ,close.to_numpy().reshape(-1)).tail(1).item() != 0
-        except AttributeError:
-            return False
-    
-    @staticmethod
-    def CDLHARAMI(open, high, low, close):
-        try:
-            try:
-                return talib.cdl_pattern(open,high,low,close,'harami').tail(1).values[0][0] != 0
-            except Exception as e:
-                return talib.CDLHARAMI(open.to_numpy().reshape(-1), high.to_numpy().reshape(-1), low.to_numpy().reshape(-1) ,close.to_numpy().reshape(-1)).tail(1).item() != 0
-        except AttributeError:
-            return False
-    
-    @staticmethod
-    def CDLHARAMICROSS(open, high, low, close):
-        try:
-            try:
-                return talib.cdl_pattern(open,high,low,close,'haramicross').tail(1).values[0][0] != 0
-            except Exception as e:
-                return talib.CDLHARAMICROSS(open.to_numpy().reshape(-1), high.to_numpy().reshape(-1), low.to_numpy().reshape(-1) ,close.to_numpy().reshape(-1)).tail(1).item() != 0
-        except AttributeError:
-            return False
-    
-    @staticmethod
-    def CDLMARUBOZU(open, high, low, close):
-        try:
-            try:
-                return talib.cdl_pattern(open,high,low,close,'marubozu').tail(1).values[0][0] != 0
-            except Exception as e:
-                return talib.CDLMARUBOZU(open.to_numpy().reshape(-1), high.to_numpy().reshape(-1), low.to_numpy().reshape(-1) ,close.to_numpy().reshape(-1)).tail(1).item() != 0
-        except AttributeError:
-            return False
-    
-    @staticmethod
-    def CDLHANGINGMAN(open, high, low, close):
-        try:
-            try:
-                return talib.cdl_pattern(open,high,low,close,'hangingman').tail(1).values[0][0] != 0
-            except Exception as e:
-                return talib.CDLHANGINGMAN(open.to_numpy().reshape(-1), high.to_numpy().reshape(-1), low.to_numpy().reshape(-1) ,close.to_numpy().reshape(-1)).tail(1).item() != 0
-        except AttributeError:
-            return False
-    
+    def candlePattern(name, open, high, low, close):
+        return _lastValue(getattr(talib, name)(_array(open), _array(high), _array(low), _array(close)))
+
+
+class PandasTaBackend:
+
     @staticmethod
-    def CDLHAMMER(open, high, low, close):
-        try:
-            try:
-                return talib.cdl_pattern(open,high,low,close,'hammer').tail(1).values[0][0] != 0
-            except Exception as e:
-                return talib.CDLHAMMER(open.to_numpy().reshape(-1), high.to_numpy().reshape(-1), low.to_numpy().reshape(-1) ,close.to_numpy().reshape(-1)).tail(1).item() != 0
-        except AttributeError:
-            return False
-    
+    def EMA(close, timeperiod):
+        return talib.ema(_series(close), timeperiod)
+
     @staticmethod
-    def CDLINVERTEDHAMMER(open, high, low, close):
-        try:
-            try:
-                return talib.cdl_pattern(open,high,low,close,'invertedhammer').tail(1).values[0][0] != 0
-            except Exception as e:
-                return talib.CDLINVERTEDHAMMER(open.to_numpy().reshape(-1), high.to_numpy().reshape(-1), low.to_numpy().reshape(-1) ,close.to_numpy().reshape(-1)).tail(1).item() != 0
-        except AttributeError:
-            return False
-    
+    def SMA(close, timeperiod):
+        return talib.sma(_series(close), timeperiod)
+
     @staticmethod
-    def CDLSHOOTINGSTAR(open, high, low, close):
-        try:
-            try:
-                return talib.cdl_pattern(open,high,low,close,'shootingstar').tail(1).values[0][0] != 0
-            except Exception as e:
-                return talib.CDLSHOOTINGSTAR(open.to_numpy().reshape(-1), high.to_numpy().reshape(-1), low.to_numpy().reshape(-1) ,close.to_numpy().reshape(-1)).tail(1).item() != 0
-        except AttributeError:
-            return False
-    
+    def MA(close, timeperiod):
+        return talib.sma(_series(close), length=timeperiod)     # Default moving average of TA-Lib MA
+
     @staticmethod
-    def CDLDRAGONFLYDOJI(open, high, low, close):
-        try:
-            try:
-                return talib.cdl_pattern(open,high,low,close,'dragonflydoji').tail(1).values[0][0] != 0
-            except Exception as e:
-                return talib.CDLDRAGONFLYDOJI(open.to_numpy().reshape(-1), high.to_numpy().reshape(-1), low.to_numpy().reshape(-1) ,close.to_numpy().reshape(-1)).tail(1).item() != 0
-        except AttributeError:
-            return False
-    
+    def MACD(close, fast, slow, signal):
+        return talib.macd(_series(close), fast, slow, signal)
+
     @staticmethod
-    def CDLGRAVESTONEDOJI(open, high, low, close):
-        try:
-            try:
-                return talib.cdl_pattern(open,high,low,close,'gravestonedoji').tail(1).values[0][0] != 0
-            except Exception as e:
-                return talib.CDLGRAVESTONEDOJI(open.to_numpy().reshape(-1), high.to_numpy().reshape(-1), low.to_numpy().reshape(-1) ,close.to_numpy().reshape(-1)).tail(1).item() != 0
-        except AttributeError:
-            return False
-    
+    def RSI(close, timeperiod):
+        return talib.rsi(_series(close), timeperiod)
+
     @staticmethod
-    def CDLDOJI(open, high, low, close):
-        try:
-            try:
-                return talib.cdl_pattern(open,high,low,close,'doji').tail(1).values[0][0] != 0
-            except Exception as e:
-                return talib.CDLDOJI(open.to_numpy().reshape(-1), high.to_numpy().reshape(-1), low.to_numpy().reshape(-1) ,close.to_numpy().reshape(-1)).tail(1).item() != 0
-        except AttributeError:
-            return False
-        
-    
+    def CCI(high, low, close, timeperiod):
+        return talib.cci(_series(high), _series(low), _series(close), timeperiod)
+
     @staticmethod
-    def CDLENGULFING(open, high, low, close):
-        try:
-            try:
-                return talib.cdl_pattern(open,high,low,close,'engulfing').tail(1).values[0][0]
-            except Exception as e:
-                return talib.CDLENGULFING(open.to_numpy().reshape(-1), high.to_numpy().reshape(-1), low.to_numpy().reshape(-1) ,close.to_numpy().reshape(-1)).tail(1).item() != 0
-        except AttributeError:
-            return False
-        
\ No newline at end of file
+    def candlePattern(name, open, high, low, close):
+        return _lastValue(talib.cdl_pattern(_series(open), _series(high), _series(low), _series(close), CANDLE_PATTERNS[name]))
+
+
+class ScreenerTA(TalibBackend if BACKEND == 'talib' else PandasTaBackend):
+    pass
+
+
+# Candle-stick pattern functions return value of the pattern on the last candle, 0 if the pattern is not found
+def _bindCandlePattern(name):
+    def pattern(open, high, low, close):
+        return ScreenerTA.candlePattern(name, open, high, low, close)
+    pattern.__name__ = name
+    return staticmethod(pattern)
+
+for _name in CANDLE_PATTERNS:
+    setattr(ScreenerTA, _name, _bindCandlePattern(_name))
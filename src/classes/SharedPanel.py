@@ -0,0 +1,123 @@
+'''
+ *  Project             :   Screenipy
+ *  Author              :   Pranjal Joshi
+ *  Created             :   17/10/2026
+ *  Description         :   Class for sharing OHLCV data of all stocks between processes
+'''
+
+import numpy as np
+import pandas as pd
+from multiprocessing import shared_memory
+
+# Data of all stocks is packed in a single shared memory block as a float64 panel
+# of shape (symbols, bars, fields) preceded by an int64 block of bar timestamps.
+# Each stock is left aligned in its row and the offset index maps the stock to its
+# row, number of bars, timezone and available fields. Workers read zero-copy views.
+
+
+class SharedPanel:
+
+    fields = ['Open', 'High', 'Low', 'Close', 'Adj Close', 'Volume']
+
+    def __init__(self, name, shape, offsets):
+        self.name = name
+        self.shape = shape          # (symbols, bars, fields)
+        self.offsets = offsets      # {stock: (row, bars, tz, fields)}
+        self.shm = None
+        self.index = None
+        self.values = None
+
+    def __len__(self):
+        return len(self.offsets)
+
+    # Only the description of the panel is pickled, memory is attached again in the child process
+    def __getstate__(self):
+        return {'name': self.name, 'shape': self.shape, 'offsets': self.offsets}
+
+    def __setstate__(self, state):
+        self.__init__(state['name'], state['shape'], state['offsets'])
+
+    # Pack dict of {stock: DataFrame} into a new shared memory panel, returns None if there is nothing to share
+    @classmethod
+    def create(cls, stockData:dict):
+        stockData = {stock: data for stock, data in stockData.items() if data is not None and len(data) > 0}
+        if len(stockData) == 0:
+            return None
+        shape = (len(stockData), max(len(data) for data in stockData.values()), len(cls.fields))
+        shm = shared_memory.SharedMemory(create=True, size=cls._getSize(shape))
+        panel = cls(shm.name, shape, {})
+        panel._map(shm)
+        panel.values.fill(np.nan)
+        for row, (stock, data) in enumerate(stockData.items()):
+            index = pd.DatetimeIndex(data.index)
+            tz = ''
+            if index.tz is not None:
+                tz = str(index.tz)
+                index = index.tz_convert('UTC').tz_localize(None)
+            fields = [f for f in cls.fields if f in data.columns]
+            bars = len(data)
+            panel.index[row, :bars] = index.to_numpy(dtype='datetime64[ns]').view(np.int64)
+            panel.values[row, :bars][:, [cls.fields.index(f) for f in fields]] = data[fields].to_numpy(dtype=np.float64)
+            panel.offsets[stock] = (row, bars, tz, fields)
+        return panel
+
+    @staticmethod
+    def _getSize(shape):
+        symbols, bars, fields = shape
+        return symbols * bars * (1 + fields) * 8
+
+    def _map(self, shm):
+        symbols, bars, fields = self.shape
+        self.shm = shm
+        self.index = np.ndarray((symbols, bars), dtype=np.int64, buffer=shm.buf)
+        self.values = np.ndarray(self.shape, dtype=np.float64, buffer=shm.buf, offset=symbols * bars * 8)
+
+    def _attach(self):
+        if self.shm is None:
+            self._map(shared_memory.SharedMemory(name=self.name))
+
+    # Check if data of the stock is available in the panel
+    def has(self, stock):
+        return stock in self.offsets
+
+    # Read data of a single stock as a DataFrame backed by a read-only view of the panel
+    def read(self, stock):
+        if stock not in self.offsets:
+            return None
+        self._attach()
+        row, bars, tz, fields = self.offsets[stock]
+        index = pd.DatetimeIndex(self.index[row, :bars].view('datetime64[ns]'))
+        if tz:
+            index = index.tz_localize('UTC').tz_convert(tz)
+        values = self.values[row, :bars]
+        if len(fields) != len(self.fields):
+            values = values[:, [self.fields.index(f) for f in fields]]
+        values.flags.writeable = False
+        return pd.DataFrame(values, index=index, columns=fields, copy=False)
+
+    # Copy data of the stocks as a (stocks, bars, fields) array aligned to the right, so the last bar of every stock
+    # is in the last column. Also returns the mask of bars actually present for each stock.
+    def alignRight(self, stocks):
+        self._attach()
+        rows = np.array([self.offsets[stock][0] for stock in stocks], dtype=np.int64)
+        bars = np.array([self.offsets[stock][1] for stock in stocks], dtype=np.int64)
+        width = self.shape[1]
+        cols = np.arange(width) - (width - bars[:, None])
+        present = cols >= 0
+        aligned = self.values[rows[:, None], np.where(present, cols, 0)]
+        aligned[~present] = np.nan
+        return aligned, present
+
+    # Release the panel, the owner process should also unlink the shared memory
+    def close(self, unlink=False):
+        if self.shm is None:
+            return
+        self.index = None
+        self.values = None
+        if unlink:
+            self.shm.unlink()
+        try:
+            self.shm.close()
+        except BufferError:
+            pass    # DataFrames still refer to the panel, memory is released once they are collected
+        self.shm = None
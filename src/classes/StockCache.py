@@ -0,0 +1,93 @@
+'''
+ *  Project             :   Screenipy
+ *  Author              :   Pranjal Joshi
+ *  Created             :   17/10/2026
+ *  Description         :   Class for columnar on-disk cache of stock data
+'''
+
+import os
+import pickle
+import tempfile
+import numpy as np
+import pandas as pd
+from urllib.parse import quote, unquote
+
+# Stock data is stored as one .npz file per stock inside the cache directory
+# Every column is stored as a separate array so that dtypes are preserved and
+# a single stock can be read lazily without loading the whole cache in memory
+
+
+class StockCache:
+
+    extension = '.npz'
+
+    def __init__(self, path):
+        self.path = path
+
+    def __len__(self):
+        return len(self.symbols())
+
+    def _getFilePath(self, stock):
+        return os.path.join(self.path, quote(stock, safe='') + self.extension)
+
+    # Check if data of the stock is cached
+    def has(self, stock):
+        return os.path.isfile(self._getFilePath(stock))
+
+    # List all stocks available in the cache
+    def symbols(self):
+        if not os.path.isdir(self.path):
+            return []
+        return [unquote(f[:-len(self.extension)]) for f in os.listdir(self.path) if f.endswith(self.extension)]
+
+    # Read data of a single stock, returns None if stock is not cached
+    def read(self, stock):
+        try:
+            with np.load(self._getFilePath(stock), allow_pickle=False) as npz:
+                columns = [str(c) for c in npz['columns']]
+                index = pd.DatetimeIndex(npz['index'])
+                tz = str(npz['tz'])
+                if tz:
+                    index = index.tz_localize('UTC').tz_convert(tz)
+                return pd.DataFrame({c: npz[f'col_{i}'] for i, c in enumerate(columns)}, index=index)
+        except (FileNotFoundError, EOFError, KeyError, ValueError, OSError):
+            return None
+
+    # Write data of a single stock, file is replaced atomically
+    def write(self, stock, data:pd.DataFrame):
+        os.makedirs(self.path, exist_ok=True)
+        index = pd.DatetimeIndex(data.index)
+        tz = ''
+        if index.tz is not None:
+            tz = str(index.tz)
+            index = index.tz_convert('UTC').tz_localize(None)
+        arrays = {f'col_{i}': data[c].to_numpy() for i, c in enumerate(data.columns)}
+        fd, tmpFile = tempfile.mkstemp(dir=self.path, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, index=index.to_numpy(dtype='datetime64[ns]'), tz=np.array(tz),
+                         columns=np.array([str(c) for c in data.columns]), **arrays)
+            os.replace(tmpFile, self._getFilePath(stock))
+        except Exception:
+            if os.path.exists(tmpFile):
+                os.remove(tmpFile)
+            raise
+
+    # Import legacy stock_data_DDMMYY.pkl cache of {stock: data.to_dict('split')}
+    def importPickle(self, pickleFile):
+        with open(pickleFile, 'rb') as f:
+            stockData = pickle.load(f)
+        for stock, payload in stockData.items():
+            self.write(stock, pd.DataFrame(payload['data'], columns=payload['columns'], index=payload['index']))
+        return len(stockData)
+
+    # Export cache in legacy pickle format for older versions and the cache server
+    def exportPickle(self, pickleFile):
+        stockData = {}
+        for stock in self.symbols():
+            data = self.read(stock)
+            if data is not None:
+                stockData[stock] = data.to_dict('split')
+        with open(pickleFile, 'wb') as f:
+            pickle.dump(stockData, f)
+        return len(stockData)
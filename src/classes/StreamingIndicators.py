@@ -0,0 +1,225 @@
+'''
+ *  Project             :   Screenipy
+ *  Author              :   Pranjal Joshi
+ *  Created             :   17/10/2026
+ *  Description         :   Incremental indicators updated in O(1) per bar for repeated intraday scans
+'''
+
+import math
+import numpy as np
+import pandas as pd
+from collections import deque
+
+
+# Indicators are seeded with the closed bars of the history and updated one closed bar at a time by update().
+# seed() sets the state at once from the closed bars and the value computed for the last one by ScreenerTA, so a
+# stream started for a stock costs no more than the vectorized indicators.
+# The bar still forming during market hours is evaluated by peek() without changing the state, so a repeated scan
+# can evaluate the latest tick as often as it wants and commit the bar once the next one starts.
+# Values match ScreenerTA (TA-Lib definitions) and DataFrame.rolling() of preprocessData, NaN while not enough bars.
+
+class StreamingEMA:
+
+    def __init__(self, timeperiod):
+        self.timeperiod = timeperiod
+        self.k = 2 / (timeperiod + 1)
+        self.count = 0          # Leading values averaged for the first EMA, as TA-Lib does
+        self.value = 0.0        # Sum of the leading values while seeding, EMA afterwards
+        self.failed = False     # NaN after the leading ones, TA-Lib gives NaN from there on
+
+    def next(self, value):
+        if self.failed or math.isnan(value):
+            return math.nan, (self.count, self.value, self.failed or self.count > 0)
+        count = self.count + 1
+        if count < self.timeperiod:
+            return math.nan, (count, self.value + value, False)
+        if count == self.timeperiod:
+            ema = (self.value + value) / self.timeperiod
+        else:
+            ema = self.value + self.k * (value - self.value)
+        return ema, (min(count, self.timeperiod + 1), ema, False)
+
+    def update(self, value):
+        ema, (self.count, self.value, self.failed) = self.next(value)
+        return ema
+
+    # State after update() of values without NaN, last is the EMA of the last one
+    def seed(self, values, last):
+        if len(values) < self.timeperiod:
+            self.count, self.value = len(values), float(np.sum(values))
+        else:
+            self.count, self.value = min(len(values), self.timeperiod + 1), float(last)
+
+    def peek(self, value):
+        return self.next(value)[0]
+
+
+# Simple moving average, same as DataFrame.rolling(window).mean(): NaN if the window has any NaN
+class StreamingSMA:
+
+    def __init__(self, window):
+        self.window = window
+        self.values = deque()
+        self.total = 0.0
+        self.nans = 0
+
+    def next(self, value):
+        values, total, nans = len(self.values), self.total, self.nans
+        if values == self.window:
+            first = self.values[0]
+            nans -= math.isnan(first)
+            total -= 0.0 if math.isnan(first) else first
+            values -= 1
+        nans += math.isnan(value)
+        total += 0.0 if math.isnan(value) else value
+        return (total / self.window if values + 1 == self.window and nans == 0 else math.nan), total, nans
+
+    def update(self, value):
+        result, self.total, self.nans = self.next(value)
+        if len(self.values) == self.window:
+            self.values.popleft()
+        self.values.append(value)
+        return result
+
+    # State after update() of values
+    def seed(self, values, last=None):
+        window = np.asarray(values[-self.window:], dtype=np.float64) if len(values) else np.empty(0)
+        self.values = deque(window.tolist())
+        self.total = float(np.nansum(window))
+        self.nans = int(np.isnan(window).sum())
+
+    def peek(self, value):
+        return self.next(value)[0]
+
+
+# Wilder's RSI, same as TA-Lib RSI
+class StreamingRSI:
+
+    def __init__(self, timeperiod=14):
+        self.timeperiod = timeperiod
+        self.previous = math.nan    # Last close
+        self.count = 0              # Price changes seen
+        self.gain = 0.0             # Sum of gains and losses while seeding, Wilder averages afterwards
+        self.loss = 0.0
+        self.failed = False
+
+    def next(self, value):
+        if self.failed or (math.isnan(value) and not math.isnan(self.previous)):
+            # TA-Lib gives 0 once a NaN is in its averages
+            count = self.count + 1
+            return (0.0 if count >= self.timeperiod else math.nan), (self.previous, count, self.gain, self.loss, True)
+        if math.isnan(value):
+            return math.nan, (self.previous, self.count, self.gain, self.loss, False)
+        if math.isnan(self.previous):
+            return math.nan, (value, 0, 0.0, 0.0, False)
+        change = value - self.previous
+        gain, loss = max(change, 0.0), max(-change, 0.0)
+        count = self.count + 1
+        if count <= self.timeperiod:
+            gain, loss = self.gain + gain, self.loss + loss
+            if count < self.timeperiod:
+                return math.nan, (value, count, gain, loss, False)
+            gain, loss = gain / self.timeperiod, loss / self.timeperiod
+        else:
+            gain = (self.gain * (self.timeperiod - 1) + gain) / self.timeperiod
+            loss = (self.loss * (self.timeperiod - 1) + loss) / self.timeperiod
+        rsi = 100 * gain / (gain + loss) if gain + loss != 0 else 0.0
+        return rsi, (value, count, gain, loss, False)
+
+    def update(self, value):
+        rsi, (self.previous, self.count, self.gain, self.loss, self.failed) = self.next(value)
+        return rsi
+
+    # State after update() of values without NaN, the Wilder averages are weighted sums of the gains and losses
+    def seed(self, values, last=None):
+        if len(values) == 0:
+            return
+        changes = np.diff(np.asarray(values, dtype=np.float64))
+        gains, losses = np.maximum(changes, 0.0), np.maximum(-changes, 0.0)
+        self.previous, self.count = float(values[-1]), len(changes)
+        if self.count < self.timeperiod:
+            self.gain, self.loss = float(gains.sum()), float(losses.sum())
+            return
+        decay = (self.timeperiod - 1) / self.timeperiod
+        weights = decay ** np.arange(self.count - self.timeperiod - 1, -1, -1, dtype=np.float64) / self.timeperiod
+        scale = decay ** (self.count - self.timeperiod)
+        self.gain = float(scale * gains[:self.timeperiod].mean() + weights @ gains[self.timeperiod:])
+        self.loss = float(scale * losses[:self.timeperiod].mean() + weights @ losses[self.timeperiod:])
+
+    def peek(self, value):
+        return self.next(value)[0]
+
+
+# Preprocessed indicator columns (SMA, LMA, VolMA, RSI) of one stock kept up to date between scans.
+# Bars already seen are not processed again, only the new ones and the one still forming are.
+class StockStream:
+
+    def __init__(self, useEMA):
+        self.useEMA = useEMA
+        self.reset()
+
+    def reset(self):
+        movingAverage = StreamingEMA if self.useEMA else StreamingSMA
+        self.indicators = {'SMA': (movingAverage(50), 'Close'), 'LMA': (movingAverage(200), 'Close'),
+                           'VolMA': (StreamingSMA(20), 'Volume'), 'RSI': (StreamingRSI(14), 'Close')}
+        self.index = None           # Index of the committed bars
+        self.last = None            # Close and Volume of the last committed bar
+        self.values = {name: np.empty(0) for name in self.indicators}
+        self.length = 0
+
+    # Grow the buffers so that appending a bar is amortized O(1)
+    def reserve(self, length):
+        if length > len(self.values['RSI']):
+            capacity = max(length, 2 * len(self.values['RSI']), 64)
+            for name, values in self.values.items():
+                buffer = np.empty(capacity)
+                buffer[:self.length] = values[:self.length]
+                self.values[name] = buffer
+
+    # Data extends the committed bars if they are unchanged in it
+    def extends(self, data):
+        if self.index is None or len(data) <= self.length:
+            return False
+        if data.index[self.length - 1] != self.index:
+            return False
+        last = np.array([data['Close'].to_numpy()[self.length - 1], data['Volume'].to_numpy()[self.length - 1]], dtype=np.float64)
+        return np.array_equal(last, self.last, equal_nan=True)
+
+    # Start the stream from the indicator columns computed (vectorized) for the whole of chronological data, every bar
+    # except the last one is committed. Streams of data with missing closes are fed bar by bar instead.
+    def seed(self, data:pd.DataFrame, columns:dict):
+        self.reset()
+        close = data['Close'].to_numpy(dtype=np.float64)
+        if np.isnan(close[:-1]).any():
+            self.update(data)
+            return
+        inputs = {'Close': close[:-1], 'Volume': data['Volume'].to_numpy(dtype=np.float64)[:-1]}
+        self.reserve(len(data))
+        self.length = max(len(data) - 1, 0)
+        for name, (indicator, column) in self.indicators.items():
+            values = np.asarray(columns[name], dtype=np.float64)
+            self.values[name][:len(data)] = values
+            if self.length > 0:
+                indicator.seed(inputs[column], values[self.length - 1])
+        if self.length > 0:
+            self.index = data.index[self.length - 1]
+            self.last = np.array([close[self.length - 1], inputs['Volume'][self.length - 1]])
+
+    # Indicator columns of chronological data, every bar except the last one is committed
+    def update(self, data:pd.DataFrame):
+        if not self.extends(data):
+            self.reset()
+        self.reserve(len(data))
+        close = data['Close'].to_numpy(dtype=np.float64)
+        volume = data['Volume'].to_numpy(dtype=np.float64)
+        columns = {'Close': close, 'Volume': volume}
+        for i in range(self.length, len(data) - 1):
+            for name, (indicator, column) in self.indicators.items():
+                self.values[name][i] = indicator.update(columns[column][i])
+        self.length = len(data) - 1
+        if self.length > 0:
+            self.index = data.index[self.length - 1]
+            self.last = np.array([close[self.length - 1], volume[self.length - 1]])
+        for name, (indicator, column) in self.indicators.items():
+            self.values[name][self.length] = indicator.peek(columns[column][self.length])
+        return {name: values[:len(data)].copy() for name, values in self.values.items()}
@@ -6,24 +6,111 @@
 '''
 
 
-import os, sys
-
-class SuppressOutput: 
-    def __init__(self,suppress_stdout=False,suppress_stderr=False): 
-        self.suppress_stdout = suppress_stdout 
-        self.suppress_stderr = suppress_stderr 
-        self._stdout = None 
-        self._stderr = None
-    def __enter__(self): 
-        devnull = open(os.devnull, "w") 
-        if self.suppress_stdout: 
-            self._stdout = sys.stdout 
-            sys.stdout = devnull        
-        if self.suppress_stderr: 
-            self._stderr = sys.stderr 
-            sys.stderr = devnull 
-    def __exit__(self, *args): 
-        if self.suppress_stdout: 
-            sys.stdout = self._stdout 
-        if self.suppress_stderr: 
-            sys.stderr = self._stderr
\ No newline at end of file
+import os, sys, threading, logging
+
+# Streams are swapped by the first of nested or concurrent users of the main thread and restored by the last one,
+# otherwise a thread could restore the devnull stream saved from another thread
+_lock = threading.Lock()
+_users = {'stdout': 0, 'stderr': 0}
+_saved = {}
+_devnull = None     # Opened once and reused by every suppression
+
+# Suppression depth of each stream for the current thread, used by threads other than the main thread and in quiet mode
+_local = threading.local()
+_quiet = False      # Quiet mode is enabled in this process
+
+
+# Proxy of a standard stream, drops what the thread writes while its output of that stream is suppressed and
+# passes everything else through
+class QuietStream:
+    def __init__(self, stream, name):
+        self.stream = stream
+        self.name = name
+    def write(self, text):
+        if getattr(_local, self.name, 0):
+            return len(text)
+        return self.stream.write(text)
+    def writelines(self, lines):
+        for line in lines:
+            self.write(line)
+    def flush(self):
+        if not getattr(_local, self.name, 0):
+            self.stream.flush()
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+# Other threads (e.g. the fetch threads of the main process) do not swap the streams of the whole process, which
+# would hide the progress bar and messages of the main thread, their output is dropped by a QuietStream instead
+class SuppressOutput:
+    def __init__(self,suppress_stdout=False,suppress_stderr=False):
+        self.suppress_stdout = suppress_stdout
+        self.suppress_stderr = suppress_stderr
+    def __enter__(self):
+        threaded = _quiet or threading.current_thread() is not threading.main_thread()
+        for stream, suppress in (('stdout', self.suppress_stdout), ('stderr', self.suppress_stderr)):
+            if suppress:
+                if threaded:
+                    self.wrap(stream)
+                    setattr(_local, stream, getattr(_local, stream, 0) + 1)
+                else:
+                    self.swap(stream)
+    def __exit__(self, *args):
+        for stream, suppress in (('stdout', self.suppress_stdout), ('stderr', self.suppress_stderr)):
+            if suppress:
+                if getattr(_local, stream, 0):
+                    setattr(_local, stream, getattr(_local, stream) - 1)
+                else:
+                    self.restore(stream)
+
+    @staticmethod
+    def swap(stream):
+        global _devnull
+        with _lock:
+            if _users[stream] == 0:
+                if _devnull is None:
+                    _devnull = open(os.devnull, "w")
+                _saved[stream] = getattr(sys, stream)
+                setattr(sys, stream, _devnull)
+            _users[stream] += 1
+
+    @staticmethod
+    def restore(stream):
+        with _lock:
+            _users[stream] -= 1
+            if _users[stream] == 0:
+                setattr(sys, stream, _saved.pop(stream))
+
+    # Wrap the stream, also when it was replaced after it was wrapped (e.g. by the print hook of alive_bar while a
+    # progress bar is shown)
+    @staticmethod
+    def wrap(stream):
+        if isinstance(getattr(sys, stream), QuietStream):
+            return
+        with _lock:
+            current = getattr(sys, stream)
+            if not isinstance(current, QuietStream):
+                setattr(sys, stream, QuietStream(current, stream))
+
+    # Process wide quiet mode, set up once per worker process. Standard streams are wrapped once so that
+    # suppressing output only counts per thread, also on the main thread, instead of swapping streams, warnings
+    # are written to the wrapped sys.stderr and existing log handlers of the standard streams are routed through
+    # the wrappers too.
+    @staticmethod
+    def enableQuietMode():
+        global _quiet
+        with _lock:
+            if _users['stdout'] or _users['stderr']:
+                return False    # Streams are swapped right now
+            _quiet = True
+            routes = {}
+            for stream in ('stdout', 'stderr'):
+                original = getattr(sys, stream)
+                if not isinstance(original, QuietStream):
+                    routes[id(original)] = QuietStream(original, stream)
+                    setattr(sys, stream, routes[id(original)])
+            loggers = [logging.getLogger()] + [logger for logger in logging.Logger.manager.loggerDict.values() if isinstance(logger, logging.Logger)]
+            for logger in loggers:
+                for handler in logger.handlers:
+                    if type(handler) is logging.StreamHandler and id(handler.stream) in routes:
+                        handler.setStream(routes[id(handler.stream)])
+            return True
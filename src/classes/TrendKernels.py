@@ -0,0 +1,91 @@
+'''
+ *  Project             :   Screenipy
+ *  Author              :   Pranjal Joshi
+ *  Created             :   17/10/2026
+ *  Description         :   Numpy kernels for swing points and trend lines of one stock or of the whole universe
+'''
+
+import numpy as np
+from classes.ColorText import colorText
+
+# Kernels work along the last axis, on the bars of one stock (1-D) or of every stock (stocks x bars) at once.
+# They replace scipy.signal.argrelextrema, np.polyfit and scipy.stats.linregress in the validators, which build
+# intermediate arrays per call and print warnings that had to be suppressed by redirecting stdout and stderr.
+
+
+class TrendKernels:
+
+    trendColors = {'Unknown': colorText.WARN, 'Sideways': colorText.WARN, 'Weak Up': colorText.GREEN, 'Strong Up': colorText.GREEN,
+                   'Weak Down': colorText.FAIL, 'Strong Down': colorText.FAIL}
+
+    # Mask of local extrema, same as scipy.signal.argrelextrema(values, comparator, order=order) along the last axis
+    @staticmethod
+    def localExtrema(values, comparator=np.greater_equal, order=1):
+        values = np.asarray(values, dtype=np.float64)
+        bars = values.shape[-1]
+        mask = np.ones(values.shape, dtype=bool)
+        if bars == 0:
+            return mask
+        index = np.arange(bars)
+        for shift in range(1, order + 1):
+            mask &= comparator(values, values[..., np.minimum(index + shift, bars - 1)])
+            mask &= comparator(values, values[..., np.maximum(index - shift, 0)])
+        return mask
+
+    # Least squares line through the masked values against their bar number (or x)
+    # Returns (slope, intercept), NaN where there is no point. For a single point the minimum norm solution of
+    # np.polyfit is returned, so trends come out the same as with np.polyfit(x[mask], values[mask], 1)
+    @staticmethod
+    def fitLine(values, mask, x=None):
+        values = np.asarray(values, dtype=np.float64)
+        x = np.broadcast_to(np.arange(values.shape[-1], dtype=np.float64) if x is None else np.asarray(x, dtype=np.float64), values.shape)
+        weight = mask.astype(np.float64)
+        y = np.where(mask, values, 0.0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            count = weight.sum(axis=-1)
+            meanX = (weight * x).sum(axis=-1) / count
+            meanY = y.sum(axis=-1) / count
+            dx = np.where(mask, x - meanX[..., None], 0.0)
+            dy = np.where(mask, values - meanY[..., None], 0.0)
+            slope = (dx * dy).sum(axis=-1) / (dx * dx).sum(axis=-1)
+            intercept = meanY - slope * meanX
+            single = count == 1
+            slope = np.where(single, np.where(meanX != 0, meanY / (2 * meanX), np.nan), slope)
+            intercept = np.where(single, np.where(meanX != 0, meanY / 2, np.nan), intercept)
+        return slope, intercept
+
+    # Bars below the regression line of low, refitted on them until no more than points remain, as in findTrendlines.
+    # Refits are bounded to log2(bars) by default, if more bars remain after that the ones lowest below the last line
+    # are kept, so the cost is O(n log n) at worst and each refit only touches the bars kept by the previous one.
+    @staticmethod
+    def supportBars(low, x, points=30, refits=None):
+        below = np.arange(len(low))
+        refits = int(np.ceil(np.log2(max(len(low), 2)))) if refits is None else refits
+        while len(below) > points:
+            slope, intercept = TrendKernels.fitLine(low[below], np.ones(len(below), dtype=bool), x=x[below])
+            residual = low[below] - (slope * x[below] + intercept)
+            below, residual = below[residual < 0], residual[residual < 0]
+            if refits == 0:
+                if len(below) > points:
+                    below = np.sort(below[np.argpartition(residual, points)[:points]])
+                break
+            refits -= 1
+        return below
+
+    # Angle in degrees of the line through the swing tops of close, 0 if it can not be fitted
+    # close: chronological closes with NaN and inf replaced by 0, tops at 0 are ignored as in findTrend
+    @staticmethod
+    def trendAngle(close):
+        close = np.asarray(close, dtype=np.float64)
+        tops = TrendKernels.localExtrema(close) & (close > 0)
+        slope, _ = TrendKernels.fitLine(close, tops)
+        slope = np.where(np.isfinite(slope), slope, 0.0)
+        return np.rad2deg(np.arctan(slope))
+
+    # Trend name of the angle of findTrend
+    @staticmethod
+    def trendName(angle):
+        angle = np.asarray(angle, dtype=np.float64)
+        return np.select([angle == 0, (angle <= 30) & (angle >= -30), (angle >= 30) & (angle < 61), angle >= 60,
+                          (angle <= -30) & (angle > -61), angle <= -60],
+                         ['Unknown', 'Sideways', 'Weak Up', 'Strong Up', 'Weak Down', 'Strong Down'], 'Unknown').astype(object)
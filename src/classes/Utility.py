@@ -7,6 +7,7 @@
 
 import os
 import sys
+import glob
 import platform
 import datetime
 import pytz
@@ -14,7 +15,6 @@ import pickle
 import requests
 import time
 import joblib
-import keras
 import pandas as pd
 from alive_progress import alive_bar
 from tabulate import tabulate
@@ -22,6 +22,8 @@ from time import sleep
 from classes.ColorText import colorText
 from classes.Changelog import VERSION, changelog
 import classes.ConfigManager as ConfigManager
+from classes.StockCache import StockCache
+from classes.NumpyModel import NumpyModel
 
 art = colorText.GREEN + '''
      .d8888b.                                             d8b                   
@@ -41,6 +43,8 @@ art = colorText.GREEN + '''
 lastScreened = 'last_screened_results.pkl'
 lastScreenedUnformatted = 'last_screened_unformatted_results.pkl'
 
+_niftyModel = None      # (modification times of the files, model, scaler) loaded by tools.loadNiftyModel
+
 # Class for managing misc and utility methods
 
 
@@ -110,35 +114,8 @@ class tools:
         closeTime = curr.replace(hour=15, minute=30)
         return ((openTime <= curr <= closeTime) and (0 <= curr.weekday() <= 4))
 
-    def saveStockData(stockDict, configManager, loadCount):
-        curr = datetime.datetime.now(pytz.timezone('Asia/Kolkata'))
-        openTime = curr.replace(hour=9, minute=15)
-        cache_date = datetime.date.today()  # for monday to friday
-        weekday = datetime.date.today().weekday()
-        if curr < openTime:  # for monday to friday before 9:15
-            cache_date = datetime.datetime.today() - datetime.timedelta(1)
-        if weekday == 0 and curr < openTime:  # for monday before 9:15
-            cache_date = datetime.datetime.today() - datetime.timedelta(3)
-        if weekday == 5 or weekday == 6:  # for saturday and sunday
-            cache_date = datetime.datetime.today() - datetime.timedelta(days=weekday - 4)
-        cache_date = cache_date.strftime("%d%m%y")
-        cache_file = "stock_data_" + str(cache_date) + ".pkl"
-        configManager.deleteStockData(excludeFile=cache_file)
-
-        if not os.path.exists(cache_file) or len(stockDict) > (loadCount+1):
-            with open(cache_file, 'wb') as f:
-                try:
-                    pickle.dump(stockDict.copy(), f)
-                    print(colorText.BOLD + colorText.GREEN +
-                          "=> Done." + colorText.END)
-                except pickle.PicklingError:
-                    print(colorText.BOLD + colorText.FAIL +
-                          "=> Error while Caching Stock Data." + colorText.END)
-        else:
-            print(colorText.BOLD + colorText.GREEN +
-                  "=> Already Cached." + colorText.END)
-
-    def loadStockData(stockDict, configManager, proxyServer=None):
+    # Get date of the last after-market session as DDMMYY for naming the cache
+    def getLastCachedDate():
         curr = datetime.datetime.now(pytz.timezone('Asia/Kolkata'))
         openTime = curr.replace(hour=9, minute=15)
         last_cached_date = datetime.date.today()  # for monday to friday after 3:30
@@ -149,22 +126,55 @@ class tools:
             last_cached_date = datetime.datetime.today() - datetime.timedelta(days=weekday - 4)
         if weekday == 0 and curr < openTime:  # for monday before 9:15
             last_cached_date = datetime.datetime.today() - datetime.timedelta(3)
-        last_cached_date = last_cached_date.strftime("%d%m%y")
-        cache_file = "stock_data_" + str(last_cached_date) + ".pkl"
-        if os.path.exists(cache_file):
-            with open(cache_file, 'rb') as f:
-                try:
-                    stockData = pickle.load(f)
-                    print(colorText.BOLD + colorText.GREEN +
-                          "[+] Automatically Using Cached Stock Data due to After-Market hours!" + colorText.END)
-                    for stock in stockData:
-                        stockDict[stock] = stockData.get(stock)
-                except pickle.UnpicklingError:
-                    print(colorText.BOLD + colorText.FAIL +
-                          "[+] Error while Reading Stock Cache." + colorText.END)
-                except EOFError:
-                    print(colorText.BOLD + colorText.FAIL +
-                          "[+] Stock Cache Corrupted." + colorText.END)
+        return last_cached_date.strftime("%d%m%y")
+
+    # Stock data is written to the cache by each consumer as soon as it is fetched
+    # Only clean-up the older caches here and export the legacy pickle if required
+    def saveStockData(stockCache, configManager, exportPickle=False):
+        configManager.deleteStockData(excludeFile=stockCache.path)
+        if exportPickle:
+            try:
+                stockCache.exportPickle(stockCache.path + ".pkl")
+            except pickle.PicklingError:
+                print(colorText.BOLD + colorText.FAIL +
+                      "=> Error while Caching Stock Data." + colorText.END)
+                return
+        print(colorText.BOLD + colorText.GREEN +
+              "=> Done." + colorText.END)
+
+    # Get the most recent cache of an earlier session, None if there is none
+    def getPreviousStockCache(stockCache):
+        previous = []
+        for f in glob.glob('stock_data_*'):
+            try:
+                if os.path.isdir(f) and os.path.abspath(f) != os.path.abspath(stockCache.path):
+                    previous.append((datetime.datetime.strptime(f[len('stock_data_'):], '%d%m%y'), f))
+            except ValueError:
+                continue
+        if len(previous) == 0:
+            return None
+        return StockCache(max(previous)[1])
+
+    def loadStockData(configManager, proxyServer=None):
+        cache_dir = "stock_data_" + tools.getLastCachedDate()
+        cache_file = cache_dir + ".pkl"
+        stockCache = StockCache(cache_dir)
+        if os.path.isdir(cache_dir):
+            print(colorText.BOLD + colorText.GREEN +
+                  "[+] Automatically Using Cached Stock Data due to After-Market hours!" + colorText.END)
+        elif os.path.exists(cache_file):
+            # Import legacy pickled cache into the columnar cache
+            try:
+                stockCache.importPickle(cache_file)
+                os.remove(cache_file)
+                print(colorText.BOLD + colorText.GREEN +
+                      "[+] Automatically Using Cached Stock Data due to After-Market hours!" + colorText.END)
+            except pickle.UnpicklingError:
+                print(colorText.BOLD + colorText.FAIL +
+                      "[+] Error while Reading Stock Cache." + colorText.END)
+            except EOFError:
+                print(colorText.BOLD + colorText.FAIL +
+                      "[+] Stock Cache Corrupted." + colorText.END)
         elif ConfigManager.default_period == configManager.period and ConfigManager.default_duration == configManager.duration:
             cache_url = "https://raw.github.com/pranjal-joshi/Screeni-py/actions-data-download/actions-data-download/" + cache_file
             if proxyServer is not None:
@@ -193,10 +203,11 @@ class tools:
                 except Exception as e:
                     print("[!] Download Error - " + str(e))
                 print("")
-                tools.loadStockData(stockDict, configManager, proxyServer)
+                return tools.loadStockData(configManager, proxyServer)
             else:
                 print(colorText.BOLD + colorText.FAIL +
                       "[+] Cache unavailable on Screenipy server, Continuing.." + colorText.END)
+        return stockCache
 
     # Save screened results to excel
     def promptSaveResults(df):
@@ -362,9 +373,41 @@ class tools:
                     except Exception as e:
                         print("[!] Download Error - " + str(e))
             time.sleep(3)
-        model = keras.models.load_model(files[0])
-        pkl = joblib.load(files[1])
-        return model, pkl
+        return tools.loadNiftyModel(files)
+
+    # Model and scaler are loaded once per process and again only when the files were downloaded again
+    def loadNiftyModel(files):
+        global _niftyModel
+        modified = (os.path.getmtime(files[0]), os.path.getmtime(files[1]))
+        if _niftyModel is None or _niftyModel[0] != modified:
+            _niftyModel = (modified, tools.loadNiftyNetwork(files[0]), joblib.load(files[1]))
+        return _niftyModel[1], _niftyModel[2]
+
+    # Network of the model run with numpy from its .npz export, written again whenever the .h5 file is newer.
+    # Keras is used only if the weights can not be exported, TensorFlow is then imported with GPUs hidden
+    # as they cause wrong predictions in Docker.
+    def loadNiftyNetwork(h5File):
+        npzFile = os.path.splitext(h5File)[0] + '.npz'
+        try:
+            if not os.path.isfile(npzFile) or os.path.getmtime(npzFile) < os.path.getmtime(h5File):
+                return NumpyModel.export(h5File, npzFile)
+            return NumpyModel.load(npzFile)
+        except Exception:
+            # No h5py, a model that is not only Dense layers, a broken download or a directory that can not be written
+            try:
+                os.remove(npzFile)
+            except OSError:
+                pass
+        os.environ.setdefault('TF_CPP_MIN_LOG_LEVEL', '3')
+        import tensorflow as tf
+        try:
+            tf.config.set_visible_devices([], 'GPU')
+            for device in tf.config.get_visible_devices():
+                assert device.device_type != 'GPU'
+        except:
+            pass
+        import keras
+        return keras.models.load_model(h5File)
 
     def getSigmoidConfidence(x):
         out_min, out_max = 0, 100
@@ -0,0 +1,236 @@
+'''
+ *  Project             :   Screenipy
+ *  Author              :   Pranjal Joshi
+ *  Created             :   17/10/2026
+ *  Description         :   Class for cross-sectional screening of all stocks at once
+'''
+
+import numpy as np
+import pandas as pd
+from classes.ColorText import colorText
+from classes.ScreenipyTA import ScreenerTA
+from classes.TrendKernels import TrendKernels
+from classes.Lorentzian import Lorentzian
+
+# Evaluates validateConsolidation, validateMovingAverages, validateVolume, findBreakout, validateLTP,
+# validateRSI and findTrend of Screener.tools for all stocks of the SharedPanel in one vectorized pass,
+# and on request the Lorentzian classification of validateLorentzian for stocks with the same number of bars at once.
+# Stocks are aligned to the right into 2-D (stocks x bars) arrays per field, so the most recent
+# candle of every stock is in the last column. Outputs are identical to the per-stock validators.
+
+
+class VectorScreener:
+
+    requiredFields = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+    maSignalColors = {
+        'Bullish': colorText.GREEN, 'Bearish': colorText.FAIL, 'Unknown': colorText.WARN, 'Neutral': colorText.WARN,
+        '50MA-Support': colorText.GREEN, '50MA-Resist': colorText.FAIL, '200MA-Support': colorText.GREEN, '200MA-Resist': colorText.FAIL,
+        'BullCross-50MA': colorText.GREEN, 'BullCross-200MA': colorText.GREEN, 'BearCross-50MA': colorText.FAIL, 'BearCross-200MA': colorText.FAIL
+    }
+
+    def __init__(self, configManager):
+        self.configManager = configManager
+
+    # Replace NaN and inf with 0, same as fillna(0) and replace([np.inf, -np.inf], 0) of the validators
+    @staticmethod
+    def _clean(values):
+        return np.where(np.isfinite(values), values, 0.0)
+
+    # Apply a TA function of ScreenerTA on the bars present for each stock
+    # Stocks for which the TA function fails are marked in failed, same as preprocessData raising for them
+    @staticmethod
+    def _applyTA(function, values, present, timeperiod, failed):
+        result = np.full(values.shape, np.nan)
+        for i in range(len(values)):
+            try:
+                result[i, present[i]] = np.asarray(function(pd.Series(values[i, present[i]]), timeperiod=timeperiod), dtype=np.float64)
+            except Exception:
+                failed[i] = True
+        return result
+
+    # Rolling mean along bars, same as DataFrame.rolling(window).mean() of preprocessData
+    @staticmethod
+    def _rollingMean(values, window):
+        return pd.DataFrame(values.T).rolling(window=window).mean().to_numpy().T
+
+    # Reduce over the bars present in the lookback window, returns NaN for stocks without any bar in the window
+    @staticmethod
+    def _windowReduce(function, values, present):
+        if values.shape[1] == 0:
+            return np.full(len(values), np.nan)
+        fill = -np.inf if function is np.max else np.inf
+        result = function(np.where(present, values, fill), axis=1)
+        return np.where(present.any(axis=1), result, np.nan)
+
+    # Evaluate the validators for stocks available in the panel
+    # Returns {stock: (screenDict, saveDict, results)} where results are the return values of the validators followed by
+    # the (isNewBuySignal, isNewSellSignal) of the Lorentzian classification if requested, else None
+    def validate(self, stockPanel, stocks, minRSI, maxRSI, maRange=1.25, lorentzian=False):
+        stocks = [stock for stock in dict.fromkeys(stocks) if stockPanel.has(stock) and
+                  all(field in stockPanel.offsets[stock][3] for field in self.requiredFields)]
+        if len(stocks) == 0:
+            return {}
+        aligned, present = stockPanel.alignRight(stocks)
+        field = lambda name: aligned[:, :, stockPanel.fields.index(name)]
+        open, high, low, close, volume = (field(name) for name in self.requiredFields)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # Indicators of preprocessData
+            failed = np.zeros(len(stocks), dtype=bool)
+            if self.configManager.useEMA:
+                sma = self._applyTA(ScreenerTA.EMA, close, present, 50, failed)
+                lma = self._applyTA(ScreenerTA.EMA, close, present, 200, failed)
+            else:
+                sma = self._rollingMean(close, 50)
+                lma = self._rollingMean(close, 200)
+            volMA = self._rollingMean(volume, 20)
+            rsi = self._applyTA(ScreenerTA.RSI, close, present, 14, failed)
+
+            # Recent candle and lookback window of daysToLookback candles
+            daysToLookback = self.configManager.daysToLookback
+            window = slice(max(close.shape[1] - daysToLookback, 0), None)
+            inWindow = present[:, window]
+            o, h, l, c, v, s, lm, vm, r = (self._clean(x[:, -1]) for x in (open, high, low, close, volume, sma, lma, volMA, rsi))
+            bullishCandle = c >= o
+
+            # validateConsolidation
+            percentage = self.configManager.consolidationPercentage
+            windowClose = self._clean(close[:, window])
+            hc = self._windowReduce(np.max, windowClose, inWindow)
+            lc = self._windowReduce(np.min, windowClose, inWindow)
+            consolidationRange = np.round(np.abs((hc - lc) / hc) * 100, 1)
+            isConsolidating = ((hc - lc) <= (hc * percentage / 100)) & ((hc - lc) != 0)
+
+            # validateMovingAverages
+            maSignal = np.select([(s > lm) & (c > s), s < lm, s == 0], ['Bullish', 'Bearish', 'Unknown'], 'Neutral').astype(object)
+            smaDev, lmaDev = s * maRange / 100, lm * maRange / 100
+            reversals = [
+                ((c > s) & (l <= (s + smaDev)), '50MA-Support', 1),
+                ((c < s) & (h >= (s - smaDev)), '50MA-Resist', -1),
+                ((c > lm) & (l <= (lm + lmaDev)), '200MA-Support', 1),
+                ((c < lm) & (h >= (lm - lmaDev)), '200MA-Resist', -1),
+            ]
+            crosses = [
+                (bullishCandle & (o < s) & (c > s), 'BullCross-50MA', 1),
+                (bullishCandle & (o < lm) & (c > lm), 'BullCross-200MA', 1),
+                (~bullishCandle & (o > s) & (c < s), 'BearCross-50MA', -1),
+                (~bullishCandle & (o > lm) & (c < lm), 'BearCross-200MA', -1),
+            ]
+            maReversal = np.zeros(len(stocks), dtype=int)
+            for conditions in (reversals, crosses):
+                matched = np.zeros(len(stocks), dtype=bool)
+                for condition, signal, reversal in conditions:
+                    condition = condition & ~matched
+                    maSignal[condition] = signal
+                    maReversal[condition] = reversal
+                    matched |= condition
+
+            # validateVolume
+            volumeUnknown = vm == 0
+            volumeRatio = np.round(v / vm, 2)
+            isVolumeHigh = volumeUnknown | ((volumeRatio >= self.configManager.volumeRatio) & ~np.isinf(volumeRatio) & (volumeRatio != 20))
+
+            # findBreakout
+            previous = slice(window.start, -1)
+            inPrevious = present[:, previous]
+            previousHigh = self._clean(high[:, previous])
+            hs = np.round(self._windowReduce(np.max, previousHigh, inPrevious), 2)
+            hc = np.round(self._windowReduce(np.max, self._clean(close[:, previous]), inPrevious), 2)
+            rc = np.round(c, 2)
+            breakoutUnknown = np.isnan(hc) | np.isnan(hs)
+            higherShadows = ((previousHigh > hc[:, None]) & inPrevious).sum(axis=1)
+            nearResistance = (hs > hc) & ((hs - hc) <= (hs * 2 / 100))
+            aboveResistance = (hs > hc) & ~nearResistance & (daysToLookback / np.maximum(higherShadows, 1) <= 3)
+            breakoutLevel = np.where(aboveResistance, hs, hc)
+            isBreaking = ~breakoutUnknown & (rc >= breakoutLevel) & bullishCandle
+
+            # validateLTP on all candles
+            ltp = np.round(c, 2)
+            previousClose = self._clean(close[:, -2]) if close.shape[1] > 1 else np.full(len(stocks), np.nan)
+            pctChange = np.where(present.sum(axis=1) > 1, (c / previousClose - 1) * 100, np.nan)
+            verifyStageTwo = np.ones(len(stocks), dtype=bool)
+            if self.configManager.stageTwo:
+                yearly = slice(max(close.shape[1] - 250, 0), None)
+                yearlyClose = self._clean(close[:, yearly])
+                yearlyLow = self._windowReduce(np.min, yearlyClose, present[:, yearly])
+                yearlyHigh = self._windowReduce(np.max, yearlyClose, present[:, yearly])
+                verifyStageTwo = ~(present.sum(axis=1) > 250) | ~((ltp < (2 * yearlyLow)) | (ltp < (0.75 * yearlyHigh)))
+            isLtpValid = (ltp >= self.configManager.minLTP) & (ltp <= self.configManager.maxLTP) & verifyStageTwo
+
+            # validateRSI
+            rsi = r.astype(int)
+            isValidRsi = (rsi >= minRSI) & (rsi <= maxRSI) & (rsi <= 70) & (rsi >= 30)
+
+            # findTrend
+            angle = np.where(present.sum(axis=1) >= daysToLookback, TrendKernels.trendAngle(windowClose), 0.0)
+            trend = TrendKernels.trendName(angle)
+
+            # validateLorentzian
+            lorentzianSignal = [None] * len(stocks)
+            if lorentzian:
+                bars = present.sum(axis=1)
+                for length in np.unique(bars):
+                    group = np.flatnonzero(bars == length)
+                    ohlc = (x[group, x.shape[1] - length:] for x in (open, high, low, close))
+                    for i, signal in zip(group, Lorentzian.batchSignals(*ohlc)):
+                        lorentzianSignal[i] = signal
+
+        crossSection = {}
+        for i, stock in enumerate(stocks):
+            if failed[i]:
+                continue
+            screenDict, saveDict = {}, {}
+
+            color = colorText.GREEN if isConsolidating[i] else colorText.FAIL
+            screenDict['Consolidating'] = colorText.BOLD + color + "Range = " + str(consolidationRange[i]) + "%" + colorText.END
+            saveDict['Consolidating'] = str(consolidationRange[i]) + "%"
+
+            screenDict['MA-Signal'] = colorText.BOLD + self.maSignalColors[maSignal[i]] + maSignal[i] + colorText.END
+            saveDict['MA-Signal'] = maSignal[i]
+
+            if volumeUnknown[i]:
+                saveDict['Volume'] = "Unknown"
+                screenDict['Volume'] = colorText.BOLD + colorText.WARN + "Unknown" + colorText.END
+            else:
+                color = colorText.GREEN if isVolumeHigh[i] else colorText.FAIL
+                saveDict['Volume'] = str(volumeRatio[i]) + "x"
+                screenDict['Volume'] = colorText.BOLD + color + str(volumeRatio[i]) + "x" + colorText.END
+
+            color = colorText.GREEN if rc[i] >= breakoutLevel[i] else colorText.FAIL
+            if breakoutUnknown[i]:
+                saveDict['Breaking-Out'] = 'BO: Unknown'
+                screenDict['Breaking-Out'] = colorText.BOLD + colorText.WARN + 'BO: Unknown' + colorText.END
+            elif nearResistance[i]:
+                saveDict['Breaking-Out'] = str(hc[i])
+                screenDict['Breaking-Out'] = colorText.BOLD + color + "BO: " + str(hc[i]) + " R: " + str(hs[i]) + colorText.END
+            elif aboveResistance[i]:
+                saveDict['Breaking-Out'] = str(hs[i])
+                screenDict['Breaking-Out'] = colorText.BOLD + color + "BO: " + str(hs[i]) + colorText.END
+            elif hs[i] > hc[i]:
+                saveDict['Breaking-Out'] = str(hc[i]) + ", " + str(hs[i])
+                screenDict['Breaking-Out'] = colorText.BOLD + color + "BO: " + str(hc[i]) + " R: " + str(hs[i]) + colorText.END
+            else:
+                saveDict['Breaking-Out'] = str(hc[i])
+                screenDict['Breaking-Out'] = colorText.BOLD + color + "BO: " + str(hc[i]) + colorText.END
+
+            if pctChange[i] > 0.2:
+                pctText = colorText.GREEN + (" (%.1f%%)" % pctChange[i]) + colorText.END
+            elif pctChange[i] < -0.2:
+                pctText = colorText.FAIL + (" (%.1f%%)" % pctChange[i]) + colorText.END
+            else:
+                pctText = colorText.WARN + (" (%.1f%%)" % pctChange[i]) + colorText.END
+            color = colorText.GREEN if isLtpValid[i] else colorText.FAIL
+            saveDict['LTP'] = str(ltp[i])
+            screenDict['LTP'] = color + ("%.2f" % ltp[i]) + pctText + colorText.END
+
+            color = colorText.GREEN if isValidRsi[i] else colorText.FAIL
+            saveDict['RSI'] = int(rsi[i])
+            screenDict['RSI'] = colorText.BOLD + color + str(rsi[i]) + colorText.END
+
+            screenDict['Trend'] = colorText.BOLD + TrendKernels.trendColors[trend[i]] + trend[i] + colorText.END
+            saveDict['Trend'] = trend[i]
+
+            results = (consolidationRange[i], int(maReversal[i]), bool(isVolumeHigh[i]), bool(isBreaking[i]), bool(isLtpValid[i]), bool(isValidRsi[i]), trend[i], lorentzianSignal[i])
+            crossSection[stock] = (screenDict, saveDict, results)
+        return crossSection
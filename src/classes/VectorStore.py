@@ -0,0 +1,209 @@
+'''
+ *  Project             :   Screenipy
+ *  Author              :   Pranjal Joshi
+ *  Created             :   17/10/2026
+ *  Description         :   Buffered writes of stock embeddings to the ChromaDB store of similar stock search
+'''
+
+try:
+    import chromadb
+    CHROMA_AVAILABLE = True
+except:
+    CHROMA_AVAILABLE = False
+
+import os
+import glob
+import numpy as np
+from contextlib import nullcontext
+
+CHROMADB_PATH = "chromadb_store/"
+VECTOR_INDEX_PATH = "vector_index/"     # Shards of VectorIndex written by the consumers when ChromaDB is not available
+COLLECTION_NAME = "nse_stocks"
+
+
+# Exact nearest neighbour search over embeddings kept in one contiguous float32 matrix, the in-process fallback of
+# the ChromaDB collection. upsert, get and query take and return the same as the collection methods used by the
+# screener, distances are squared L2 (default space of ChromaDB) or 1 - cosine similarity.
+# An index opened with a path is saved there after every upsert, as <path>.npy (rows) and <path>.ids.npy, so that
+# it can be memory mapped by load.
+class VectorIndex:
+
+    metrics = ('l2', 'cosine')
+
+    def __init__(self, metric='l2', path=None):
+        if metric not in VectorIndex.metrics:
+            raise ValueError(f'Unknown metric {metric}, expected one of {VectorIndex.metrics}')
+        self.metric = metric
+        self.path = path
+        self.ids = []
+        self.positions = {}     # id: row
+        self.matrix = None      # Rows beyond len(ids) are spare capacity
+        self.norms = None       # Squared norms (l2) or normalized rows (cosine) of the rows, computed on first query
+
+    def __len__(self):
+        return len(self.ids)
+
+    def count(self):
+        return len(self.ids)
+
+    @property
+    def embeddings(self):
+        return self.matrix[:len(self.ids)] if self.matrix is not None else np.empty((0, 0), dtype=np.float32)
+
+    # Insert or replace the embeddings of ids, documents are the ids in the screener and are not kept
+    def upsert(self, embeddings, documents=None, ids=None):
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        if embeddings.ndim != 2 or len(embeddings) != len(ids):
+            raise ValueError('Expected one embedding per id')
+        if self.matrix is None:
+            self.matrix = np.empty((max(64, len(ids)), embeddings.shape[1]), dtype=np.float32)
+        elif embeddings.shape[1] != self.matrix.shape[1]:
+            raise ValueError(f'Embedding dimension {embeddings.shape[1]} does not match dimension {self.matrix.shape[1]} of the index')
+        rows = []
+        for id in ids:
+            if id not in self.positions:
+                self.positions[id] = len(self.ids)
+                self.ids.append(id)
+            rows.append(self.positions[id])
+        if len(self.ids) > len(self.matrix) or not self.matrix.flags.writeable:
+            matrix = np.empty((max(len(self.ids), 2 * len(self.matrix)), self.matrix.shape[1]), dtype=np.float32)
+            matrix[:len(self.matrix)] = self.matrix
+            self.matrix = matrix
+        self.matrix[rows] = embeddings
+        self.norms = None
+        if self.path is not None:
+            self.save(self.path)
+
+    # Embeddings of the ids found in the index
+    def get(self, ids, include=['embeddings']):
+        found = [id for id in ids if id in self.positions]
+        return {'ids': found, 'embeddings': [self.matrix[self.positions[id]].tolist() for id in found]}
+
+    # n_results nearest ids of every query embedding, nearest first, queries are computed in one matrix product
+    def query(self, query_embeddings, n_results=10):
+        if len(query_embeddings) == 0 or len(self.ids) == 0:
+            return {'ids': [[] for _ in query_embeddings], 'distances': [[] for _ in query_embeddings]}
+        queries = np.asarray(query_embeddings, dtype=np.float32).reshape(len(query_embeddings), -1)
+        embeddings = self.embeddings
+        if self.norms is None:
+            if self.metric == 'l2':
+                self.norms = np.einsum('ij,ij->i', embeddings, embeddings)
+            else:
+                self.norms = embeddings / np.maximum(np.linalg.norm(embeddings, axis=1), 1e-12)[:, None]
+        if self.metric == 'l2':
+            distances = self.norms[None, :] - 2 * (queries @ embeddings.T) + np.einsum('ij,ij->i', queries, queries)[:, None]
+            np.maximum(distances, 0, out=distances)
+        else:
+            queries = queries / np.maximum(np.linalg.norm(queries, axis=1), 1e-12)[:, None]
+            distances = 1 - queries @ self.norms.T
+        n = min(n_results, len(self.ids))
+        nearest = np.argpartition(distances, n - 1, axis=1)[:, :n] if n < len(self.ids) else np.tile(np.arange(n), (len(queries), 1))
+        order = np.take_along_axis(distances, nearest, axis=1).argsort(axis=1, kind='stable')
+        nearest = np.take_along_axis(nearest, order, axis=1)
+        return {'ids': [[self.ids[row] for row in rows] for rows in nearest],
+                'distances': np.take_along_axis(distances, nearest, axis=1).tolist()}
+
+    # Write the rows and ids, replacing the files only once they are complete
+    def save(self, path):
+        for suffix, values in (('.npy', self.embeddings), ('.ids.npy', np.array(self.ids, dtype=str))):
+            with open(path + suffix + '.tmp', 'wb') as file:
+                np.save(file, values)
+            os.replace(path + suffix + '.tmp', path + suffix)
+
+    # Index of the shards saved in directory (or of a single saved path), rows are memory mapped when there is one shard.
+    # Shards are merged from the oldest to the newest one, so the latest embedding of an id wins.
+    @staticmethod
+    def load(path, metric='l2'):
+        index = VectorIndex(metric)
+        if os.path.isdir(path):
+            shards = sorted((file[:-len('.ids.npy')] for file in glob.glob(os.path.join(path, '*.ids.npy'))), key=lambda shard: os.path.getmtime(shard + '.npy'))
+        else:
+            shards = [path]
+        for shard in shards:
+            ids = np.load(shard + '.ids.npy').tolist()
+            if len(ids) == 0:
+                continue
+            if len(index) == 0:
+                index.matrix = np.load(shard + '.npy', mmap_mode='r')
+                index.ids = ids
+                index.positions = {id: row for row, id in enumerate(ids)}
+            else:
+                index.upsert(np.load(shard + '.npy', mmap_mode='r'), ids=ids)
+        return index
+
+    # Remove the shards saved in directory
+    @staticmethod
+    def clear(path=VECTOR_INDEX_PATH):
+        for file in glob.glob(os.path.join(path, '*.npy')):
+            os.remove(file)
+
+
+# Embeddings added by a worker are kept in memory and upserted in groups through a client opened once per process.
+# Every process keeps its own in-memory HNSW index which is not told about the writes of other processes, so
+# workers must never persist it: the sync threshold is set out of reach and a process that queries the store opens
+# a fresh client, which replays all the embeddings from the shared sqlite queue.
+# Without ChromaDB, the embeddings of every process go to its own VectorIndex shard in VECTOR_INDEX_PATH.
+class VectorStore:
+
+    flushSize = 64
+    metadata = {'hnsw:sync_threshold': 10**9}
+    clients = {}    # path: client of this process
+
+    def __init__(self, path=CHROMADB_PATH, lock=None, flushSize=None):
+        self.path = path
+        self.lock = lock            # Serializes flushes of the workers, if given
+        self.flushSize = flushSize or VectorStore.flushSize
+        self.collection = None
+        self.pending = {}           # stockCode: embedding, latest one wins as with upsert
+
+    # Client of the store, opened once per process
+    @staticmethod
+    def getClient(path=CHROMADB_PATH):
+        if path not in VectorStore.clients:
+            VectorStore.clients[path] = chromadb.PersistentClient(path=path)
+        return VectorStore.clients[path]
+
+    def getCollection(self):
+        if self.collection is None:
+            if CHROMA_AVAILABLE:
+                self.collection = VectorStore.getClient(self.path).get_or_create_collection(name=COLLECTION_NAME, metadata=VectorStore.metadata)
+            else:
+                os.makedirs(VECTOR_INDEX_PATH, exist_ok=True)
+                self.collection = VectorIndex(path=os.path.join(VECTOR_INDEX_PATH, str(os.getpid())))
+        return self.collection
+
+    # Collection to query for similar stocks, with every embedding written so far by the consumers
+    @staticmethod
+    def open(path=CHROMADB_PATH):
+        if CHROMA_AVAILABLE:
+            return chromadb.PersistentClient(path=path).get_collection(name=COLLECTION_NAME)     # Fresh client, see above
+        return VectorIndex.load(VECTOR_INDEX_PATH)
+
+    # Remove the embeddings of earlier runs
+    @staticmethod
+    def clear(path=CHROMADB_PATH):
+        if CHROMA_AVAILABLE:
+            try:
+                chromadb.PersistentClient(path=path).delete_collection(COLLECTION_NAME)
+            except:
+                pass
+        VectorIndex.clear()
+
+    def __len__(self):
+        return len(self.pending)
+
+    # Buffer the embedding of a stock, the buffer is flushed when full
+    def add(self, stockCode, embedding):
+        self.pending[stockCode] = embedding
+        if len(self.pending) >= self.flushSize:
+            self.flush()
+
+    # Upsert the buffered embeddings in one call
+    def flush(self):
+        if not self.pending:
+            return 0
+        ids = list(self.pending)
+        with self.lock if self.lock is not None else nullcontext():
+            self.getCollection().upsert(embeddings=[self.pending[stockCode] for stockCode in ids], documents=ids, ids=ids)
+        self.pending.clear()
+        return len(ids)
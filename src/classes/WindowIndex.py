@@ -0,0 +1,172 @@
+'''
+ *  Project             :   Screenipy
+ *  Author              :   Pranjal Joshi
+ *  Created             :   17/10/2026
+ *  Description         :   Sliding window index of the whole price history, for historical analogues of a pattern
+'''
+
+import os
+import numpy as np
+import pandas as pd
+
+WINDOW_INDEX_PATH = "window_index/"
+
+
+# Every window of consecutive candles of every stock is an embedding of the similar stock search, the OHLC
+# pct-change of its candles flattened candle by candle as in Screener.addVector. Windows are not stored: the
+# changes of all the stocks are kept once in one contiguous float32 (bars, 4) array and windows of any length
+# are scored against the queries straight from it, lag by lag.
+# The index is updated with only the bars after the last indexed one and is saved as .npy files, memory
+# mapped by load.
+class WindowIndex:
+
+    fields = ['Open', 'High', 'Low', 'Close']
+    metrics = ('l2', 'cosine')
+
+    def __init__(self, metric='l2'):
+        if metric not in WindowIndex.metrics:
+            raise ValueError(f'Unknown metric {metric}, expected one of {WindowIndex.metrics}')
+        self.metric = metric
+        self.series = {}    # stockCode: (dates as int64 ns, changes (bars, 4)), chronological
+        self.packed = None  # (ids, offsets, dates, changes) of all the stocks, built on first query
+
+    def __len__(self):
+        return len(self.series)
+
+    def has(self, stockCode):
+        return stockCode in self.series
+
+    # Local dates of the index as int64 ns
+    @staticmethod
+    def dates(index):
+        if getattr(index, 'tz', None) is not None:
+            index = index.tz_localize(None)
+        return np.asarray(index.asi8, dtype=np.int64)
+
+    # Dates and OHLC changes of the candles of chronological data, first candle has no change
+    @staticmethod
+    def embed(data):
+        values = data[WindowIndex.fields].to_numpy(dtype=np.float64)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            changes = values[1:] / values[:-1] - 1     # Same as pct_change(fill_method=None)
+        present = ~np.isnan(changes).any(axis=1)
+        return WindowIndex.dates(data.index)[1:][present], changes[present].astype(np.float32)
+
+    # Add the bars of data after the last indexed bar of the stock, the stock is indexed again when data
+    # does not contain that bar. Returns whether anything changed.
+    def update(self, stockCode, data):
+        if data is None or len(data) < 2:
+            return False
+        dates = WindowIndex.dates(data.index)
+        stored = self.series.get(stockCode)
+        if stored is not None and len(stored[0]) > 0:
+            if stored[0][-1] == dates[-1]:
+                return False
+            position = dates.searchsorted(stored[0][-1])
+            if position < len(dates) and dates[position] == stored[0][-1]:
+                newDates, newChanges = WindowIndex.embed(data.iloc[position:])
+                self.series[stockCode] = (np.concatenate([stored[0], newDates]), np.concatenate([stored[1], newChanges]))
+                self.packed = None
+                return len(newDates) > 0
+        self.series[stockCode] = WindowIndex.embed(data)
+        self.packed = None
+        return True
+
+    # Embedding of the last candles of the stock, same as the one of addVector
+    def window(self, stockCode, candles):
+        changes = self.series[stockCode][1]
+        if len(changes) < candles:
+            raise ValueError(f'{stockCode} has only {len(changes)} indexed candles, {candles} asked')
+        return changes[-candles:].reshape(-1)
+
+    # All the stocks in contiguous arrays, stocks without any change are left out
+    def pack(self):
+        if self.packed is None:
+            ids = [stockCode for stockCode, (dates, changes) in self.series.items() if len(dates) > 0]
+            lengths = [len(self.series[stockCode][0]) for stockCode in ids]
+            offsets = np.concatenate([[0], np.cumsum(lengths, dtype=np.int64)]).astype(np.int64)
+            dates = np.concatenate([self.series[stockCode][0] for stockCode in ids]) if ids else np.empty(0, dtype=np.int64)
+            changes = np.concatenate([self.series[stockCode][1] for stockCode in ids]) if ids else np.empty((0, 4), dtype=np.float32)
+            self.packed = (ids, offsets, dates, np.ascontiguousarray(changes, dtype=np.float32))
+            self.series = {stockCode: (dates[offsets[i]:offsets[i+1]], self.packed[3][offsets[i]:offsets[i+1]]) for i, stockCode in enumerate(ids)}
+        return self.packed
+
+    # n_results nearest windows of every query embedding (one row of 4 * candles values per query), nearest first, as
+    # lists of (stockCode, date of the last candle, distance). With perStock only the nearest window of every stock is
+    # kept, otherwise overlapping windows of a stock would crowd the results. Stocks in exclude are left out.
+    def query(self, queryEmbeddings, n_results=10, exclude=(), perStock=True):
+        queries = np.atleast_2d(np.asarray(queryEmbeddings, dtype=np.float32))
+        candles = queries.shape[1] // 4
+        queries = queries.reshape(len(queries), candles, 4)
+        ids, offsets, dates, changes = self.pack()
+        bars = len(changes)
+        if candles == 0 or bars < candles:
+            return [[] for _ in queries]
+        starts = bars - candles + 1     # Windows starting at every bar, including the ones running into the next stock
+
+        # Distances of every window (column) from every query (row), the dot products are summed over the lags as
+        # (queries, 4) @ (4, starts) products. Columns are padded up to the last bar so that every stock has a segment.
+        distances = np.zeros((len(queries), bars), dtype=np.float32)
+        dots = distances[:, :starts]
+        for lag in range(candles):
+            dots += queries[:, lag, :] @ changes[lag:lag + starts].T
+        squares = np.concatenate([[0.0], np.cumsum(np.einsum('ij,ij->i', changes, changes), dtype=np.float64)])
+        windowSquares = (squares[candles:] - squares[:starts]).astype(np.float32)
+        querySquares = np.einsum('ijk,ijk->i', queries, queries)[:, None]
+        if self.metric == 'l2':
+            dots *= -2
+            dots += windowSquares
+            dots += querySquares
+            np.maximum(dots, 0, out=dots)
+        else:
+            dots /= np.maximum(np.sqrt(windowSquares * querySquares), 1e-12)
+            np.subtract(1, dots, out=dots)
+
+        # Windows must end in the stock they start in
+        stock = np.repeat(np.arange(len(ids)), np.diff(offsets))
+        invalid = np.arange(bars) + candles > offsets[stock + 1]
+        if exclude:
+            excluded = np.isin(np.array(ids, dtype=object), list(exclude))
+            invalid |= excluded[stock]
+        distances[:, invalid] = np.inf
+
+        # With perStock, stocks are ranked by their nearest window, which is looked up only for the stocks kept
+        scores = np.minimum.reduceat(distances, offsets[:-1], axis=1) if perStock else distances
+        results = []
+        for q in range(len(queries)):
+            n = min(n_results, int(np.isfinite(scores[q]).sum()))
+            if n == 0:
+                results.append([])
+                continue
+            nearest = np.argpartition(scores[q], n - 1)[:n] if n < scores.shape[1] else np.arange(n)
+            nearest = nearest[np.argsort(scores[q, nearest], kind='stable')]
+            if perStock:
+                nearest = [offsets[i] + int(np.argmin(distances[q, offsets[i]:offsets[i+1]])) for i in nearest]
+            results.append([(ids[stock[start]], pd.Timestamp(dates[start + candles - 1]), float(distances[q, start]))
+                            for start in nearest])
+        return results
+
+    # Write the packed arrays, replacing the files only once they are complete
+    def save(self, path=WINDOW_INDEX_PATH):
+        os.makedirs(path, exist_ok=True)
+        ids, offsets, dates, changes = self.pack()
+        for name, values in (('changes', changes), ('dates', dates), ('offsets', offsets), ('ids', np.array(ids, dtype=str))):
+            file = os.path.join(path, name + '.npy')
+            with open(file + '.tmp', 'wb') as handle:
+                np.save(handle, values)
+            os.replace(file + '.tmp', file)
+
+    # Index saved in path with memory mapped dates and changes, an empty index if nothing was saved there
+    @staticmethod
+    def load(path=WINDOW_INDEX_PATH, metric='l2'):
+        index = WindowIndex(metric)
+        try:
+            ids = np.load(os.path.join(path, 'ids.npy')).tolist()
+            offsets = np.load(os.path.join(path, 'offsets.npy'))
+            dates = np.load(os.path.join(path, 'dates.npy'), mmap_mode='r')
+            changes = np.load(os.path.join(path, 'changes.npy'), mmap_mode='r')
+        except (FileNotFoundError, ValueError):
+            return index
+        index.series = {stockCode: (dates[offsets[i]:offsets[i+1]], changes[offsets[i]:offsets[i+1]]) for i, stockCode in enumerate(ids)}
+        index.packed = (ids, offsets, dates, changes)
+        return index
@@ -15,7 +15,12 @@ import classes.Utility as Utility
 from classes.ColorText import colorText
 from classes.OtaUpdater import OTAUpdater
 from classes.CandlePatterns import CandlePatterns
-from classes.ParallelProcessing import StockConsumer
+from classes.ParallelProcessing import StockConsumerPool, ScreeningStalled
+from classes.SharedPanel import SharedPanel
+from classes.VectorScreener import VectorScreener
+from classes.ResultsCollector import ResultsCollector
+from classes.VectorStore import VectorStore
+from classes.WindowIndex import WindowIndex, WINDOW_INDEX_PATH
 from classes.Changelog import VERSION
 from classes.Utility import isDocker, isGui
 from alive_progress import alive_bar
@@ -27,6 +32,7 @@ from datetime import datetime, date
 from time import sleep
 from tabulate import tabulate
 import multiprocessing
+import threading
 multiprocessing.freeze_support()
 try:
     import chromadb
@@ -48,15 +54,13 @@ TEST_STKCODE = "SBIN"
 np.seterr(divide='ignore', invalid='ignore')
 
 # Global Variabls
-screenCounter = None
-screenResultsCounter = None
-stockDict = None
-keyboardInterruptEvent = None
-loadedStockData = False
-loadCount = 0
+consumerPool = None
+consumerPoolLock = threading.Lock()     # Screening sessions of concurrent callers (threads of the GUI) take turns on the pool
+stockCache = None
 maLength = None
 newlyListedOnly = False
 vectorSearch = False
+windowIndex = None      # Sliding windows of the history of every stock, loaded on the first similar stock search
 
 CHROMADB_PATH = "chromadb_store/"
 
@@ -71,13 +75,8 @@ try:
 except KeyError:
     proxyServer = ""
 
-# Clear chromadb store initially
-if CHROMA_AVAILABLE:
-    chroma_client = chromadb.PersistentClient(path=CHROMADB_PATH)
-    try:
-        chroma_client.delete_collection("nse_stocks")
-    except:
-        pass
+# Clear vector store initially
+VectorStore.clear(CHROMADB_PATH)
 
 
 # Manage Execution flow
@@ -169,16 +168,63 @@ def initExecution():
         return initExecution()
     return tickerOption, executeOption
 
+# Download stock data in batches of configured size before screening
+# Data is also written to the stockCache if available
+def prefetchStockData(listStockCodes, tickerOption, period, stockCache=None):
+    prefetched = {}
+    batchSize = configManager.batchSize
+    batches = [listStockCodes[i:i+batchSize] for i in range(0, len(listStockCodes), batchSize)]
+    if len(batches) == 0:
+        return prefetched
+    print(colorText.BOLD + colorText.GREEN +
+          f"[+] Downloading Stock Data in batches of {batchSize} stocks, Please Wait.." + colorText.END)
+    bar, spinner = Utility.tools.getProgressbarStyle()
+    with alive_bar(len(batches), bar=bar, spinner=spinner) as progressbar:
+        for batch in batches:
+            try:
+                stockData = fetcher.fetchStockDataBatch(batch, period, configManager.duration, proxyServer, tickerOption=tickerOption)
+            except Exception:
+                stockData = {}
+            if stockCache is not None:
+                for stock, data in stockData.items():
+                    stockCache.write(stock, data)
+            prefetched.update(stockData)
+            progressbar()
+    return prefetched
+
+# Update history of stocks cached in an earlier session by downloading only the bars after the last cached one
+# Returns {stock: data} of updated stocks, stocks which need to be downloaded in full are left out
+def updateStockData(listStockCodes, tickerOption, stockCache, previousCache):
+    updated = {}
+    cached = {}     # {last cached bar: {stock: data}}
+    for stock in listStockCodes:
+        data = previousCache.read(stock)
+        if data is not None and len(data) > 0:
+            cached.setdefault(data.index[-1], {})[stock] = data
+    batchSize = configManager.batchSize
+    batches = [(lastBar, list(stocks)[i:i+batchSize]) for lastBar, stocks in cached.items() for i in range(0, len(stocks), batchSize)]
+    if len(batches) == 0:
+        return updated
+    print(colorText.BOLD + colorText.GREEN +
+          f"[+] Updating Stock Data cached on {previousCache.path[-6:]} with the latest bars, Please Wait.." + colorText.END)
+    bar, spinner = Utility.tools.getProgressbarStyle()
+    with alive_bar(len(batches), bar=bar, spinner=spinner) as progressbar:
+        for lastBar, batch in batches:
+            try:
+                stockData = fetcher.fetchStockDataBatch(batch, None, configManager.duration, proxyServer, tickerOption=tickerOption, start=lastBar.strftime('%Y-%m-%d'))
+            except Exception:
+                stockData = {}
+            for stock, delta in stockData.items():
+                data = Fetcher.tools.mergeStockData(cached[lastBar][stock], delta, configManager.getPeriodNumeric())
+                if data is not None:
+                    stockCache.write(stock, data)
+                    updated[stock] = data
+            progressbar()
+    return updated
+
 # Main function
 def main(testing=False, testBuild=False, downloadOnly=False, execute_inputs:list = [], isDevVersion=None, backtestDate=date.today()):
-    global screenCounter, screenResultsCounter, stockDict, loadedStockData, keyboardInterruptEvent, loadCount, maLength, newlyListedOnly, vectorSearch
-    screenCounter = multiprocessing.Value('i', 1)
-    screenResultsCounter = multiprocessing.Value('i', 0)
-    keyboardInterruptEvent = multiprocessing.Manager().Event()
-
-    if stockDict is None or Utility.tools.isBacktesting(backtestDate=backtestDate):
-        stockDict = multiprocessing.Manager().dict()
-        loadCount = 0
+    global consumerPool, stockCache, maLength, newlyListedOnly, vectorSearch, windowIndex
 
     minRSI = 0
     maxRSI = 100
@@ -187,12 +233,7 @@ def main(testing=False, testBuild=False, downloadOnly=False, execute_inputs:list
     daysForLowestVolume = 30
     reversalOption = None
 
-    screenResults = pd.DataFrame(columns=[
-                                 'Stock', 'Consolidating', 'Breaking-Out', 'LTP', 'Volume', 'MA-Signal', 'RSI', 'Trend', 'Pattern'])
-    saveResults = pd.DataFrame(columns=[
-                               'Stock', 'Consolidating', 'Breaking-Out', 'LTP', 'Volume', 'MA-Signal', 'RSI', 'Trend', 'Pattern'])
 
-    
     if testBuild:
         tickerOption, executeOption = 1, 0
     elif downloadOnly:
@@ -303,15 +344,6 @@ def main(testing=False, testBuild=False, downloadOnly=False, execute_inputs:list
                     sys.exit(0)
             elif tickerOption == 'N':
                 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3' 
-                import tensorflow as tf
-                physical_devices = tf.config.list_physical_devices('GPU')
-                try:
-                    tf.config.set_visible_devices([], 'GPU')
-                    visible_devices = tf.config.get_visible_devices()
-                    for device in visible_devices:
-                        assert device.device_type != 'GPU'
-                except:
-                    pass
                 prediction = screener.getNiftyPrediction(
                     data=fetcher.fetchLatestNiftyDaily(proxyServer=proxyServer), 
                     proxyServer=proxyServer
@@ -350,17 +382,14 @@ def main(testing=False, testBuild=False, downloadOnly=False, execute_inputs:list
                         input('\nPress any key to Continue...\n')
                     return
             elif tickerOption == 'S':
-                if not CHROMA_AVAILABLE:
-                    print(colorText.BOLD + colorText.FAIL +
-                  "\n\n[+] ChromaDB not available in your environment! You can't use this feature!\n" + colorText.END)
+                # Without ChromaDB the search runs on the in-process VectorIndex
+                if execute_inputs != []:
+                    stockCode, candles = execute_inputs[2], execute_inputs[3]
                 else:
-                    if execute_inputs != []:
-                        stockCode, candles = execute_inputs[2], execute_inputs[3]
-                    else:
-                        stockCode, candles = Utility.tools.promptSimilarStockSearch()
-                    vectorSearch = [stockCode, candles, True]
-                    tickerOption, executeOption = 12, 1
-                    listStockCodes = fetcher.fetchStockCodes(tickerOption, proxyServer=proxyServer)
+                    stockCode, candles = Utility.tools.promptSimilarStockSearch()
+                vectorSearch = [stockCode, candles, True]
+                tickerOption, executeOption = 12, 1
+                listStockCodes = fetcher.fetchStockCodes(tickerOption, proxyServer=proxyServer)
             else:
                 if tickerOption == 14:    # Override config for F&O Stocks
                     configManager.stageTwo = False
@@ -375,94 +404,140 @@ def main(testing=False, testBuild=False, downloadOnly=False, execute_inputs:list
                 input('')
             sys.exit(0)
 
-        if not Utility.tools.isTradingTime() and configManager.cacheEnabled and not loadedStockData and not testing and not Utility.tools.isBacktesting(backtestDate=backtestDate):
-            Utility.tools.loadStockData(stockDict, configManager, proxyServer)
-            loadedStockData = True
-        loadCount = len(stockDict)
+        # Stock data is cached on disk only after market hours
+        useCache = configManager.cacheEnabled and not Utility.tools.isTradingTime() and not testing and not Utility.tools.isBacktesting(backtestDate=backtestDate)
+        if useCache and stockCache is None:
+            stockCache = Utility.tools.loadStockData(configManager, proxyServer)
+
+        period = configManager.period
+        if newlyListedOnly and configManager.getPeriodNumeric() > 250:
+            period = '250d'
+
+        # Batch download whatever is not cached yet, consumers fall back to single fetch for failed ones
+        stockData = {}
+        if configManager.batchSize > 1 and not testing and not Utility.tools.isBacktesting(backtestDate=backtestDate):
+            if useCache:
+                pendingStocks = listStockCodes if downloadOnly else [stock for stock in listStockCodes if not stockCache.has(stock)]
+                # Stocks cached in an earlier session only need the bars after the last cached one
+                previousCache = Utility.tools.getPreviousStockCache(stockCache)
+                if previousCache is not None and not newlyListedOnly:
+                    stockData = updateStockData(pendingStocks, tickerOption, stockCache, previousCache)
+                    pendingStocks = [stock for stock in pendingStocks if stock not in stockData]
+                stockData.update(prefetchStockData(pendingStocks, tickerOption, period, stockCache=stockCache))
+            else:
+                stockData = prefetchStockData(listStockCodes, tickerOption, period)
+
+        # Share prefetched and cached data with consumers through a single shared memory panel
+        stockPanel = None
+        if downloadOnly:
+            listStockCodes = [stock for stock in listStockCodes if stock not in stockData]
+        else:
+            if useCache:
+                stockData.update({stock: stockCache.read(stock) for stock in listStockCodes if stock not in stockData and stockCache.has(stock)})
+            stockPanel = SharedPanel.create(stockData)
+        del stockData
+
+        # Only the bars added since the last similar stock search are indexed
+        if stockPanel is not None and type(vectorSearch) == list and vectorSearch[2]:
+            if windowIndex is None:
+                windowIndex = WindowIndex.load(WINDOW_INDEX_PATH)
+            if sum(windowIndex.update(stock, stockPanel.read(stock)) for stock in listStockCodes if stockPanel.has(stock)):
+                windowIndex.save(WINDOW_INDEX_PATH)
+
+        # Evaluate common validators for all stocks in the panel at once, consumers reuse the outputs
+        crossSection = None
+        if stockPanel is not None:
+            crossSection = VectorScreener(configManager).validate(stockPanel, listStockCodes, minRSI, maxRSI,
+                                                                  lorentzian=(executeOption == 6 and reversalOption in (1, 2, 7)))
 
         print(colorText.BOLD + colorText.WARN +
               "[+] Starting Stock Screening.. Press Ctrl+C to stop!\n")
 
-        items = [(tickerOption, executeOption, reversalOption, maLength, daysForLowestVolume, minRSI, maxRSI, respChartPattern, insideBarToLookback, len(listStockCodes),
-                  configManager, fetcher, screener, candlePatterns, stock, newlyListedOnly, downloadOnly, vectorSearch, isDevVersion, backtestDate)
-                 for stock in listStockCodes]
+        # Arguments common to all the stocks are sent to every consumer once, only stock names are queued
+        context = dict(tickerOption=tickerOption, executeOption=executeOption, reversalOption=reversalOption, maLength=maLength, daysForLowestVolume=daysForLowestVolume,
+                       minRSI=minRSI, maxRSI=maxRSI, respChartPattern=respChartPattern, insideBarToLookback=insideBarToLookback, totalSymbols=len(listStockCodes),
+                       configManager=configManager, fetcher=fetcher, screener=screener, candlePatterns=candlePatterns, newlyListedOnly=newlyListedOnly,
+                       downloadOnly=downloadOnly, vectorSearch=vectorSearch, isDevVersion=isDevVersion, backtestDate=backtestDate)
 
-        tasks_queue = multiprocessing.JoinableQueue()
-        results_queue = multiprocessing.Queue()
+        resultsCollector = ResultsCollector(sinkFile=configManager.resultsSink)
 
         totalConsumers = multiprocessing.cpu_count()
         if totalConsumers == 1:
             totalConsumers = 2      # This is required for single core machine
         if configManager.cacheEnabled is True and multiprocessing.cpu_count() > 2:
             totalConsumers -= 1
-        consumers = [StockConsumer(tasks_queue, results_queue, screenCounter, screenResultsCounter, stockDict, proxyServer, keyboardInterruptEvent)
-                     for _ in range(totalConsumers)]
-
-        for worker in consumers:
-            worker.daemon = True
-            worker.start()
-
-        if testing or testBuild:
-            for item in items:
-                tasks_queue.put(item)
-                result = results_queue.get()
-                if result is not None:
-                    screenResults = pd.concat([screenResults, pd.DataFrame([result[0]])], ignore_index=True)
-                    saveResults = pd.concat([saveResults, pd.DataFrame([result[1]])], ignore_index=True)
-                    if testing or (testBuild and len(screenResults) > 2):
-                        break
-        else:
-            for item in items:
-                tasks_queue.put(item)
-            # Append exit signal for each process indicated by None
-            for _ in range(multiprocessing.cpu_count()):
-                tasks_queue.put(None)
-            try:
-                numStocks, totalStocks = len(listStockCodes), len(listStockCodes)
-                os.environ['SCREENIPY_TOTAL_STOCKS'] = str(totalStocks)
-                print(colorText.END+colorText.BOLD)
-                bar, spinner = Utility.tools.getProgressbarStyle()
-                with alive_bar(numStocks, bar=bar, spinner=spinner) as progressbar:
-                    while numStocks:
-                        result = results_queue.get()
-                        if result is not None:
-                            screenResults = pd.concat([screenResults, pd.DataFrame([result[0]])], ignore_index=True)
-                            saveResults = pd.concat([saveResults, pd.DataFrame([result[1]])], ignore_index=True)
-                        numStocks -= 1
-                        os.environ['SCREENIPY_SCREEN_COUNTER'] = str(int((totalStocks-numStocks)/totalStocks*100))
-                        progressbar.text(colorText.BOLD + colorText.GREEN +
-                                         f'Found {screenResultsCounter.value} Stocks' + colorText.END)
-                        progressbar()
-            except KeyboardInterrupt:
+        with consumerPoolLock:
+            # Consumers are kept alive between screening sessions, they are spawned again only if the pool is unusable
+            if consumerPool is None or not consumerPool.isUsable(totalConsumers, proxyServer):
+                if consumerPool is not None:
+                    consumerPool.terminate()
+                consumerPool = StockConsumerPool(totalConsumers, proxyServer)
+            consumerPool.startSession(context, stockPanel=stockPanel, stockCache=stockCache if useCache else None, crossSection=crossSection)
+
+            if testing or testBuild:
+                for stock in listStockCodes:
+                    consumerPool.put([stock])
+                    result = consumerPool.get()[0]
+                    if result is not None:
+                        resultsCollector.add(result[0], result[1])
+                        if testing or (testBuild and len(resultsCollector) > 2):
+                            break
+            else:
+                # Stocks with no data in the panel or cache are downloaded by the fetch stage while consumers are screening
+                fetchStocks = []
+                if configManager.fetchThreads > 0:
+                    fetchStocks = [stock for stock in listStockCodes if not (stockPanel is not None and stockPanel.has(stock)) and
+                                   (downloadOnly or not (useCache and stockCache.has(stock)))]
+                def fetchStock(stock):
+                    try:
+                        return fetcher.fetchStockData(stock, period, configManager.duration, proxyServer, consumerPool.screenResultsCounter, consumerPool.screenCounter,
+                                                      len(listStockCodes), backtestDate=backtestDate, tickerOption=tickerOption)
+                    except Exception:
+                        return None
+                pendingStocks = set(fetchStocks)
+                consumerPool.dispatch([stock for stock in listStockCodes if stock not in pendingStocks], chunkSize=configManager.chunkSize,
+                                      fetchStocks=fetchStocks, fetchStock=fetchStock, fetchThreads=configManager.fetchThreads)
                 try:
-                    keyboardInterruptEvent.set()
+                    numStocks, totalStocks = len(listStockCodes), len(listStockCodes)
+                    os.environ['SCREENIPY_TOTAL_STOCKS'] = str(totalStocks)
+                    print(colorText.END+colorText.BOLD)
+                    bar, spinner = Utility.tools.getProgressbarStyle()
+                    with alive_bar(numStocks, bar=bar, spinner=spinner) as progressbar:
+                        while numStocks > 0:
+                            results = consumerPool.get()
+                            for result in results:
+                                if result is not None:
+                                    resultsCollector.add(result[0], result[1])
+                                numStocks -= 1
+                                progressbar()
+                            os.environ['SCREENIPY_SCREEN_COUNTER'] = str(int((totalStocks-numStocks)/totalStocks*100))
+                            progressbar.text(colorText.BOLD + colorText.GREEN +
+                                             f'Found {consumerPool.screenResultsCounter.value} Stocks' + colorText.END)
                 except KeyboardInterrupt:
-                    pass
-                print(colorText.BOLD + colorText.FAIL +
-                      "\n[+] Terminating Script, Please wait..." + colorText.END)
-                for worker in consumers:
-                    worker.terminate()
+                    print(colorText.BOLD + colorText.FAIL +
+                          "\n[+] Terminating Script, Please wait..." + colorText.END)
+                    # Consumers were interrupted as well, a new pool is spawned in the next screening session
+                    consumerPool.terminate()
+                    consumerPool = None
+                except ScreeningStalled as e:
+                    print(colorText.BOLD + colorText.FAIL +
+                          f"\n[+] Screening stopped: {e}, showing the stocks found so far." + colorText.END)
+                    # Results of the lost chunks would never come, a new pool is spawned in the next screening session
+                    consumerPool.terminate()
+                    consumerPool = None
+                    os.environ['SCREENIPY_SCREEN_COUNTER'] = '100'
 
-        print(colorText.END)
-        # Exit all processes. Without this, it threw error in next screening session
-        for worker in consumers:
-            try:
-                worker.terminate()
-            except OSError as e:
-                if e.winerror == 5:
-                    pass
-
-        # Flush the queue so depending processes will end
-        from queue import Empty
-        while True:
-            try:
-                _ = tasks_queue.get(False)
-            except Exception as e:
-                break
+            print(colorText.END)
+            # Drop tasks left over in test modes, consumers stay alive for the next screening session
+            if consumerPool is not None:
+                consumerPool.flush()
+        if stockPanel is not None:
+            stockPanel.close(unlink=True)
 
-        if CHROMA_AVAILABLE and type(vectorSearch) == list and vectorSearch[2]:
-            chroma_client = chromadb.PersistentClient(path=CHROMADB_PATH)
-            collection = chroma_client.get_collection(name="nse_stocks")
+        screenResults, saveResults = resultsCollector.getResults()
+
+        if type(vectorSearch) == list and vectorSearch[2]:
+            collection = VectorStore.open(CHROMADB_PATH)
             query_embeddings= collection.get(ids = [stockCode], include=["embeddings"])["embeddings"]
             results = collection.query(
                 query_embeddings=query_embeddings,
@@ -477,6 +552,13 @@ def main(testing=False, testBuild=False, downloadOnly=False, execute_inputs:list
                 matchedScreenResults = pd.concat([matchedScreenResults, screenResults[screenResults['Stock'].str.contains(stk)]], ignore_index=True)
                 matchedSaveResults = pd.concat([matchedSaveResults, saveResults[saveResults['Stock'].str.contains(stk)]], ignore_index=True)
             screenResults, saveResults = matchedScreenResults, matchedSaveResults
+
+            # Windows of the history of the other stocks nearest to the latest candles of the stock
+            if windowIndex is not None and windowIndex.has(stockCode) and len(windowIndex.series[stockCode][1]) >= vectorSearch[1]:
+                analogues = windowIndex.query(windowIndex.window(stockCode, vectorSearch[1]), n_results=5, exclude=[stockCode])[0]
+                print(colorText.BOLD + colorText.GREEN +
+                      f"[+] Historical analogues of the last {vectorSearch[1]} candles of {stockCode}:" + colorText.END)
+                print(tabulate(pd.DataFrame(analogues, columns=['Stock', 'Window End', 'Distance']), headers='keys', tablefmt='psql', showindex=False))
             
         screenResults.sort_values(by=['Stock'], ascending=True, inplace=True)
         saveResults.sort_values(by=['Stock'], ascending=True, inplace=True)
@@ -501,11 +583,11 @@ def main(testing=False, testBuild=False, downloadOnly=False, execute_inputs:list
 
         print(colorText.BOLD + colorText.GREEN +
                   f"[+] Found {len(screenResults)} Stocks." + colorText.END)
-        if configManager.cacheEnabled and not Utility.tools.isTradingTime() and not testing and not Utility.tools.isBacktesting(backtestDate=backtestDate):
+        if useCache:
             print(colorText.BOLD + colorText.GREEN +
                   "[+] Caching Stock Data for future use, Please Wait... " + colorText.END, end='')
             Utility.tools.saveStockData(
-                stockDict, configManager, loadCount)
+                stockCache, configManager, exportPickle=downloadOnly)
 
         Utility.tools.setLastScreenedResults(screenResults)
         Utility.tools.setLastScreenedResults(saveResults, unformatted=True)
@@ -0,0 +1,75 @@
+'''
+ *  Project             :   Screenipy
+ *  Author              :   Pranjal Joshi
+ *  Created             :   17/10/2026
+ *  Description         :   Benchmark of per stock allocations of the Screener validators (Run: python screener_benchmark.py)
+'''
+
+import sys
+import os
+import timeit
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath('../src'))
+import classes.ConfigManager as ConfigManager
+import classes.Screener as Screener
+
+STOCKS = 200
+
+configManager = ConfigManager.tools()
+configManager.getConfig(ConfigManager.parser)
+screener = Screener.tools(configManager)
+
+# Copies made by every validator before the sanitized view was built once in preprocessData
+def legacySanitize(fullData, processedData):
+    for data in [fullData] + [processedData] * 7:
+        data = data.fillna(0)
+        data = data.replace([np.inf, -np.inf], 0)
+    for column in ['Close', 'Close', 'High', 'Close', 'Volume']:
+        processedData.describe()[column]['max']
+
+def screen(fullData, processedData):
+    screenDict, saveDict = {}, {}
+    screener.validateLTP(fullData, screenDict, saveDict)
+    screener.validateConsolidation(processedData, screenDict, saveDict, percentage=configManager.consolidationPercentage)
+    screener.validateMovingAverages(processedData, screenDict, saveDict, maRange=1.25)
+    screener.validateVolume(processedData, screenDict, saveDict, volumeRatio=configManager.volumeRatio)
+    screener.findBreakout(processedData, screenDict, saveDict, daysToLookback=configManager.daysToLookback)
+    screener.validateLowestVolume(processedData, 30)
+    screener.validateRSI(processedData, screenDict, saveDict, 0, 100)
+    screener.findTrend(processedData, screenDict, saveDict, daysToLookback=configManager.daysToLookback)
+
+def benchmark(name, function):
+    tracemalloc.start()
+    start = tracemalloc.take_snapshot()
+    seconds = timeit.timeit(function, number=1)
+    statistics = tracemalloc.take_snapshot().compare_to(start, 'filename')
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    blocks = sum(max(stat.count_diff, 0) for stat in statistics)
+    print(f'{name:<40}{seconds / STOCKS * 1e3:>8.2f} ms/stock{peak / 1024:>10.0f} KiB peak{blocks / STOCKS:>10.1f} blocks/stock')
+
+if __name__ == '__main__':
+    rng = np.random.default_rng(1)
+    stocks = []
+    for _ in range(STOCKS):
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, 300)))
+        data = pd.DataFrame({'Open': close * 0.99, 'High': close * 1.01, 'Low': close * 0.98, 'Close': close,
+                             'Volume': rng.integers(1000, 5000, 300).astype(float)},
+                            index=pd.date_range('2023-01-02', periods=300, freq='B'))
+        stocks.append(data)
+
+    def validators():
+        for data in stocks:
+            screen(*screener.preprocessData(data.copy()))
+
+    def legacy():
+        for data in stocks:
+            fullData, processedData = screener.preprocessData(data.copy())
+            legacySanitize(fullData, processedData)
+            screen(fullData, processedData)
+
+    benchmark('Validators (sanitized once)', validators)
+    benchmark('Validators + legacy frame copies', legacy)
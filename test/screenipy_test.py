@@ -162,6 +162,509 @@ def test_option_14(mocker):
         pass
 
 
+def test_screener_ta_backend():
+    from classes.ScreenipyTA import ScreenerTA
+    close = pd.Series(np.linspace(100, 130, 60))
+    ema = np.asarray(ScreenerTA.EMA(close, timeperiod=10), dtype=np.float64)
+    np.testing.assert_allclose(ema, np.asarray(ScreenerTA.EMA(close.to_numpy(), timeperiod=10), dtype=np.float64))
+    assert len(ema) == 60 and not np.isnan(ema[-1])
+    assert ScreenerTA.CDLDOJI(close, close + 1, close - 1, close) != 0
+
+
+@pytest.mark.parametrize('library, backend', [('talib', 'TalibBackend'), ('pandas_ta', 'PandasTaBackend')])
+def test_screener_ta_ma(monkeypatch, library, backend):
+    import classes.ScreenipyTA as ScreenipyTA
+    monkeypatch.setattr(ScreenipyTA, 'talib', pytest.importorskip(library))
+    close = pd.Series(np.linspace(100, 130, 60) + np.sin(np.arange(60)))
+    ma = np.asarray(getattr(ScreenipyTA, backend).MA(close, timeperiod=10), dtype=np.float64)
+    np.testing.assert_allclose(ma[9:], close.rolling(10).mean().to_numpy()[9:])
+
+
+def test_candle_patterns():
+    # Bearish candle engulfed by a bullish one, and a doji after 10 candles of the same range
+    pad = [np.nan] * 9
+    values = CandlePatterns.evaluatePatterns(open=[pad + [10.0, 8.5], [10.0] * 11], high=[pad + [10.5, 10.5], [11.0] * 11],
+                                             low=[pad + [8.5, 8.0], [9.0] * 11], close=[pad + [9.0, 10.2], [10.5] * 10 + [10.0]])
+    assert list(values['CDLENGULFING']) == [100, 0] and list(values['CDLDOJI']) == [0, 100]
+    data = pd.DataFrame({'Open': [10.0] * 10 + [10.0], 'High': [11.0] * 10 + [10.05], 'Low': [9.0] * 10 + [8.0],
+                         'Close': [10.5] * 10 + [10.0]})[::-1]
+    screenDict, saveDict = {}, {}
+    assert candlePatterns.findPattern(data, screenDict, saveDict)
+    assert saveDict['Pattern'] == 'Dragonfly Doji' and saveDict['Pattern'] in CandlePatterns.reversalPatternsBullish
+
+
+def test_fetch_stock_data_batch(mocker):
+    index = pd.date_range('2024-01-01', periods=5, freq='D')
+    stub = {}
+    for ticker in ['SBIN.NS', 'INFY.NS']:
+        stub[ticker] = pd.DataFrame({
+            'Open': np.arange(5.0), 'High': np.arange(5.0) + 2, 'Low': np.arange(5.0) - 1,
+            'Close': np.arange(5.0) + 1, 'Adj Close': np.arange(5.0) + 1, 'Volume': np.full(5, 1000.0)
+        }, index=index)
+    stub['INFY.NS'].iloc[0] = np.nan     # Not traded on first day
+    download = mocker.patch('classes.Fetcher.yf.download', return_value=pd.concat(stub, axis=1))
+    data = fetcher.fetchStockDataBatch(['SBIN', 'INFY', 'TCS'], '5d', '1d', None)
+    assert download.call_count == 1
+    assert sorted(data.keys()) == ['INFY', 'SBIN']
+    assert list(data['SBIN'].columns) == ['Open', 'High', 'Low', 'Close', 'Adj Close', 'Volume']
+    assert len(data['SBIN']) == 5 and len(data['INFY']) == 4
+
+
+def test_merge_stock_data():
+    index = pd.date_range('2024-01-01', periods=8, freq='D')
+    data = pd.DataFrame({'Open': np.arange(8.0), 'High': np.arange(8.0) + 2, 'Low': np.arange(8.0) - 1,
+                         'Close': np.arange(8.0) + 1, 'Adj Close': np.arange(8.0) + 1, 'Volume': np.full(8, 1000.0)}, index=index)
+    merged = Fetcher.tools.mergeStockData(data.iloc[:5], data.iloc[4:], periodDays=5)
+    pd.testing.assert_frame_equal(merged, data.iloc[2:], check_freq=False)
+    adjusted = data.iloc[4:].copy()
+    adjusted[['Open', 'High', 'Low', 'Close', 'Adj Close']] /= 2    # Split after the last cached bar
+    assert Fetcher.tools.mergeStockData(data.iloc[:5], adjusted, periodDays=300) is None
+    assert Fetcher.tools.mergeStockData(data.iloc[:4], data.iloc[5:], periodDays=300) is None
+
+
+def test_stock_cache(tmp_path):
+    from classes.StockCache import StockCache
+    index = pd.date_range('2024-01-01', periods=5, freq='D', tz='Asia/Kolkata')
+    data = pd.DataFrame({'Open': np.arange(5.0), 'Close': np.arange(5.0) + 1, 'Volume': np.arange(5) * 100}, index=index)
+    legacy = str(tmp_path / 'stock_data_010124.pkl')
+    pd.to_pickle({'M&M': data.to_dict('split')}, legacy)
+    stockCache = StockCache(str(tmp_path / 'stock_data_010124'))
+    assert stockCache.read('M&M') is None
+    assert stockCache.importPickle(legacy) == 1
+    stockCache.write('SBIN', data)
+    assert sorted(stockCache.symbols()) == ['M&M', 'SBIN']
+    for stock in stockCache.symbols():
+        pd.testing.assert_frame_equal(stockCache.read(stock), data, check_freq=False)
+
+
+def test_shared_panel():
+    from classes.SharedPanel import SharedPanel
+    index = pd.date_range('2024-01-01', periods=5, freq='D', tz='Asia/Kolkata')
+    data = pd.DataFrame({'Open': np.arange(5.0), 'High': np.arange(5.0) + 2, 'Low': np.arange(5.0) - 1,
+                         'Close': np.arange(5.0) + 1, 'Adj Close': np.arange(5.0) + 1, 'Volume': np.full(5, 1000.0)}, index=index)
+    stockPanel = SharedPanel.create({'SBIN': data, 'INFY': data.iloc[2:][['Open', 'Close']], 'TCS': data.iloc[:0]})
+    try:
+        assert len(stockPanel) == 2 and not stockPanel.has('TCS')
+        pd.testing.assert_frame_equal(stockPanel.read('SBIN'), data, check_freq=False)
+        pd.testing.assert_frame_equal(stockPanel.read('INFY'), data.iloc[2:][['Open', 'Close']], check_freq=False)
+        with pytest.raises(ValueError):
+            stockPanel.read('SBIN')['Close'].to_numpy()[0] = 0
+    finally:
+        stockPanel.close(unlink=True)
+
+
+def test_vector_screener():
+    from classes.SharedPanel import SharedPanel
+    from classes.VectorScreener import VectorScreener
+    rng = np.random.default_rng(1)
+    stockData = {}
+    for stock, length in [('SBIN', 300), ('INFY', 60), ('TCS', 2)]:
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, length)))
+        stockData[stock] = pd.DataFrame({'Open': close * 0.99, 'High': close * 1.01, 'Low': close * 0.98, 'Close': close,
+                                         'Adj Close': close, 'Volume': rng.integers(1000, 5000, length).astype(float)},
+                                        index=pd.date_range('2023-01-02', periods=length, freq='B'))
+    stockPanel = SharedPanel.create(stockData)
+    try:
+        crossSection = VectorScreener(configManager).validate(stockPanel, list(stockData), 30, 70)
+        for stock in stockData:
+            fullData, processedData = screener.preprocessData(stockPanel.read(stock), daysToLookback=configManager.daysToLookback)
+            screenDict, saveDict = {}, {}
+            results = (screener.validateConsolidation(processedData, screenDict, saveDict, percentage=configManager.consolidationPercentage),
+                       screener.validateMovingAverages(processedData, screenDict, saveDict, maRange=1.25),
+                       screener.validateVolume(processedData, screenDict, saveDict, volumeRatio=configManager.volumeRatio),
+                       screener.findBreakout(processedData, screenDict, saveDict, daysToLookback=configManager.daysToLookback),
+                       screener.validateLTP(fullData, screenDict, saveDict, minLTP=configManager.minLTP, maxLTP=configManager.maxLTP),
+                       screener.validateRSI(processedData, screenDict, saveDict, 30, 70),
+                       screener.findTrend(processedData, screenDict, saveDict, daysToLookback=configManager.daysToLookback), None)
+            assert crossSection[stock] == (screenDict, saveDict, results)
+    finally:
+        stockPanel.close(unlink=True)
+
+
+def test_stock_indicators():
+    from classes.Indicators import StockIndicators
+    close = 100 + np.sin(np.arange(300) / 10)
+    data = pd.DataFrame({'Open': close, 'High': close + 1, 'Low': close - 1, 'Close': close, 'Volume': np.full(300, 1000.0)},
+                        index=pd.date_range('2023-01-02', periods=300, freq='B'))
+    fullData, processedData = screener.preprocessData(data.copy(), daysToLookback=configManager.daysToLookback)
+    indicators = screener.getIndicators(fullData)
+    assert indicators is screener.indicators
+    np.testing.assert_allclose(StockIndicators.recent(indicators.RSI(14)), fullData['RSI'].to_numpy())
+    np.testing.assert_array_equal(indicators.recentBars('Close', 3), fullData['Close'].to_numpy()[:3])
+    np.testing.assert_array_equal(indicators.lastBars('Close', 3), data['Close'].to_numpy()[-3:])
+    sanitized = screener.getSanitized(processedData)
+    assert len(sanitized) == len(processedData) and not sanitized['Close'].flags.writeable
+    # Views of views stay within the bars of the view they were taken from
+    assert len(sanitized.head(5).head(10)) == 5 and len(sanitized.head(10).head(5)) == 5
+    assert len(sanitized.head(len(processedData) + 10)) == len(processedData) < len(fullData)
+    np.testing.assert_array_equal(sanitized.head(5).head(10)['Close'], sanitized['Close'][:5])
+    calls = []
+    for _ in range(2):
+        indicators.get('double', (2,), lambda: calls.append(1) or indicators.column('Close') * 2)
+    assert len(calls) == 1
+    # Indicators of data not preprocessed last are built from it
+    other = screener.getIndicators(fullData.copy())
+    assert other is not indicators
+    np.testing.assert_allclose(other.MA(9, column='RSI'), indicators.MA(9, column='RSI'))
+    screenDict, saveDict = {}, {}
+    screener.findRSICrossingMA(fullData, screenDict, saveDict)
+
+
+def test_streaming_indicators():
+    from classes.StreamingIndicators import StockStream
+    rng = np.random.default_rng(1)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, 300)))
+    data = pd.DataFrame({'Open': close, 'High': close * 1.01, 'Low': close * 0.99, 'Close': close,
+                         'Volume': rng.integers(1000, 5000, 300).astype(float)},
+                        index=pd.date_range('2023-01-02', periods=300, freq='B'))
+    gapped = data.copy()
+    gapped.iloc[100, gapped.columns.get_loc('Close')] = np.nan
+    configuredEMA = configManager.useEMA
+    for useEMA in [False, True]:
+        configManager.useEMA = useEMA
+        try:
+            # Seeded from the vectorized indicators on the first scan (and with a missing close, bar by bar), then updated
+            for history in [data, gapped]:
+                stream = StockStream(useEMA)
+                for length in [250, 250, 251, 300]:
+                    live = history.iloc[:length].copy()
+                    live.iloc[-1, live.columns.get_loc('Close')] *= 1.01      # Bar still forming
+                    fullData, _ = screener.preprocessData(live.copy(), daysToLookback=configManager.daysToLookback)
+                    streamedData, _ = screener.preprocessData(live.copy(), daysToLookback=configManager.daysToLookback, stream=stream)
+                    for column in ['SMA', 'LMA', 'VolMA', 'RSI']:
+                        np.testing.assert_allclose(streamedData[column].to_numpy(), fullData[column].to_numpy(), rtol=1e-9)
+        finally:
+            configManager.useEMA = configuredEMA
+
+
+def test_trend_kernels():
+    from scipy.signal import argrelextrema
+    from classes.TrendKernels import TrendKernels
+    rng = np.random.default_rng(1)
+    close = np.round(rng.normal(100, 5, (4, 30)))
+    for order in [1, 3]:
+        for comparator in [np.greater_equal, np.less_equal]:
+            mask = TrendKernels.localExtrema(close, comparator, order=order)
+            for i in range(len(close)):
+                np.testing.assert_array_equal(np.flatnonzero(mask[i]), argrelextrema(close[i], comparator, order=order)[0])
+    tops = TrendKernels.localExtrema(close)
+    slopes, intercepts = TrendKernels.fitLine(close, tops)
+    for i in range(len(close)):
+        np.testing.assert_allclose((slopes[i], intercepts[i]), np.polyfit(np.flatnonzero(tops[i]), close[i][tops[i]], 1))
+    # Rising closes have a single top on the last bar
+    assert TrendKernels.trendName(TrendKernels.trendAngle(np.linspace(100, 130, 30)))[()] == 'Strong Up'
+    # Once refits run out only bars below the last line are kept, at most points of them
+    x = np.arange(1, 201, dtype=np.float64)
+    low = 100 + 0.5 * x
+    dips = np.arange(5, 200, 20)
+    low[dips] -= 10
+    np.testing.assert_array_equal(TrendKernels.supportBars(low, x, refits=0), dips)
+    low = 100 + 0.5 * x + rng.normal(0, 1, 200)
+    slope, intercept = np.polyfit(x, low, 1)
+    residual = low - (slope * x + intercept)
+    below = TrendKernels.supportBars(low, x, refits=0)
+    assert len(below) == 30 and np.all(residual[below] < 0) and residual[below].max() <= np.sort(residual)[29]
+
+
+def test_lorentzian():
+    from classes.Lorentzian import Lorentzian
+    from classes.Indicators import StockIndicators
+    rng = np.random.default_rng(2)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (6, 250)), axis=1))
+    open, high, low = close * 0.995, close * 1.01, close * 0.985
+    features = np.array([Lorentzian.featureSeries(high[i], low[i], close[i]) for i in range(len(close))])
+    labels = Lorentzian.labels(close)
+    predictions = [Lorentzian.predictions(features[i], labels[i]) for i in range(len(close))]
+    np.testing.assert_array_equal(Lorentzian.batchPredictions(features, labels), predictions)
+    signals = [Lorentzian.signal(StockIndicators(pd.DataFrame({'Open': open[i], 'High': high[i], 'Low': low[i], 'Close': close[i]})))
+               for i in range(len(close))]
+    assert Lorentzian.batchSignals(open, high, low, close) == signals
+    # Not enough bars for the ADX feature
+    assert Lorentzian.batchSignals(open[:, :30], high[:, :30], low[:, :30], close[:, :30]) == [(False, False)] * len(close)
+    # New signal only on the bar the filtered prediction changes direction
+    assert Lorentzian.latestSignal(np.array([0, 2, -4, 6]), np.array([True, True, False, True])) == (False, False)
+    assert Lorentzian.latestSignal(np.array([0, -2, 4, 6]), np.array([True, True, False, True])) == (True, False)
+    assert Lorentzian.latestSignal(np.array([0, 2, 4, -6]), np.array([True, True, True, False])) == (False, False)
+    screenDict, saveDict = {}, {}
+    assert screener.validateLorentzian(None, screenDict, saveDict, lookFor=3, signal=(False, True))
+    assert saveDict['Pattern'] == 'Lorentzian-Sell'
+
+
+def test_trendlines():
+    bars = int(''.join(c for c in configManager.period if c.isdigit()))
+    close = 100 + np.arange(bars, dtype=np.float64) + 3 * np.sin(np.arange(bars))
+    data = pd.DataFrame({'Open': close, 'High': close + 1, 'Low': close - 1, 'Close': close, 'Volume': np.full(bars, 1000.0)},
+                        index=pd.date_range('2023-01-02', periods=bars, freq='B'))
+    fullData, processedData = screener.preprocessData(data.copy(), daysToLookback=configManager.daysToLookback)
+    screenDict, saveDict = {}, {}
+    assert screener.findTrendlines(fullData, screenDict, saveDict)
+    assert saveDict['Pattern'] == 'Trendline-Support'
+    # Falling closes are never on a rising support
+    fullData, processedData = screener.preprocessData(data[::-1].set_axis(data.index).copy(), daysToLookback=configManager.daysToLookback)
+    assert not screener.findTrendlines(fullData, {}, {})
+
+
+def test_vector_store():
+    from classes.VectorStore import VectorStore
+    class Collection:
+        def __init__(self):
+            self.upserts = []
+        def upsert(self, embeddings, documents, ids):
+            self.upserts.append(dict(zip(ids, embeddings)))
+    store = VectorStore(flushSize=2)
+    store.collection = Collection()
+    close = 100 + np.arange(30, dtype=np.float64)
+    data = pd.DataFrame({'Open': close, 'High': close + 1, 'Low': close - 1, 'Close': close, 'Volume': np.full(30, 1000.0)},
+                        index=pd.date_range('2023-01-02', periods=30, freq='B'))
+    fullData, processedData = screener.preprocessData(data, daysToLookback=configManager.daysToLookback)
+    embedding = screener.addVector(fullData, 'SBIN', 5, store=store)
+    assert len(embedding) == 20 and len(store) == 1 and store.collection.upserts == []
+    store.add('INFY', embedding)
+    assert store.collection.upserts == [{'SBIN': embedding, 'INFY': embedding}] and len(store) == 0
+    store.add('TCS', embedding)
+    assert store.flush() == 1 and store.flush() == 0 and len(store.collection.upserts) == 2
+
+
+def test_vector_index(tmp_path):
+    from classes.VectorStore import VectorIndex
+    rng = np.random.default_rng(0)
+    embeddings = rng.normal(size=(100, 20)).astype(np.float32)
+    ids = [f'S{i}' for i in range(100)]
+    for metric in VectorIndex.metrics:
+        index = VectorIndex(metric, path=str(tmp_path / metric))
+        index.upsert(embeddings[:50], ids=ids[:50])
+        index.upsert(embeddings[50:], documents=ids[50:], ids=ids[50:])
+        query = index.get(ids=['S7'], include=['embeddings'])['embeddings']
+        if metric == 'l2':
+            distances = ((embeddings - embeddings[7]) ** 2).sum(axis=1)
+        else:
+            distances = 1 - embeddings @ embeddings[7] / np.linalg.norm(embeddings, axis=1) / np.linalg.norm(embeddings[7])
+        assert index.query(query, n_results=4)['ids'][0] == [ids[i] for i in np.argsort(distances)[:4]]
+        saved = VectorIndex.load(str(tmp_path / metric), metric)
+        assert isinstance(saved.matrix, np.memmap) and saved.query(query, n_results=4) == index.query(query, n_results=4)
+    index.upsert(embeddings[:1] + 1, ids=['S7'])
+    assert len(index) == 100 and np.allclose(VectorIndex.load(str(tmp_path)).get(['S7'])['embeddings'][0], embeddings[0] + 1)
+
+
+def test_window_index(tmp_path):
+    from classes.WindowIndex import WindowIndex
+    rng = np.random.default_rng(1)
+    stockData = {}
+    for stock in ['SBIN', 'INFY', 'TCS']:
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, 60)))
+        stockData[stock] = pd.DataFrame({'Open': close * 1.01, 'High': close * 1.02, 'Low': close * 0.98, 'Close': close},
+                                        index=pd.date_range('2023-01-02', periods=60, freq='B', tz='Asia/Kolkata'))
+    index = WindowIndex()
+    for stock, data in stockData.items():
+        assert index.update(stock, data.iloc[:-10])
+        assert index.update(stock, data) and not index.update(stock, data)
+    changes = stockData['INFY'][WindowIndex.fields].pct_change(fill_method=None).dropna().to_numpy(dtype=np.float32)
+    assert np.array_equal(index.series['INFY'][1], changes)
+    # Window of INFY in the middle of its history is found as the nearest one
+    query = changes[20:25].reshape(-1)
+    nearest = index.query(query, n_results=2)[0]
+    assert nearest[0][:2] == ('INFY', pd.Timestamp(stockData['INFY'].index[25].tz_localize(None))) and nearest[0][2] < 1e-6
+    assert [stock for stock, _, _ in nearest] == ['INFY', nearest[1][0]] and nearest[1][0] != 'INFY'
+    assert all(stock != 'INFY' for stock, _, _ in index.query(query, n_results=5, exclude=['INFY'])[0])
+    assert len(index.query(query, n_results=5, perStock=False)[0]) == 5
+    index.save(str(tmp_path))
+    saved = WindowIndex.load(str(tmp_path))
+    assert isinstance(saved.packed[3], np.memmap) and saved.query(query, n_results=3) == index.query(query, n_results=3)
+    assert np.array_equal(saved.window('TCS', 5), index.window('TCS', 5))
+
+
+def test_lazy_tensorflow_import():
+    import subprocess
+    code = "import sys; import classes.Screener; assert not {'keras', 'tensorflow'} & set(sys.modules)"
+    assert subprocess.run([sys.executable, '-c', code], cwd=os.path.abspath('../src')).returncode == 0
+
+
+def test_numpy_model(tmp_path):
+    pytest.importorskip('h5py')
+    from classes.NumpyModel import NumpyModel
+    h5File = '../src/ml/nifty_model_v3.h5'
+    npzFile = str(tmp_path / 'nifty_model_v3.npz')
+    model = NumpyModel.export(h5File, npzFile)
+    inputs = np.random.default_rng(0).normal(0, 2, (256, 6))
+    assert np.array_equal(NumpyModel.load(npzFile)(inputs), model(inputs))
+    keras = pytest.importorskip('keras')
+    assert np.allclose(model(inputs), keras.models.load_model(h5File).predict(inputs, verbose=0), atol=1e-5)
+
+
+def test_nifty_model_fallback(tmp_path):
+    h5File = str(tmp_path / 'nifty_model_v3.h5')
+    npzFile = str(tmp_path / 'nifty_model_v3.npz')
+    with open(npzFile, 'wb') as file:
+        file.write(b'PK')                       # Left by an interrupted export
+    os.utime(npzFile, (0, 0))
+    with open(h5File, 'w') as file:
+        file.write('<html>Not Found</html>')    # Broken download, export and keras both fail
+    with pytest.raises(Exception):
+        Utility.tools.loadNiftyNetwork(h5File)
+    assert os.listdir(tmp_path) == ['nifty_model_v3.h5']
+
+
+def test_suppress_output(capsys):
+    from classes.SuppressOutput import SuppressOutput
+    with SuppressOutput(suppress_stdout=True, suppress_stderr=True):
+        print('hidden')
+    assert SuppressOutput.enableQuietMode()
+    with SuppressOutput(suppress_stdout=True):
+        with SuppressOutput(suppress_stdout=True):
+            print('hidden')
+        print('hidden')
+    print('shown')
+    assert capsys.readouterr().out == 'shown\n'
+
+
+def test_validator_plan():
+    from classes.ParallelProcessing import ValidatorPlan
+    calls = []
+    def validator(name, pattern):
+        def run(screenDict, saveDict):
+            calls.append(name)
+            saveDict['Pattern'] = pattern
+            return saveDict['Trend'] == 'Up'
+        return run
+    screenDict, saveDict = {'Pattern': ''}, {'Trend': 'Up', 'Pattern': ''}
+    plan = ValidatorPlan(screenDict, saveDict)
+    plan.add('candlePattern', validator('candlePattern', 'Hammer'))
+    plan.add('narrowRange', validator('narrowRange', 'NR4'))
+    plan.add('lorentzian', validator('lorentzian', 'Lorentzian-Buy'))
+    assert plan.get('narrowRange') and calls == ['narrowRange']
+    assert plan.saved('Pattern', ['candlePattern', 'narrowRange']) == 'NR4'
+    assert calls == ['narrowRange', 'candlePattern']
+    plan.complete()
+    assert saveDict['Pattern'] == 'Lorentzian-Buy' and len(calls) == 3
+
+
+def test_reversal_lorentzian():
+    import multiprocessing
+    from classes.ParallelProcessing import StockConsumer
+    close = 100 + np.sin(np.arange(300) / 10)
+    data = pd.DataFrame({'Open': close, 'High': close + 1, 'Low': close - 1, 'Close': close, 'Volume': np.full(300, 1000.0)},
+                        index=pd.date_range('2023-01-02', periods=300, freq='B'))
+    consumer = StockConsumer(None, None, None, multiprocessing.Value('i', 1), multiprocessing.Value('i', 0), proxyServer, multiprocessing.Event())
+    # Only the Lorentzian signal of the cross section can select the stock for reversals 1 (buy) and 2 (sell)
+    for reversalOption, signal in [(1, (True, False)), (2, (False, True))]:
+        consumer.startSession(1, crossSection={'SBIN': ({}, {}, (0, 0, False, False, True, False, 'Sideways', signal))})
+        result = consumer.screenStocks(tickerOption=12, executeOption=6, reversalOption=reversalOption, maLength=None, daysForLowestVolume=0, minRSI=0, maxRSI=100,
+                                       respChartPattern=0, insideBarToLookback=0, totalSymbols=1, configManager=configManager, fetcher=fetcher, screener=screener,
+                                       candlePatterns=candlePatterns, stock='SBIN', newlyListedOnly=False, downloadOnly=False, vectorSearch=False,
+                                       isDevVersion=True, backtestDate=None, fetched=(data.copy(), None))
+        assert result is not None and result[1]['Pattern'] == ('Lorentzian-Buy' if reversalOption == 1 else 'Lorentzian-Sell')
+
+
+def test_consumer_streams():
+    import datetime
+    import multiprocessing
+    from classes.ParallelProcessing import StockConsumer
+    consumer = StockConsumer(None, None, None, multiprocessing.Value('i', 1), multiprocessing.Value('i', 0), proxyServer, multiprocessing.Event())
+    consumer.isTradingTime, consumer.maxStreams = True, 2
+    streams = [consumer.getStream(stock, configManager, datetime.date.today()) for stock in ['SBIN', 'INFY', 'SBIN', 'TCS']]
+    assert streams[0] is streams[2] and list(consumer.streams) == ['SBIN', 'TCS']    # Least recently screened is dropped
+
+
+def test_results_collector(tmp_path):
+    from classes.ResultsCollector import ResultsCollector
+    sinkFile = str(tmp_path / 'results.csv')
+    resultsCollector = ResultsCollector(sinkFile=sinkFile)
+    for stock, rsi in [('SBIN', 55), ('INFY', 42)]:
+        saveDict = {'Stock': stock, 'Consolidating': '5.0%', 'Breaking-Out': '101.5', 'MA-Signal': 'Bullish', 'Volume': '2.1x',
+                    'LTP': '100.0', 'RSI': rsi, 'Trend': 'Weak Up', 'Pattern': '', 'Accuracy': '60%'}
+        resultsCollector.add(dict(saveDict), saveDict)
+        assert len(pd.read_csv(sinkFile)) == len(resultsCollector)
+    screenResults, saveResults = resultsCollector.getResults()
+    assert list(saveResults.columns) == ResultsCollector.columns + ['Accuracy']
+    assert list(saveResults['Stock']) == ['SBIN', 'INFY'] and len(screenResults) == 2
+    assert list(ResultsCollector().getResults()[1].columns) == ResultsCollector.columns
+    # Keys that only later rows have, such as backtest columns, widen the header of the sink
+    sinkFile = str(tmp_path / 'backtest.csv')
+    resultsCollector = ResultsCollector(sinkFile=sinkFile)
+    resultsCollector.add({'Stock': 'SBIN'}, {'Stock': 'SBIN', 'RSI': 55})
+    resultsCollector.add({'Stock': 'INFY'}, {'Stock': 'INFY', 'RSI': 42, '1-Pd': '2.5%'})
+    resultsCollector.add({'Stock': 'TCS'}, {'Stock': 'TCS', 'RSI': 61})
+    sink = pd.read_csv(sinkFile)
+    assert list(sink.columns) == ResultsCollector.columns + ['1-Pd'] and list(sink['Stock']) == ['SBIN', 'INFY', 'TCS']
+    assert list(sink['1-Pd'].fillna('')) == ['', '2.5%', '']
+
+
+def test_consumer_pool():
+    from classes.ParallelProcessing import StockConsumerPool, ScreeningStalled
+    consumerPool = StockConsumerPool(2, proxyServer)
+    try:
+        pids = [worker.pid for worker in consumerPool.consumers]
+        consumerPool.startSession()
+        consumerPool.results_queue.put((0, 'stale'))
+        consumerPool.results_queue.put((1, 'fresh'))
+        assert consumerPool.get() == 'fresh'
+        consumerPool.startSession()
+        assert consumerPool.session == 2 and consumerPool.screenResultsCounter.value == 0
+        assert consumerPool.isUsable(2, proxyServer) and [worker.pid for worker in consumerPool.consumers] == pids
+        # A lost result does not hang the scan
+        with pytest.raises(ScreeningStalled):
+            consumerPool.get(timeout=1)
+        consumerPool.consumers[0].terminate()
+        consumerPool.consumers[0].join()
+        with pytest.raises(ScreeningStalled):
+            consumerPool.get()
+        assert not consumerPool.isUsable(2, proxyServer)
+    finally:
+        consumerPool.terminate()
+
+
+def test_consumer_pool_dispatch(monkeypatch):
+    from classes.ParallelProcessing import StockConsumer, StockConsumerPool
+    monkeypatch.setattr(StockConsumer, 'start', lambda self: None)     # Tasks stay in the queues
+    consumerPool = StockConsumerPool(2, proxyServer)
+    consumerPool.startSession()
+    stocks = ['SBIN', 'INFY', 'TCS', 'HDFC', 'ITC']
+    consumerPool.dispatch(stocks, chunkSize=2, fetchStocks=['M&M'],
+                          fetchStock=lambda stock: (stock.lower(), None), fetchThreads=2).join()
+    # Every stock is queued to the consumer it is routed to, in chunks of the stocks of that consumer
+    routed = [[stock for stock in stocks if consumerPool.route(stock) == consumer] for consumer in range(2)]
+    for consumer, worker in enumerate(consumerPool.consumers):
+        chunks = [routed[consumer][i:i+2] for i in range(0, len(routed[consumer]), 2)]
+        tasks = [worker.task_queue.get(timeout=5) for _ in chunks]
+        assert tasks == [(1, [(stock, None) for stock in chunk]) for chunk in chunks]
+    assert consumerPool.consumers[consumerPool.route('M&M')].task_queue.get(timeout=5) == (1, [('M&M', ('m&m', None))])
+    assert len({consumerPool.route(stock) for stock in stocks}) == 2 and consumerPool.route('SBIN') == consumerPool.route('SBIN')
+
+
+def test_suppress_output_threads(capsys):
+    import threading
+    from classes.SuppressOutput import SuppressOutput
+    entered, release = threading.Event(), threading.Event()
+    def fetch():
+        with SuppressOutput(suppress_stdout=True, suppress_stderr=True):
+            entered.set()
+            release.wait(5)
+            print('hidden')
+    # Main thread output stays visible while a fetch thread is suppressed, also through a stream
+    # installed afterwards, like the print hook of alive_bar
+    hooked = []
+    class PrintHook:
+        def write(self, text):
+            hooked.append(text)
+        def flush(self):
+            pass
+    for hook in (None, PrintHook()):
+        stdout = sys.stdout
+        if hook is not None:
+            sys.stdout = hook
+        try:
+            entered.clear(), release.clear()
+            thread = threading.Thread(target=fetch)
+            thread.start()
+            entered.wait(5)
+            print('shown')
+            release.set()
+            thread.join()
+        finally:
+            sys.stdout = stdout
+    assert capsys.readouterr().out == 'shown\n' and ''.join(hooked) == 'shown\n'
+
+
 # def test_ota_updater():
 #     try:
 #         OTAUpdater.checkForUpdate(proxyServer, VERSION)
@@ -0,0 +1,51 @@
+'''
+ *  Project             :   Screenipy
+ *  Author              :   Pranjal Joshi
+ *  Created             :   17/10/2026
+ *  Description         :   Benchmark of output suppression per 1000 stocks (Run: python suppress_benchmark.py)
+'''
+
+import sys
+import os
+import timeit
+
+sys.path.append(os.path.abspath('../src'))
+from classes.SuppressOutput import SuppressOutput
+
+STOCKS = 1000
+SUPPRESSIONS = 6        # Suppressed validators per stock: trend, candle patterns, narrow range, VCP, trendlines, Lorentzian
+
+# Suppression as it was, opening devnull on every entry
+class LegacySuppressOutput:
+    def __init__(self, suppress_stdout=False, suppress_stderr=False):
+        self.suppress_stdout = suppress_stdout
+        self.suppress_stderr = suppress_stderr
+    def __enter__(self):
+        devnull = open(os.devnull, "w")
+        if self.suppress_stdout:
+            self._stdout = sys.stdout
+            sys.stdout = devnull
+        if self.suppress_stderr:
+            self._stderr = sys.stderr
+            sys.stderr = devnull
+    def __exit__(self, *args):
+        if self.suppress_stdout:
+            sys.stdout = self._stdout
+        if self.suppress_stderr:
+            sys.stderr = self._stderr
+
+def screen(suppressOutput):
+    for _ in range(STOCKS):
+        for _ in range(SUPPRESSIONS):
+            with suppressOutput(suppress_stdout=True, suppress_stderr=True):
+                print('validator output')
+
+def benchmark(name, suppressOutput):
+    seconds = min(timeit.repeat(lambda: screen(suppressOutput), number=1, repeat=3))
+    print(f'{name:<40}{seconds * 1e3:>10.2f} ms per {STOCKS} stocks')
+
+if __name__ == '__main__':
+    benchmark('Devnull opened per suppression', LegacySuppressOutput)
+    benchmark('Streams swapped, devnull reused', SuppressOutput)
+    SuppressOutput.enableQuietMode()
+    benchmark('Quiet mode of worker processes', SuppressOutput)
@@ -0,0 +1,58 @@
+'''
+ *  Project             :   Screenipy
+ *  Author              :   Pranjal Joshi
+ *  Created             :   17/10/2026
+ *  Description         :   Benchmark of per call overhead of the TA backends (Run: python ta_benchmark.py)
+'''
+
+import sys
+import os
+import timeit
+import importlib
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath('../src'))
+import classes.ScreenipyTA as ScreenipyTA
+
+CALLS = 1000
+
+# Exception driven fallback used before the backend was resolved at import
+def legacyEMA(talib, close, timeperiod):
+    try:
+        return talib.ema(close, timeperiod)
+    except Exception as e:
+        return talib.EMA(close.to_numpy().reshape(-1), timeperiod)
+
+def legacyCandlePattern(talib, open, high, low, close):
+    try:
+        try:
+            return talib.cdl_pattern(open, high, low, close, 'hammer').tail(1).values[0][0] != 0
+        except Exception as e:
+            return talib.CDLHAMMER(open.to_numpy().reshape(-1), high.to_numpy().reshape(-1), low.to_numpy().reshape(-1), close.to_numpy().reshape(-1)).tail(1).item() != 0
+    except AttributeError:
+        return False
+
+def benchmark(name, function):
+    seconds = min(timeit.repeat(function, number=CALLS, repeat=3))
+    print(f'{name:<40}{seconds / CALLS * 1e6:>10.1f} us/call')
+
+if __name__ == '__main__':
+    rng = np.random.default_rng(1)
+    close = pd.Series(100 * np.exp(np.cumsum(rng.normal(0, 0.02, 300))))
+    open, high, low = close * 0.99, close * 1.01, close * 0.98
+    for module in ['talib', 'pandas_ta']:
+        try:
+            talib = importlib.import_module(module)
+        except ImportError:
+            print(f'[+] {module} is not installed, skipping..')
+            continue
+        # Bind the module level backend to the library being benchmarked
+        ScreenipyTA.talib = talib
+        backend = ScreenipyTA.TalibBackend if module == 'talib' else ScreenipyTA.PandasTaBackend
+        print(f'[+] Backend: {module}')
+        benchmark('EMA (exception fallback)', lambda: legacyEMA(talib, close, 50))
+        benchmark('EMA (resolved at import)', lambda: backend.EMA(close, 50))
+        benchmark('EMA (resolved, float64 array)', lambda: backend.EMA(close.to_numpy(), 50))
+        benchmark('CDLHAMMER (exception fallback)', lambda: legacyCandlePattern(talib, open, high, low, close))
+        benchmark('CDLHAMMER (resolved at import)', lambda: backend.candlePattern('CDLHAMMER', open, high, low, close))
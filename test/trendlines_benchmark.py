@@ -0,0 +1,57 @@
+'''
+ *  Project             :   Screenipy
+ *  Author              :   Pranjal Joshi
+ *  Created             :   17/10/2026
+ *  Description         :   Benchmark of findTrendlines on synthetic series (Run: python trendlines_benchmark.py)
+'''
+
+import sys
+import os
+import time
+import numpy as np
+import pandas as pd
+from scipy.stats import linregress
+
+sys.path.append(os.path.abspath('../src'))
+import classes.ConfigManager as ConfigManager
+import classes.Screener as Screener
+
+SERIES = 2000
+BARS = 300
+
+configManager = ConfigManager.tools()
+configManager.period = f'{BARS}d'
+screener = Screener.tools(configManager)
+
+# Support trendline as found before the refits were bounded, returns (found, refits)
+def legacyTrendlines(data, percentage=0.05):
+    data = data[::-1].copy()
+    data['Number'] = np.arange(len(data))+1
+    data_low = data.copy()
+    refits = 0
+    while len(data_low) > 30:
+        slope, intercept, r_value, p_value, std_err = linregress(x=data_low['Number'], y=data_low['Low'])
+        data_low = data_low.loc[data_low['Low'] < slope * data_low['Number'] + intercept]
+        refits += 1
+    slope, intercept, r_value, p_value, std_err = linregress(x=data_low['Number'], y=data_low['Close'])
+    support = slope * data['Number'].iloc[-1] + intercept
+    return (support - support * percentage) < data['Close'].iloc[-1] < (support + support * percentage) and slope > 0.15, refits
+
+def benchmark(name, function, stocks):
+    start = time.perf_counter()
+    found = sum(bool(function(fullData)) for fullData in stocks)
+    seconds = time.perf_counter() - start
+    print(f'{name:<32}{seconds / len(stocks) * 1e3:>8.3f} ms/series{found:>8} found')
+
+if __name__ == '__main__':
+    rng = np.random.default_rng(1)
+    stocks = []
+    for _ in range(SERIES):
+        close = 100 * np.exp(np.cumsum(rng.normal(rng.uniform(-0.002, 0.004), 0.02, BARS)))
+        data = pd.DataFrame({'Open': close, 'High': close * 1.01, 'Low': close * rng.uniform(0.95, 0.99, BARS), 'Close': close,
+                             'Volume': np.full(BARS, 1000.0)}, index=pd.date_range('2023-01-02', periods=BARS, freq='B'))
+        stocks.append(screener.preprocessData(data)[0])
+    refits = [legacyTrendlines(fullData)[1] for fullData in stocks]
+    print(f'[+] {SERIES} series of {BARS} bars, legacy refits: mean {np.mean(refits):.1f}, max {max(refits)}')
+    benchmark('Legacy (linregress + copies)', lambda fullData: legacyTrendlines(fullData)[0], stocks)
+    benchmark('findTrendlines (bounded)', lambda fullData: screener.findTrendlines(fullData, {}, {}), stocks)
@@ -0,0 +1,49 @@
+'''
+ *  Project             :   Screenipy
+ *  Author              :   Pranjal Joshi
+ *  Created             :   17/10/2026
+ *  Description         :   Benchmark of the sliding window index on synthetic series (Run: python window_index_benchmark.py)
+'''
+
+import sys
+import os
+import time
+import tempfile
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath('../src'))
+from classes.WindowIndex import WindowIndex
+
+SERIES = 2000
+BARS = 300
+CANDLES = 20
+QUERIES = 16
+
+def timed(name, function):
+    start = time.perf_counter()
+    result = function()
+    print(f'{name:<40}{(time.perf_counter() - start) * 1e3:>10.1f} ms')
+    return result
+
+if __name__ == '__main__':
+    rng = np.random.default_rng(1)
+    stockData = {}
+    for i in range(SERIES):
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, BARS + 1)))
+        stockData[f'S{i}'] = pd.DataFrame({'Open': close * rng.uniform(0.99, 1.01, BARS + 1), 'High': close * 1.02, 'Low': close * 0.98, 'Close': close},
+                                          index=pd.date_range('2023-01-02', periods=BARS + 1, freq='B'))
+    print(f'[+] {SERIES} series of {BARS} windows of {CANDLES} candles')
+    index = WindowIndex()
+    timed('Build', lambda: [index.update(stock, data.iloc[:-1]) for stock, data in stockData.items()])
+    timed('Update with one new bar', lambda: [index.update(stock, data) for stock, data in stockData.items()])
+    timed('Pack', index.pack)
+    queries = np.stack([index.window(f'S{i}', CANDLES) for i in range(QUERIES)])
+    timed('Query, nearest window per stock', lambda: index.query(queries[0], n_results=5))
+    timed(f'Batch of {QUERIES} queries', lambda: index.query(queries, n_results=5))
+    timed('Query, all windows', lambda: index.query(queries[0], n_results=5, perStock=False))
+    with tempfile.TemporaryDirectory() as path:
+        timed('Save', lambda: index.save(path))
+        saved = timed('Load (memory mapped)', lambda: WindowIndex.load(path))
+        timed('Query of the loaded index', lambda: saved.query(queries[0], n_results=5))
+        del saved